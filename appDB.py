@@ -1,17 +1,19 @@
-# pip install mysql-connector-python openai pillow transformers torch scikit-learn requests prettytable matplotlib duckduckgo_search
+# pip install mysql-connector-python openai pillow transformers torch scikit-learn requests prettytable matplotlib duckduckgo_search numpy
+# Opcional: pyarrow (exportação de resultados para Parquet)
 # Se possível usar VENV (virtualenv) para isolar as dependências do projeto
 # Mude os dados da conexão com o MySQL (para usar o banco de dados local)
 
-from db_operations import connect_mysql, create_tables, drop_tables, insert_default_data, show_tables, exit_db, get_schema_info, make_query, query_by_user
+from db_operations import connect_mysql, create_tables, drop_tables, insert_default_data, show_tables, exit_db, get_schema_info, make_query, query_by_user, valid_date_range
 from manual_user import insert_by_user, update_by_user, delete_by_user
 from ia_integration import  populate_all_tables, generate_sql_query
+from async_queries import run_reports_concurrently
 import mysql.connector
 
 
 if __name__ == "__main__":
     try:
         # con = connect_mysql(host="localhost", user="usuario", password="Senha_1234", database="teste")
-        con = connect_mysql(host="localhost", user="root", password="mysql", database="trabalho_final")
+        con = connect_mysql(host="localhost", user="root", password="mysql", database="trabalho_final", pool_size=5)
 
         if not con:
             print("Não foi possível conectar ao banco de dados.")
@@ -32,14 +34,15 @@ if __name__ == "__main__":
 ║ [  8 ] > Deletar Dados Manualmente          ║
 ║ [  9 ] > IA: Preencher Tabelas              ║
 ║ [ 10 ] > IA: Gerar SQL a partir de Texto    ║
+║ [ 11 ] > Relatórios em Paralelo             ║
 ║ [  0 ] > Explodir Sistema                   ║
 ╚═════════════════════════════════════════════╝
 """)
 
             try:
                 opcao = int(input("Opção: ").strip())
-                if opcao < 0 or opcao > 10:
-                    print("Opção inválida. Escolha um número entre 0 e 10.")
+                if opcao < 0 or opcao > 11:
+                    print("Opção inválida. Escolha um número entre 0 e 11.")
                     continue
             except ValueError:
                 print("Entrada inválida. Por favor, digite um número.")
@@ -59,7 +62,8 @@ if __name__ == "__main__":
                     drop_tables(con)
                     
                 case 3:
-                    insert_default_data(con)
+                    rapido = input("Usar carga rápida (LOAD DATA LOCAL INFILE)? (s/N): ").strip().lower()
+                    insert_default_data(con, modo_rapido=rapido in ['s', 'sim', 'y', 'yes'])
                     
                 case 4:
                     show_tables(con)
@@ -81,7 +85,8 @@ if __name__ == "__main__":
                     n_linhas = input("Quantas linhas por tabela? [padrão=10]: ").strip()
                     n_linhas = int(n_linhas) if n_linhas.isdigit() and int(n_linhas) > 0 else 10
                     n_esp = n_linhas
-                    populate_all_tables(con, n_linhas=n_linhas, n_especies=n_esp)
+                    streaming = input("Inserir os registros à medida que a IA os gera (streaming)? [s/N]: ").strip().lower() == "s"
+                    populate_all_tables(con, n_linhas=n_linhas, n_especies=n_esp, streaming=streaming)
 
                 case 10:
                     prompt_usuario = input("Digite sua consulta em linguagem natural: ").strip()
@@ -93,6 +98,14 @@ if __name__ == "__main__":
                             make_query(con, query)
                         else:
                             print("Erro: não foi possível gerar a query SQL")
+
+                case 11:
+                    data_ini = input("Digite a data inicial (YYYY-MM-DD) dos relatórios: ").strip()
+                    data_fim = input("Digite a data final (YYYY-MM-DD) dos relatórios: ").strip()
+                    if valid_date_range(data_ini, data_fim):
+                        run_reports_concurrently(con, data_ini, data_fim)
+                    else:
+                        print("Data inválida. Por favor, digite no formato YYYY-MM-DD.")
                 
                 case _:
                     print("Opção inválida. Tente novamente.")
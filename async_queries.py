@@ -0,0 +1,168 @@
+import asyncio
+import time
+
+import mysql.connector
+from prettytable import PrettyTable
+
+from db_pool import borrow_connection, PoolError
+from db_operations import open_query, fetch_pages, discard_remaining, get_schema_info, CONSULTAS_RELATORIOS, LIMITE_LINHAS
+from report_summaries import summaries_available
+from schema_catalog import invalidate_catalog
+
+
+class AsyncQueryRunner:
+    """
+    Executa consultas de leitura independentes em paralelo com asyncio.
+    Cada consulta roda em uma thread (asyncio.to_thread) com uma conexão própria emprestada
+    do pool de `conexao`; um semáforo limita as consultas simultâneas às conexões livres.
+    Cancelar a tarefa (ou estourar o timeout) interrompe a consulta no servidor com KILL QUERY.
+    """
+
+    def __init__(self, conexao, concorrencia=None):
+        self.conexao = conexao
+        pool = getattr(conexao, "pool", None)
+        if concorrencia is None:
+            # A conexão principal continua emprestada; sem pool, as consultas rodam em série
+            concorrencia = max(1, pool.tamanho - 1) if pool is not None else 1
+        self._semaforo = asyncio.Semaphore(concorrencia)
+
+    def _fetch(self, sql, params, limite, sessao):
+        with borrow_connection(self.conexao) as cnx:
+            sessao["id"] = cnx.connection_id
+            cursor = open_query(cnx, sql, params, limite)
+            try:
+                colunas = [col[0] for col in cursor.description] if cursor.description else []
+                linhas = [linha for pagina in fetch_pages(cursor, limite=limite) for linha in pagina]
+                discard_remaining(cursor)
+            finally:
+                sessao["id"] = None
+                cursor.close()
+        return colunas, linhas
+
+    def _kill(self, id_sessao):
+        """
+        Interrompe a consulta de uma sessão com KILL QUERY, em uma conexão avulsa:
+        as conexões do pool podem estar todas ocupadas pelas próprias consultas a cancelar.
+        """
+        pool = getattr(self.conexao, "pool", None)
+        if pool is None:
+            # Sem pool, a consulta roda na própria conexão principal
+            print(f"Consulta {id_sessao} não pode ser interrompida no servidor (conexão sem pool).")
+            return
+        try:
+            cnx = pool.open_dedicated()
+        except (mysql.connector.Error, PoolError) as err:
+            print(f"Erro ao cancelar a consulta {id_sessao}: {err}")
+            return
+        try:
+            cursor = cnx.cursor()
+            try:
+                cursor.execute(f"KILL QUERY {int(id_sessao)}")
+            finally:
+                cursor.close()
+        except mysql.connector.Error as err:
+            print(f"Erro ao cancelar a consulta {id_sessao}: {err}")
+        finally:
+            cnx.close()
+
+    async def query(self, sql, params=None, limite=LIMITE_LINHAS):
+        """
+        Executa uma consulta de leitura.
+        Retorna:
+            tuple: (nomes das colunas, lista de tuplas com até `limite` linhas)
+        """
+        sessao = {"id": None}
+        async with self._semaforo:
+            tarefa = asyncio.ensure_future(asyncio.to_thread(self._fetch, sql, params, limite, sessao))
+            try:
+                return await asyncio.shield(tarefa)
+            except asyncio.CancelledError:
+                if sessao["id"] is not None:
+                    await asyncio.to_thread(self._kill, sessao["id"])
+                # Aguarda a thread liberar a conexão antes de propagar o cancelamento
+                await asyncio.gather(tarefa, return_exceptions=True)
+                raise
+
+    async def report(self, opcao, data_ini=None, data_fim=None, limite=LIMITE_LINHAS):
+        """Executa um relatório de CONSULTAS_RELATORIOS (ver db_operations.run_report)."""
+        relatorio = CONSULTAS_RELATORIOS[opcao]
+        params = (data_ini, data_fim) if relatorio["periodo"] else None
+        usar_resumo = await asyncio.to_thread(summaries_available, self.conexao)
+        sql = relatorio["sql_resumo"] if usar_resumo else relatorio["sql"]
+        return await self.query(sql, params, limite)
+
+    async def schema(self):
+        """Recarrega o catálogo do schema e retorna get_schema_info."""
+        def recarregar():
+            invalidate_catalog()
+            with borrow_connection(self.conexao) as cnx:
+                return get_schema_info(cnx)
+
+        async with self._semaforo:
+            return await asyncio.to_thread(recarregar)
+
+
+async def _timed(coro):
+    inicio = time.perf_counter()
+    resultado = await coro
+    return resultado, time.perf_counter() - inicio
+
+
+async def run_reports_async(conexao, data_ini, data_fim, opcoes=None, atualizar_schema=True, timeout=None):
+    """
+    Executa vários relatórios (e a atualização do schema) ao mesmo tempo.
+    Parâmetros:
+        data_ini (str), data_fim (str): Intervalo de datas dos relatórios com período.
+        opcoes (iterable, opcional): Chaves de CONSULTAS_RELATORIOS (padrão: todas).
+        atualizar_schema (bool): Se True, também recarrega o catálogo do schema.
+        timeout (float, opcional): Segundos até cancelar as consultas ainda em execução.
+    Retorna:
+        dict: Chave ("schema" ou opção do relatório) -> (resultado, segundos) ou a exceção ocorrida.
+    """
+    executor = AsyncQueryRunner(conexao)
+    tarefas = {opcao: executor.report(opcao, data_ini, data_fim) for opcao in (opcoes or CONSULTAS_RELATORIOS)}
+    if atualizar_schema:
+        tarefas["schema"] = executor.schema()
+
+    resultados = await asyncio.wait_for(
+        asyncio.gather(*(_timed(coro) for coro in tarefas.values()), return_exceptions=True),
+        timeout
+    )
+    return dict(zip(tarefas, resultados))
+
+
+def run_reports_concurrently(conexao, data_ini, data_fim, opcoes=None, timeout=None):
+    """
+    Executa os relatórios em paralelo e exibe cada resultado e o tempo total, comparado à soma dos tempos.
+    Retorna:
+        dict: Ver run_reports_async.
+    """
+    inicio = time.perf_counter()
+    try:
+        resultados = asyncio.run(run_reports_async(conexao, data_ini, data_fim, opcoes, timeout=timeout))
+    except asyncio.TimeoutError:
+        print(f"Consultas canceladas após {timeout}s.")
+        return {}
+    total = time.perf_counter() - inicio
+
+    soma = 0.0
+    for chave, resultado in resultados.items():
+        titulo = "Atualização do Schema" if chave == "schema" else CONSULTAS_RELATORIOS[chave]["titulo"]
+        if isinstance(resultado, Exception):
+            print(f"\n{titulo}: erro — {resultado}")
+            continue
+        dados, segundos = resultado
+        soma += segundos
+        if chave == "schema":
+            print(f"\n{titulo}: {len(dados)} tabelas ({segundos:.3f}s)")
+            continue
+        colunas, linhas = dados
+        print(f"\n{titulo} ({len(linhas)} linhas, {segundos:.3f}s)")
+        if linhas:
+            tabela = PrettyTable()
+            tabela.field_names = colunas
+            tabela.add_rows(linhas)
+            print(tabela)
+
+    print(f"\nTempo total: {total:.3f}s (soma dos tempos individuais: {soma:.3f}s)")
+    return resultados
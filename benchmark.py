@@ -0,0 +1,282 @@
+# Benchmark de carga e consultas em diferentes fatores de escala.
+# Uso: python benchmark.py --password mysql --escalas 1 100 10000 --saida benchmark.json
+# ATENÇÃO: o banco indicado em --database tem todas as tabelas apagadas e recriadas a cada escala.
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from db_operations import (
+    connect_mysql, create_tables, drop_tables, insert_default_data, show_table,
+    get_schema_info, run_report, exit_db, CONSULTAS_RELATORIOS
+)
+from schema_catalog import invalidate_catalog, list_tables
+from schema_deploy import parse_schema_script
+from seed_loader import iter_json_records
+
+
+ESCALAS_PADRAO = (1, 100, 10000)
+PERIODO_RELATORIOS = ("1900-01-01", "2100-12-31")  # Intervalo que cobre todos os dados gerados
+
+
+# ---------------------------------------------------------------------------
+# Geração dos dados em escala
+# ---------------------------------------------------------------------------
+
+def _scaling_rules(modelo):
+    """
+    Extrai do modelo do script, para cada tabela, quais colunas são identificadores
+    (e de qual tabela) e quais colunas de texto precisam variar para manter os UNIQUE.
+    Retorna:
+        dict: nome_lower -> {"ids": {coluna_lower: tabela_lower}, "unicas": {coluna_lower: tamanho}}
+    """
+    regras = {}
+    for nome, tabela in modelo["tabelas"].items():
+        ids = {}
+        for fk in tabela["fks"]:
+            for coluna in fk["colunas"]:
+                ids[coluna] = fk["tabela_ref"]
+        for coluna in tabela["pk"]:
+            ids.setdefault(coluna, nome)
+
+        colunas_check = {c for check in tabela["checks"] for c in check["assinatura"][0]}
+        unicas = {}
+        for unique in tabela["uniques"]:
+            candidatas = [c for c in unique["colunas"]
+                          if c not in ids and c not in colunas_check
+                          and tabela["colunas"][c]["tipo"].startswith(("varchar", "char"))]
+            if candidatas:
+                coluna = candidatas[-1]
+                tipo = tabela["colunas"][coluna]["tipo"]
+                unicas[coluna] = int(tipo[tipo.index("(") + 1:tipo.index(")")])
+        regras[nome] = {"ids": ids, "unicas": unicas}
+    return regras
+
+
+def _unique_variant(valor, copia, indice, tamanho, largura):
+    """Gera uma variação única de um valor de texto para a cópia `copia` (> 0) dos dados."""
+    if valor is None:
+        return None
+    if valor.isdigit() and len(valor) == tamanho:
+        # Ex.: CPF -> número de mesmo tamanho prefixado pela cópia
+        return f"{copia:0{largura}d}{indice:0{tamanho - largura}d}"[:tamanho]
+    sufixo = f"#{copia}"
+    return valor[:tamanho - len(sufixo)] + sufixo
+
+
+def generate_scaled_seeds(diretorio_origem, diretorio_destino, fator, arquivo_sql="script.sql"):
+    """
+    Gera arquivos de carga com `fator` vezes o volume de `diretorio_origem`.
+    Cada cópia desloca as chaves primárias e estrangeiras pelo maior ID da tabela referenciada
+    e altera as colunas UNIQUE, preservando a integridade referencial entre as cópias.
+    Os arquivos são escritos de forma incremental (a memória não cresce com o fator).
+    Parâmetros:
+        diretorio_origem (str): Pasta com os JSON originais.
+        diretorio_destino (str): Pasta onde os JSON em escala serão gravados.
+        fator (int): Número de cópias dos dados.
+        arquivo_sql (str): Script DDL usado para identificar chaves e colunas únicas.
+    Retorna:
+        dict: Tabela -> número de registros gerados.
+    """
+    regras = _scaling_rules(parse_schema_script(arquivo_sql))
+    os.makedirs(diretorio_destino, exist_ok=True)
+
+    # Carrega os dados originais (pequenos) e calcula o deslocamento de IDs de cada tabela
+    originais = {}
+    for arquivo in sorted(os.listdir(diretorio_origem)):
+        nome, extensao = os.path.splitext(arquivo)
+        if extensao == ".json" and nome.lower() in regras:
+            originais[nome.lower()] = list(iter_json_records(os.path.join(diretorio_origem, arquivo)))
+
+    deslocamentos = {}
+    for nome, registros in originais.items():
+        pk = [c for c, ref in regras[nome]["ids"].items() if ref == nome]
+        maiores = [v for r in registros for k, v in r.items() if k.lower() in pk and isinstance(v, int)]
+        deslocamentos[nome] = max(maiores, default=0) + 1
+
+    largura = len(str(fator))
+    linhas = {}
+    for nome, registros in originais.items():
+        ids = regras[nome]["ids"]
+        unicas = regras[nome]["unicas"]
+        n = 0
+        with open(os.path.join(diretorio_destino, f"{nome}.json"), "w", encoding="utf-8") as f:
+            f.write('{"registros": [\n')
+            for copia in range(fator):
+                for registro in registros:
+                    if copia:
+                        novo = {}
+                        for campo, valor in registro.items():
+                            chave = campo.lower()
+                            ref = ids.get(chave)
+                            if ref is not None and isinstance(valor, int):
+                                valor += copia * deslocamentos.get(ref, 0)
+                            elif chave in unicas:
+                                valor = _unique_variant(valor, copia, n % len(registros), unicas[chave], largura)
+                            novo[campo] = valor
+                        registro = novo
+                    f.write((",\n" if n else "") + json.dumps(registro, ensure_ascii=False))
+                    n += 1
+            f.write("\n]}\n")
+        linhas[nome] = n
+    return linhas
+
+
+# ---------------------------------------------------------------------------
+# Medições
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def _silent():
+    """Descarta a saída impressa pelas funções medidas."""
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        yield
+
+
+def _measure(funcao, repeticoes, preparar=None):
+    """
+    Executa `funcao` `repeticoes` vezes e retorna estatísticas dos tempos (em segundos).
+    `preparar`, se informado, roda antes de cada repetição e fica fora da medição.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        with _silent():
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+    return {
+        "min": round(min(tempos), 6),
+        "mediana": round(statistics.median(tempos), 6),
+        "media": round(statistics.fmean(tempos), 6),
+        "repeticoes": repeticoes
+    }
+
+
+def _count_rows(conexao):
+    contagens = {}
+    cursor = conexao.cursor()
+    try:
+        for tabela in list_tables(conexao):
+            cursor.execute(f"SELECT COUNT(*) FROM `{tabela}`")
+            contagens[tabela] = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return contagens
+
+
+def run_scale(conexao, diretorio, fator, repeticoes, modo_rapido):
+    """
+    Recria o schema, carrega os dados de `diretorio` e mede carga, visualização,
+    relatórios e leitura do schema.
+    Retorna:
+        dict: Resultados da escala.
+    """
+    with _silent():
+        drop_tables(conexao)
+        create_tables(conexao)
+
+    with _silent():
+        inicio = time.perf_counter()
+        tempos_carga = insert_default_data(conexao, diretorio, modo_rapido=modo_rapido)
+        total_carga = time.perf_counter() - inicio
+
+    resultado = {
+        "fator": fator,
+        "linhas": _count_rows(conexao),
+        "carga": {
+            "total": round(total_carga, 6),
+            "tabelas": {t: round(s, 6) for t, s in tempos_carga.items()}
+        },
+        "show_table": {},
+        "relatorios": {},
+    }
+    print(f"  Carga: {total_carga:.3f}s ({sum(resultado['linhas'].values())} linhas)")
+
+    for tabela in list_tables(conexao):
+        resultado["show_table"][tabela] = _measure(lambda: show_table(conexao, tabela), repeticoes)
+    print(f"  show_table: {sum(r['mediana'] for r in resultado['show_table'].values()):.3f}s (soma das medianas)")
+
+    for opcao, relatorio in CONSULTAS_RELATORIOS.items():
+        resultado["relatorios"][opcao] = dict(
+            titulo=relatorio["titulo"],
+            **_measure(lambda: run_report(conexao, opcao, *PERIODO_RELATORIOS), repeticoes)
+        )
+        print(f"  Relatório {opcao}: {resultado['relatorios'][opcao]['mediana']:.4f}s")
+
+    # Schema sem cache (primeira leitura) e com o catálogo já carregado
+    resultado["get_schema_info"] = {
+        "frio": _measure(lambda: get_schema_info(conexao), repeticoes, preparar=invalidate_catalog),
+        "quente": _measure(lambda: get_schema_info(conexao), repeticoes),
+    }
+    print(f"  get_schema_info: {resultado['get_schema_info']['frio']['mediana']:.4f}s (frio), "
+          f"{resultado['get_schema_info']['quente']['mediana']:.6f}s (quente)")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga e consultas do NEXUS-BIO em várias escalas.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="trabalho_final_bench",
+                        help="Banco usado no benchmark (as tabelas são apagadas e recriadas)")
+    parser.add_argument("--escalas", type=int, nargs="+", default=list(ESCALAS_PADRAO))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--dados", default="data", help="Pasta com os JSON originais")
+    parser.add_argument("--dir-seeds", default=None, help="Pasta para os JSON em escala (padrão: temporária)")
+    parser.add_argument("--manter-seeds", action="store_true", help="Não apaga os JSON gerados ao final")
+    parser.add_argument("--rapido", action="store_true", help="Carrega com LOAD DATA LOCAL INFILE")
+    parser.add_argument("--pool", type=int, default=5, help="Tamanho do pool de conexões")
+    parser.add_argument("--saida", default="benchmark_resultados.json")
+    args = parser.parse_args()
+
+    conexao = connect_mysql(args.host, args.user, args.password, args.database, args.port, pool_size=args.pool)
+    if not conexao:
+        print("Não foi possível conectar ao banco de dados.")
+        return 1
+
+    dir_seeds = args.dir_seeds or tempfile.mkdtemp(prefix="nexus_bench_")
+    resultados = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "servidor": conexao.get_server_info(),
+        "banco": args.database,
+        "modo_rapido": args.rapido,
+        "escalas": {}
+    }
+
+    try:
+        for fator in args.escalas:
+            print(f"\n=== Escala {fator}x ===")
+            diretorio = os.path.join(dir_seeds, f"{fator}x")
+            inicio = time.perf_counter()
+            gerados = generate_scaled_seeds(args.dados, diretorio, fator)
+            print(f"  Dados gerados em {time.perf_counter() - inicio:.2f}s ({sum(gerados.values())} registros)")
+
+            resultados["escalas"][str(fator)] = run_scale(conexao, diretorio, fator, args.repeticoes, args.rapido)
+
+            # Grava a cada escala, para não perder resultados de execuções longas
+            with open(args.saida, "w", encoding="utf-8") as f:
+                json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+            if not args.manter_seeds:
+                shutil.rmtree(diretorio, ignore_errors=True)
+    finally:
+        if not args.manter_seeds and not args.dir_seeds:
+            shutil.rmtree(dir_seeds, ignore_errors=True)
+        exit_db(conexao)
+
+    print(f"\nResultados gravados em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
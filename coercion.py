@@ -0,0 +1,118 @@
+import re
+from decimal import Decimal, InvalidOperation
+from operator import itemgetter
+
+from schema_catalog import add_invalidation_listener
+
+
+_TIPO_TEXTO = re.compile(r'^(?:var)?char\((\d+)\)')
+_TIPO_INTEIRO = re.compile(r'^(?:tiny|small|medium|big)?int(?:eger)?\b')
+_TIPO_DECIMAL = re.compile(r'^(?:decimal|numeric)\b')
+_TIPO_DATA_HORA = re.compile(r'^(?:datetime|timestamp)\b')
+
+
+def _to_int(valor):
+    try:
+        return int(valor.strip())
+    except ValueError:
+        return valor  # O servidor rejeita e o erro é reportado normalmente
+
+
+def _to_decimal(valor):
+    try:
+        return Decimal(valor.strip().replace(",", "."))
+    except InvalidOperation:
+        return valor
+
+
+def _to_datetime_text(valor):
+    # '2023-05-10T09:15:00Z' -> '2023-05-10 09:15:00'
+    return valor.rstrip("Zz").replace("T", " ", 1)
+
+
+class CoercionPlan:
+    """
+    Plano de conversão de registros (dicts) em tuplas prontas para o INSERT,
+    compilado uma única vez a partir do schema da tabela.
+    Guarda a ordem das colunas, os tamanhos máximos de varchar/char e os conversores
+    de texto para inteiro, decimal e data/hora, evitando regex e consultas ao schema por linha.
+    """
+
+    __slots__ = ("campos", "_extrair", "_truncar", "_converter")
+
+    def __init__(self, campos, schema_colunas):
+        """
+        Parâmetros:
+            campos (list): Colunas na ordem do INSERT.
+            schema_colunas (dict): Nome da coluna -> tipo (ex.: 'varchar(50)'), como em get_table_schema.
+        """
+        self.campos = tuple(campos)
+        if len(self.campos) == 1:
+            campo = self.campos[0]
+            self._extrair = lambda registro: (registro[campo],)
+        else:
+            self._extrair = itemgetter(*self.campos)
+
+        self._truncar = []
+        self._converter = []
+        for i, campo in enumerate(self.campos):
+            tipo = (schema_colunas.get(campo) or "").lower()
+            match = _TIPO_TEXTO.match(tipo)
+            if match:
+                self._truncar.append((i, int(match.group(1))))
+            elif _TIPO_INTEIRO.match(tipo):
+                self._converter.append((i, _to_int))
+            elif _TIPO_DECIMAL.match(tipo):
+                self._converter.append((i, _to_decimal))
+            elif _TIPO_DATA_HORA.match(tipo):
+                self._converter.append((i, _to_datetime_text))
+
+    def apply(self, registros):
+        """
+        Converte uma lista de registros em tuplas na ordem de `campos`.
+        Só textos são convertidos/truncados; demais valores passam intactos.
+        Exceções:
+            KeyError: Se algum registro não tiver uma das colunas do plano.
+        """
+        extrair = self._extrair
+        truncar = self._truncar
+        converter = self._converter
+        if not truncar and not converter:
+            return [extrair(registro) for registro in registros]
+
+        linhas = []
+        for registro in registros:
+            valores = list(extrair(registro))
+            for i, max_len in truncar:
+                valor = valores[i]
+                if valor.__class__ is str and len(valor) > max_len:
+                    print(f"  → Truncado valor de {len(valor)} para {max_len} caracteres")
+                    valores[i] = valor[:max_len]
+            for i, conversor in converter:
+                valor = valores[i]
+                if valor.__class__ is str:
+                    valores[i] = conversor(valor)
+            linhas.append(tuple(valores))
+        return linhas
+
+
+_planos = {}
+
+
+def get_coercion_plan(nome_tabela, campos, schema_colunas):
+    """
+    Retorna o plano de conversão em cache para (tabela, colunas), compilando-o na primeira vez.
+    """
+    chave = (nome_tabela.lower(), tuple(campos))
+    plano = _planos.get(chave)
+    if plano is None:
+        plano = _planos[chave] = CoercionPlan(campos, schema_colunas)
+    return plano
+
+
+def clear_coercion_plans():
+    """Descarta os planos compilados (chamado quando o catálogo do schema é invalidado)."""
+    _planos.clear()
+
+
+add_invalidation_listener(clear_coercion_plans)
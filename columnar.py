@@ -0,0 +1,152 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Exportação Arrow/Parquet é opcional
+    pa = pq = None
+
+
+_NUMERICOS = (int, float, Decimal)
+
+
+def _column_array(valores):
+    """
+    Converte os valores de uma coluna em um array NumPy com tipo nativo quando possível:
+    inteiros sem nulos -> int64; números (inclusive Decimal) -> float64, com nulos como NaN;
+    datas -> datetime64; o restante (texto, bytes, tipos mistos) -> object.
+    """
+    presentes = [v for v in valores if v is not None]
+    if not presentes:
+        return np.full(len(valores), np.nan)
+    if all(isinstance(v, _NUMERICOS) and not isinstance(v, bool) for v in presentes):
+        if len(presentes) == len(valores) and all(isinstance(v, int) for v in presentes):
+            return np.fromiter(valores, dtype=np.int64, count=len(valores))
+        return np.fromiter((np.nan if v is None else float(v) for v in valores), dtype=np.float64, count=len(valores))
+    if all(isinstance(v, (datetime.date, datetime.datetime)) for v in presentes):
+        return np.array([np.datetime64("NaT") if v is None else np.datetime64(v, "us") for v in valores])
+    return np.array(valores, dtype=object)
+
+
+def _concatenate(partes):
+    if len(partes) == 1:
+        return partes[0]
+    tipos = {parte.dtype.kind for parte in partes}
+    if "O" in tipos or ("M" in tipos and len(tipos) > 1):
+        return np.concatenate([parte.astype(object) for parte in partes])
+    return np.concatenate(partes)
+
+
+class ColumnarResult:
+    """
+    Resultado de consulta em colunas (um array NumPy por coluna), em vez de uma lista de tuplas.
+    Colunas numéricas ocupam 8 bytes por valor e permitem estatísticas e gráficos vetorizados.
+    """
+
+    def __init__(self, nomes, colunas):
+        self.nomes = list(nomes)
+        self.colunas = dict(zip(self.nomes, colunas))
+
+    def __len__(self):
+        return len(next(iter(self.colunas.values()))) if self.colunas else 0
+
+    def __getitem__(self, chave):
+        """Coluna pelo nome ou pela posição."""
+        if isinstance(chave, int):
+            chave = self.nomes[chave]
+        return self.colunas[chave]
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays (objetos referenciados por colunas object não incluídos)."""
+        return sum(coluna.nbytes for coluna in self.colunas.values())
+
+    def rows(self):
+        """Linhas como tuplas (compatibilidade com o formato de run_query)."""
+        return list(zip(*(coluna.tolist() for coluna in self.colunas.values())))
+
+    def describe(self):
+        """
+        Estatísticas das colunas numéricas, calculadas de forma vetorizada (nulos ignorados).
+        Retorna:
+            dict: Nome da coluna -> {"n", "soma", "media", "min", "max", "desvio"}.
+        """
+        estatisticas = {}
+        for nome, coluna in self.colunas.items():
+            if coluna.dtype.kind not in "if":
+                continue
+            valores = coluna[~np.isnan(coluna)] if coluna.dtype.kind == "f" else coluna
+            if not len(valores):
+                continue
+            estatisticas[nome] = {
+                "n": int(len(valores)), "soma": float(valores.sum()), "media": float(valores.mean()),
+                "min": float(valores.min()), "max": float(valores.max()), "desvio": float(valores.std())
+            }
+        return estatisticas
+
+    def to_arrow(self):
+        """Converte o resultado em uma pyarrow.Table (requer pyarrow)."""
+        if pa is None:
+            raise ImportError("pyarrow não está instalado (pip install pyarrow)")
+        return pa.table({
+            nome: pa.array(coluna, from_pandas=True) if coluna.dtype.kind != "O" else pa.array(coluna.tolist())
+            for nome, coluna in self.colunas.items()
+        })
+
+    def to_parquet(self, caminho):
+        """Grava o resultado em um arquivo Parquet (requer pyarrow)."""
+        tabela = self.to_arrow()
+        pq.write_table(tabela, caminho)
+        return caminho
+
+
+class ColumnarBuilder:
+    """
+    Acumula páginas de linhas (como lidas de um cursor) convertendo cada página em colunas,
+    de modo que apenas uma página de tuplas fica em memória por vez.
+    """
+
+    def __init__(self, nomes):
+        self.nomes = list(nomes)
+        self._partes = [[] for _ in self.nomes]
+
+    def extend(self, pagina):
+        if not pagina:
+            return
+        for partes, valores in zip(self._partes, zip(*pagina)):
+            partes.append(_column_array(valores))
+
+    def build(self):
+        colunas = [
+            _concatenate(partes) if partes else np.empty(0, dtype=object)
+            for partes in self._partes
+        ]
+        return ColumnarResult(self.nomes, colunas)
+
+
+def to_columnar(nomes, linhas):
+    """Converte uma lista de tuplas em ColumnarResult."""
+    construtor = ColumnarBuilder(nomes)
+    construtor.extend(linhas)
+    return construtor.build()
+
+
+def export_parquet(resultado, caminho):
+    """
+    Exporta um resultado (ColumnarResult) para Parquet.
+    Retorna:
+        bool: True se o arquivo foi gravado.
+    """
+    try:
+        resultado.to_parquet(caminho)
+    except ImportError as err:
+        print(f"Exportação Parquet indisponível: {err}")
+        return False
+    except OSError as err:
+        print(f"Erro ao gravar {caminho}: {err}")
+        return False
+    print(f"Resultado exportado para {caminho} ({len(resultado)} linhas)")
+    return True
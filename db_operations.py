@@ -1,14 +1,48 @@
 import mysql.connector
-from mysql.connector import errorcode
 from prettytable import PrettyTable
 import matplotlib.pyplot as plt
+import numpy as np
 import re
-import json
-
-
-def connect_mysql(host="localhost", user="root", password="", database=None, port=3306):
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db_pool import ConnectionPool, PoolError, TAMANHO_POOL_PADRAO, borrow_connection
+from seed_loader import stream_seed_batches, write_seed_tsv
+from coercion import CoercionPlan, get_coercion_plan
+from schema_deploy import deploy_schema
+from write_events import notify_write
+from report_summaries import summaries_available, check_summaries
+from query_cache import is_cacheable, open_cached, print_cache_stats
+from prepared_statements import execute_prepared, max_rows, print_statement_stats
+from columnar import ColumnarBuilder, ColumnarResult
+from taxonomy import print_rollup  # Também registra a manutenção de nb_taxon_closure e da árvore em memória
+from schema_catalog import (
+    get_catalog, invalidate_catalog, list_tables, resolve_table, get_columns, get_primary_key, dependency_levels
+)
+
+# Inserção em lotes
+TAMANHO_LOTE_MAXIMO = 5000      # Limite de linhas por INSERT multi-linha
+LINHAS_AMOSTRA_LOTE = 200       # Linhas usadas para estimar o tamanho de cada linha
+FRACAO_PACOTE = 0.5             # Fração do max_allowed_packet usada por lote
+PACOTE_PADRAO = 4 * 1024 * 1024 # Valor padrão do MySQL (4 MB) caso a consulta falhe
+
+# Exibição de resultados (cursores sem buffer, lidos página a página)
+TAMANHO_PAGINA = 50             # Linhas por página exibida
+LIMITE_LINHAS = 10000           # Máximo de linhas lidas do servidor por consulta
+
+# Erros que indicam que o servidor/cliente não permite LOAD DATA LOCAL INFILE
+ERROS_LOCAL_INFILE = (1148, 2068, 3948)
+MAX_AVISOS_EXIBIDOS = 10        # Avisos do LOAD DATA exibidos antes de refazer a carga com INSERT
+
+
+def connect_mysql(host="localhost", user="root", password="", database=None, port=3306, pool_size=TAMANHO_POOL_PADRAO):
     """
-    Conecta-se a um banco de dados MySQL e retorna o objeto de conexão.
+    Cria um pool de conexões MySQL e retorna a conexão principal emprestada dele.
+    Outras conexões do mesmo pool podem ser obtidas com `conexao.pool.connection()`
+    (ou db_pool.borrow_connection) para executar operações em paralelo.
 
     Parâmetros:
         host (str): Host do servidor MySQL.
@@ -16,14 +50,17 @@ def connect_mysql(host="localhost", user="root", password="", database=None, por
         password (str): Senha para autenticação.
         database (str, opcional): Nome do banco de dados a ser utilizado.
         port (int): Porta do servidor MySQL.
+        pool_size (int): Número máximo de conexões simultâneas do pool.
 
     Retorna:
-        mysql.connector.connection.MySQLConnection ou None: Objeto de conexão se bem-sucedido, caso contrário None.
+        db_pool.PooledConnection ou None: Conexão principal se bem-sucedido, caso contrário None.
     """
     try:
-        cnx = mysql.connector.connect(
-            host=host, user=user, password=password, database=database, port=port, charset='utf8mb4', use_unicode=True
+        pool = ConnectionPool(
+            tamanho=pool_size, host=host, user=user, password=password, database=database, port=port,
+            charset='utf8mb4', use_unicode=True
         )
+        cnx = pool.checkout()
 
         if cnx is not None and cnx.is_connected():
             print(f"Conectado ao MySQL em {host}:{port}")
@@ -31,66 +68,35 @@ def connect_mysql(host="localhost", user="root", password="", database=None, por
                 print(f"Banco de dados selecionado: {database}")
             else:
                 print("Nenhum banco de dados selecionado.")
+            print(f"Pool de conexões: até {pool_size} conexões simultâneas")
             return cnx
     except mysql.connector.Error as err:
         print("Erro ao conectar ao MySQL:", err)
     return None
 
 
-def create_tables(conexao):
+def create_tables(conexao, arquivo_sql="script.sql"):
     """
-    Cria tabelas em um banco de dados MySQL a partir de um arquivo SQL.
-    Esta função lê um arquivo SQL contendo comandos DDL (Data Definition Language),
-    remove comentários e executa cada comando separadamente na conexão fornecida.
-    Ela trata erros comuns, como tentativa de criar tabelas já existentes e erros de sintaxe,
-    exibindo mensagens informativas para cada situação.
+    Cria/atualiza as tabelas do banco a partir do script DDL de forma idempotente.
+    O script é comparado com o schema atual (information_schema) e apenas tabelas, colunas,
+    chaves, índices e CHECKs ausentes ou diferentes são aplicados; a versão do script
+    fica registrada na tabela interna nb_schema_versao.
     Parâmetros:
-        arquivo_sql (str): Caminho para o arquivo .sql contendo os comandos de criação das tabelas.
         conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
+        arquivo_sql (str): Caminho para o arquivo .sql contendo os comandos de criação das tabelas.
     Retorna:
         None
     """
-    with open("script.sql", "r", encoding="utf-8") as f:
-        script = f.read()
-
-    # Remove comentários --, # e /* */ (Só para garantir)
-    script = re.sub(r"/\*.*?\*/", "", script, flags=re.DOTALL)
-    linhas = script.splitlines()
-    script_limpo = "\n".join(
-        l for l in linhas if not l.strip().startswith(("--", "#")) and l.strip()
-    )
-
-    # Divide as execuções até ;
-    comandos = script_limpo.split(";")
-
-    cursor = conexao.cursor()
-
-    # Executa todos os comandos do script DDL
-    for i, comando in enumerate(comandos):
-        comando = comando.strip()
-        if comando:
-            try:
-                cursor.execute(comando)
-                print(f"[{i+1:02}] Executado: {comando.split()[0].upper()} ...")
-            except mysql.connector.Error as err:
-                erro_tipo = type(err).__name__
-                erro_num = err.errno
-
-                if erro_num == errorcode.ER_TABLE_EXISTS_ERROR:
-                    tabela_match = re.search(
-                        r"CREATE TABLE\s+`?(\w+)`?", comando, re.IGNORECASE
-                    )
-                    nome_tabela = tabela_match.group(1) if tabela_match else "desconhecida"
-                    print(f"[{i+1:02}] Tabela '{nome_tabela}' já existe.")
-                elif erro_num == errorcode.ER_PARSE_ERROR:
-                    print(f"[{i+1:02}] Erro de sintaxe SQL:\n{comando}\n→ {err}")
-                else:
-                    print(
-                        f"[{i+1:02}] {erro_tipo} ({erro_num}) ao executar:\n{comando}\n→ {err}"
-                    )
+    try:
+        deploy_schema(conexao, arquivo_sql)
+    except (OSError, mysql.connector.Error) as err:
+        print(f"Erro ao implantar o schema a partir de '{arquivo_sql}': {err}")
+    finally:
+        invalidate_catalog()
 
+    # Tabelas de resumo recém-criadas em um banco já populado precisam ser calculadas
+    notify_write(conexao, None)
     conexao.commit()
-    cursor.close()
     return None
 
 
@@ -115,16 +121,15 @@ def drop_tables(conexao):
         # Desativar restrições de chave estrangeira
         cursor.execute("SET FOREIGN_KEY_CHECKS = 0;")
 
-        # Busca todas as tabelas
-        cursor.execute("SHOW TABLES;")
-        tabelas = cursor.fetchall()
+        # Busca todas as tabelas (inclusive as internas da aplicação)
+        tabelas = list_tables(conexao, incluir_internas=True)
 
         if not tabelas:
             print("Nenhuma tabela encontrada no banco.")
             return
 
         # Dropa as tabelas
-        for (nome_tabela,) in tabelas:
+        for nome_tabela in tabelas:
             try:
                 cursor.execute(f"DROP TABLE IF EXISTS `{nome_tabela}`;")
                 print(f"Tabela '{nome_tabela.upper()}' removida.")
@@ -139,36 +144,178 @@ def drop_tables(conexao):
 
     except mysql.connector.Error as e:
         print("Erro ao deletar tabelas:", e)
+    finally:
+        invalidate_catalog()
 
 
-def insert_default_data(conexao):
-    ordem_execucao = [
-        # Tabelas base (sem dependências)
-        "taxon", "local_de_coleta", "funcionario", "categoria", 
-        "laboratorio", "financiador", "projeto",
-        
-        # Tabelas com dependências simples
-        "hierarquia", "especie", "equipamento",
-        
-        # Tabelas com dependências múltiplas
-        "especime", "amostra", "artigo", "contrato", "financiamento",
-        
-        # Tabelas de relacionamento
-        "proj_func", "proj_esp", "proj_cat", "registro_de_uso"
-    ]
-    
-    for tabela in ordem_execucao:
+def insert_default_data(conexao, diretorio="data", modo_rapido=False):
+    """
+    Carrega os dados padrão de `diretorio/<tabela>.json` em todas as tabelas.
+    As tabelas são agrupadas em níveis pelo grafo de chaves estrangeiras; as tabelas
+    de um mesmo nível são carregadas em paralelo, cada uma em uma conexão do pool.
+    Cada arquivo é lido de forma incremental: os registros são entregues em lotes
+    ao inseridor enquanto o restante do arquivo ainda está sendo lido.
+    Parâmetros:
+        conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
+        diretorio (str): Pasta com os arquivos JSON de carga.
+        modo_rapido (bool): Se True, converte cada arquivo em TSV e usa LOAD DATA LOCAL INFILE,
+                            voltando ao INSERT em lotes caso o servidor não permita.
+    Retorna:
+        dict: Tempo de carga (em segundos) de cada tabela.
+    """
+    arquivos = {}
+    for tabela in list_tables(conexao):
+        caminho = os.path.join(diretorio, f"{tabela.lower()}.json")
+        if os.path.exists(caminho):
+            arquivos[tabela] = caminho
+
+    if not arquivos:
+        print("Nenhuma tabela com arquivo de carga encontrada. Crie as tabelas primeiro.")
+        return {}
+
+    niveis = dependency_levels(conexao, list(arquivos))
+    pool = getattr(conexao, "pool", None)
+    max_paralelo = max(1, pool.tamanho - 1) if pool is not None else 1
+
+    tempos = {}
+    inicio_total = time.perf_counter()
+
+    for i, nivel in enumerate(niveis):
+        print(f"\nNível {i}: {', '.join(t.upper() for t in nivel)}")
+        with ThreadPoolExecutor(max_workers=min(len(nivel), max_paralelo)) as executor:
+            futuros = [
+                executor.submit(_load_table_file, conexao, tabela, arquivos[tabela], modo_rapido)
+                for tabela in nivel
+            ]
+            for futuro in futuros:
+                tabela, segundos = futuro.result()
+                tempos[tabela] = segundos
+
+    # As tabelas foram carregadas em paralelo e sem notificações por lote:
+    # os dados derivados (resumos, caches) são recalculados de uma vez
+    notify_write(conexao, None)
+    conexao.commit()
+
+    total = time.perf_counter() - inicio_total
+    print("\nTempo de carga por tabela:")
+    for tabela, segundos in tempos.items():
+        print(f"\t• {tabela.upper()}: {segundos:.3f}s")
+    print(f"Tempo total: {total:.3f}s")
+    print_statement_stats()
+    return tempos
+
+
+def _load_table_file(conexao, tabela, caminho, modo_rapido=False):
+    """
+    Carrega um arquivo JSON em uma tabela usando uma conexão emprestada do pool.
+    Retorna:
+        tuple: (tabela, segundos)
+    """
+    inicio = time.perf_counter()
+    try:
+        with borrow_connection(conexao) as cnx:
+            if modo_rapido and load_data_infile(cnx, tabela, caminho):
+                return tabela, time.perf_counter() - inicio
+            insert_record_batches(cnx, tabela, stream_seed_batches(caminho), notificar=False)
+    except FileNotFoundError:
+        print(f"Arquivo JSON não encontrado: {caminho}")
+    except (IOError, ValueError) as e:
+        print(f"Erro ao ler arquivo JSON {caminho}: {e}")
+    except mysql.connector.Error as e:
+        print(f"Erro ao carregar a tabela {tabela.upper()}: {e}")
+    return tabela, time.perf_counter() - inicio
+
+
+def load_data_infile(conexao, nome_tabela, caminho_json):
+    """
+    Carrega um arquivo JSON em uma tabela com LOAD DATA LOCAL INFILE.
+    O JSON é convertido em um TSV temporário usando o mesmo plano de conversão dos INSERTs
+    (truncamento de varchar, conversão de números e datas). A carga usa uma conexão avulsa
+    do pool com LOCAL INFILE restrito ao diretório temporário do TSV; as demais conexões
+    não podem enviar arquivos locais ao servidor.
+    Parâmetros:
+        conexao (db_pool.PooledConnection): Conexão emprestada do pool.
+        nome_tabela (str): Tabela de destino.
+        caminho_json (str): Arquivo JSON de carga.
+    Retorna:
+        bool: True se a carga foi feita; False se o caminho normal (INSERT) deve ser usado.
+              LOAD DATA LOCAL trata erros de dados (chave duplicada, FK, conversão) como avisos e
+              descarta as linhas; nesse caso a carga é desfeita, para que os INSERTs apontem os registros com problema.
+    """
+    pool = getattr(conexao, "pool", None)
+    if pool is None:
+        print(f"Conexão fora de um pool. {nome_tabela.upper()}: usando INSERT em lotes.")
+        return False
+
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("SELECT @@local_infile")
+        if not int(cursor.fetchone()[0]):
+            print(f"Servidor não permite LOCAL INFILE (local_infile=0). {nome_tabela.upper()}: usando INSERT em lotes.")
+            return False
+    except mysql.connector.Error as err:
+        print(f"Não foi possível verificar local_infile: {err}")
+        return False
+    finally:
+        cursor.close()
+
+    schema_colunas = get_table_schema(conexao, nome_tabela)
+    diretorio = tempfile.mkdtemp(prefix="carga_")
+    try:
+        caminho_tsv, campos, n_linhas = write_seed_tsv(
+            caminho_json, lambda campos: get_coercion_plan(nome_tabela, campos, schema_colunas).apply,
+            diretorio=diretorio
+        )
+        if caminho_tsv is None:
+            print(f"Nenhum registro para inserir na tabela {nome_tabela}")
+            return True
+
+        campos_sql = ", ".join(f"`{c}`" for c in campos)
+        query = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE `{nome_tabela}` CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({campos_sql})"
+        )
+
         try:
-            with open(f"data\\{tabela}.json", "r", encoding="utf-8") as file:
-                json_str = file.read()
-                json_dados = json.loads(json_str)  # Convertendo string para dict
-            insert_data_from_json(conexao, tabela, json_dados)
-        except FileNotFoundError:
-            print(f"Arquivo JSON não encontrado.")
-            continue
-        except IOError as e:
-            print(f"Erro ao ler arquivo JSON: {e}")
-            continue
+            carga = pool.open_dedicated(allow_local_infile_in_path=diretorio)
+        except (PoolError, mysql.connector.Error) as err:
+            print(f"Não foi possível abrir a conexão de carga ({err}). {nome_tabela.upper()}: usando INSERT em lotes.")
+            return False
+
+        cursor = carga.cursor()
+        try:
+            inicio = time.perf_counter()
+            cursor.execute(query, (caminho_tsv,))
+            carregadas = cursor.rowcount
+            avisos = cursor.warning_count
+            if carregadas != n_linhas or avisos:
+                cursor.execute(f"SHOW WARNINGS LIMIT {MAX_AVISOS_EXIBIDOS}")
+                mensagens = cursor.fetchall()
+                carga.rollback()
+                print(f"LOAD DATA em {nome_tabela.upper()}: {carregadas}/{n_linhas} linhas, {avisos} avisos. "
+                      "Carga desfeita; refazendo com INSERT em lotes.")
+                for nivel, codigo, mensagem in mensagens:
+                    print(f"\t• {nivel} {codigo}: {mensagem}")
+                return False
+            carga.commit()
+            segundos = max(time.perf_counter() - inicio, 1e-9)
+            print(
+                f"Tabela {nome_tabela.upper()}: {carregadas} linhas via LOAD DATA "
+                f"em {segundos:.3f}s ({carregadas / segundos:,.0f} linhas/s)"
+            )
+            return True
+        except mysql.connector.Error as err:
+            carga.rollback()
+            if err.errno in ERROS_LOCAL_INFILE:
+                print(f"LOCAL INFILE recusado ({err.errno}). {nome_tabela.upper()}: usando INSERT em lotes.")
+            else:
+                print(f"LOAD DATA falhou em {nome_tabela.upper()} ({err}). Refazendo com INSERT em lotes.")
+            return False
+        finally:
+            cursor.close()
+            carga.close()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
 
 
 def insert_data(conexao, nome_tabela, campos, dados):
@@ -196,9 +343,52 @@ def insert_data_from_json(conexao, nome_tabela, json_dados):
 
     schema_colunas = get_table_schema(conexao, nome_tabela)
     campos = list(registros[0].keys())
-    insert_query = build_insert_query(nome_tabela, campos)
 
-    return execute_insertions(conexao, registros, campos, schema_colunas, insert_query)
+    return execute_insertions(conexao, nome_tabela, registros, campos, schema_colunas)
+
+
+def insert_record_batches(conexao, nome_tabela, lotes, notificar=True):
+    """
+    Insere registros que chegam em lotes (ex.: leitura incremental de um arquivo JSON).
+    Os campos são definidos pelo primeiro registro; cada lote recebido é inserido
+    (com INSERTs preparados) e confirmado antes do próximo, mantendo a transação e a memória limitadas.
+    Parâmetros:
+        lotes (iterable): Iterável de listas de registros (dicts).
+        notificar (bool): Se True, informa cada lote inserido aos ouvintes de escrita (write_events).
+    Retorna:
+        bool: True se ao menos uma linha foi inserida.
+    """
+    sucessos, erros = 0, 0
+    campos = None
+
+    try:
+        for lote in lotes:
+            if not lote:
+                continue
+            if campos is None:
+                schema_colunas = get_table_schema(conexao, nome_tabela)
+                campos = list(lote[0].keys())
+                plano = get_coercion_plan(nome_tabela, campos, schema_colunas)
+                tamanho_lote = estimate_batch_size(conexao, lote, campos)
+
+            inseridas = [] if notificar else None
+            for inicio in range(0, len(lote), tamanho_lote):
+                s, e = insert_batch(conexao, nome_tabela, campos, lote[inicio:inicio + tamanho_lote], plano, inseridas)
+                sucessos += s
+                erros += e
+            if inseridas:
+                notify_write(conexao, nome_tabela, [], [dict(zip(campos, valores)) for valores in inseridas])
+            conexao.commit()
+    finally:
+        if campos is not None:
+            conexao.commit()
+
+    if campos is None:
+        print(f"Nenhum registro para inserir na tabela {nome_tabela}")
+        return False
+
+    print(f"Tabela {nome_tabela.upper()}: {sucessos} inserções bem-sucedidas, {erros} erros")
+    return sucessos > 0
 
 
 def validate_and_extract_records(json_dados, nome_tabela):
@@ -220,42 +410,115 @@ def get_table_schema(conexao, nome_tabela):
     """
     Obtém o schema da tabela para verificar os tamanhos máximos das colunas.
     """
-    cursor = conexao.cursor()
-    cursor.execute(f"DESCRIBE `{nome_tabela}`")
-    colunas_detalhes = cursor.fetchall()
-    cursor.close()
-    return {col[0]: col[1] for col in colunas_detalhes}
+    return {col["nome"]: col["tipo"] for col in get_columns(conexao, nome_tabela)}
 
 
-def build_insert_query(nome_tabela, campos):
+def execute_insertions(conexao, nome_tabela, registros, campos, schema_colunas, tamanho_lote=None):
     """
-    Constrói a query de inserção.
+    Executa as inserções na tabela em lotes (INSERT multi-linha preparado, reutilizado
+    entre lotes do mesmo tamanho; ver prepared_statements).
+    Se um lote falhar, apenas esse lote é reexecutado linha a linha, para que
+    handle_insertion_error aponte exatamente o registro problemático.
+    Parâmetros:
+        tamanho_lote (int, opcional): Número de linhas por lote. Se None, é calculado a partir do max_allowed_packet.
     """
-    placeholders = ", ".join(["%s"] * len(campos))
-    campos_sql = ", ".join([f"`{c}`" for c in campos])
-    return f"INSERT INTO `{nome_tabela}` ({campos_sql}) VALUES ({placeholders})"
+    sucessos, erros = 0, 0
+    plano = CoercionPlan(campos, schema_colunas)
+    inseridas = []
 
+    if tamanho_lote is None:
+        tamanho_lote = estimate_batch_size(conexao, registros, campos)
 
-def execute_insertions(conexao, registros, campos, schema_colunas, insert_query):
+    for inicio in range(0, len(registros), tamanho_lote):
+        s, e = insert_batch(conexao, nome_tabela, campos, registros[inicio:inicio + tamanho_lote], plano, inseridas)
+        sucessos += s
+        erros += e
+
+    if inseridas:
+        notify_write(conexao, nome_tabela, [], [dict(zip(campos, valores)) for valores in inseridas])
+    conexao.commit()
+    print(f"Tabela: {sucessos} inserções bem-sucedidas, {erros} erros")
+    return sucessos > 0
+
+
+def insert_batch(conexao, nome_tabela, campos, lote_registros, plano, inseridas=None):
     """
-    Executa as inserções na tabela.
+    Insere um lote com um único INSERT multi-linha preparado.
+    Se o lote falhar, o servidor descarta o comando inteiro e o lote é refeito linha a linha.
+    Parâmetros:
+        plano (coercion.CoercionPlan): Plano que converte os registros em tuplas prontas para envio.
+        inseridas (list, opcional): Recebe as tuplas efetivamente inseridas (para notificar a escrita).
+    Retorna:
+        tuple: (sucessos, erros)
     """
-    cursor = conexao.cursor()
-    sucessos, erros = 0, 0
+    lote_valores = plano.apply(lote_registros)
+    try:
+        execute_prepared(conexao, nome_tabela, campos, lote_valores)
+        if inseridas is not None:
+            inseridas.extend(lote_valores)
+        return len(lote_valores), 0
+    except mysql.connector.Error:
+        return insert_row_by_row(conexao, nome_tabela, campos, lote_registros, lote_valores, inseridas)
+
+
+def estimate_batch_size(conexao, registros, campos):
+    """
+    Estima o tamanho de lote a partir de uma amostra dos registros.
+    """
+    # Valores brutos (antes do truncamento) servem como limite superior do tamanho
+    amostra = [[r.get(c) for c in campos] for r in registros[:LINHAS_AMOSTRA_LOTE]]
+    return min(calculate_batch_size(conexao, amostra), max_rows(campos))
 
-    for registro in registros:
+
+def insert_row_by_row(conexao, nome_tabela, campos, lote_registros, lote_valores, inseridas=None):
+    """
+    Insere um lote linha a linha, reportando cada registro que falhar.
+    Retorna:
+        tuple: (sucessos, erros)
+    """
+    sucessos, erros = 0, 0
+    for registro, valores in zip(lote_registros, lote_valores):
         try:
-            valores = process_record(registro, campos, schema_colunas)
-            cursor.execute(insert_query, tuple(valores))
+            execute_prepared(conexao, nome_tabela, campos, [valores])
             sucessos += 1
+            if inseridas is not None:
+                inseridas.append(valores)
         except mysql.connector.Error as err:
             erros += 1
             handle_insertion_error(err, registro)
+    return sucessos, erros
 
-    conexao.commit()
-    cursor.close()
-    print(f"Tabela: {sucessos} inserções bem-sucedidas, {erros} erros")
-    return sucessos > 0
+
+def get_max_allowed_packet(conexao):
+    """
+    Obtém o valor de max_allowed_packet do servidor (em bytes).
+    """
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("SELECT @@max_allowed_packet")
+        return int(cursor.fetchone()[0])
+    except (mysql.connector.Error, TypeError, ValueError):
+        return PACOTE_PADRAO
+    finally:
+        cursor.close()
+
+
+def calculate_batch_size(conexao, amostra):
+    """
+    Calcula quantas linhas cabem em um INSERT multi-linha sem ultrapassar o max_allowed_packet.
+    Usa a maior linha da amostra (com folga) como estimativa do tamanho de cada linha.
+    Parâmetros:
+        amostra (list): Lista de valores já processados de algumas linhas.
+    Retorna:
+        int: Tamanho do lote.
+    """
+    if not amostra:
+        return TAMANHO_LOTE_MAXIMO
+
+    # Cada valor ocupa seu texto + aspas/escapes e separador
+    maior_linha = max(sum(len(str(v)) + 4 for v in linha) + 4 for linha in amostra)
+    limite = int(get_max_allowed_packet(conexao) * FRACAO_PACOTE)
+    return max(1, min(TAMANHO_LOTE_MAXIMO, limite // (maior_linha * 2)))
 
 
 def handle_insertion_error(err, registro):
@@ -270,32 +533,6 @@ def handle_insertion_error(err, registro):
         print(f"  → Erro DB {err.errno}: {err} em {registro}")
 
 
-def process_record(registro, campos, schema_colunas):
-    """
-    Processa e trunca os valores conforme necessário.
-    """
-    valores = []
-    for campo in campos:
-        valor = registro[campo]
-        if campo in schema_colunas and "varchar" in schema_colunas[campo].lower():
-            valor = truncate_varchar(valor, schema_colunas[campo])
-        valores.append(valor)
-    return valores
-
-
-def truncate_varchar(valor, schema_info):
-    """
-    Trunca strings longas para campos varchar.
-    """
-    max_len_match = re.search(r'varchar\((\d+)\)', schema_info.lower())
-    if max_len_match:
-        max_len = int(max_len_match.group(1))
-        if isinstance(valor, str) and len(valor) > max_len:
-            print(f"  → Truncado valor de {len(valor)} para {max_len} caracteres")
-            return valor[:max_len]
-    return valor
-
-
 def print_tables(conexao, print_flag=True):
     """
     Exibe as tabelas disponíveis no banco de dados conectado.
@@ -304,54 +541,47 @@ def print_tables(conexao, print_flag=True):
     Retorna:
         dict: Um dicionário onde as chaves são os nomes das tabelas em minúsculo e os valores são os nomes reais das tabelas.
     """
-    cursor = conexao.cursor()
-    cursor.execute("SHOW TABLES;")
-    resultado = cursor.fetchall()
+    resultado = list_tables(conexao)
 
     if not resultado:
         print("Nenhuma tabela encontrada.")
         return {}
 
-    tabelas = {t[0].lower(): t[0] for t in resultado}
+    tabelas = {t.lower(): t for t in resultado}
 
     if print_flag:
         for nome_real in tabelas.values():
             print(f"• {nome_real.upper()}")
 
-    cursor.close()
-    
     return tabelas
 
 
-def show_table(conexao, tabela):
+def show_table(conexao, tabela, interativo=False, limite=LIMITE_LINHAS):
     """
     Exibe os valores registrados em uma tabela específica do banco de dados.
+    As linhas são lidas do servidor página a página (cursor sem buffer), até `limite` linhas.
     Parâmetros:
         conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
         tabela (str): Nome da tabela a ser exibida.
+        interativo (bool): Se True, pergunta antes de exibir cada nova página.
+        limite (int): Número máximo de linhas exibidas.
     Retorna:
         int: Número de linhas exibidas na tabela, ou 0 se a tabela estiver vazia.
     """
-    cursor = conexao.cursor()
-    
-    tabelas = print_tables(conexao, False)
-    
-    # Verificação case-insensitive usando o nome em minúsculo
-    if tabela.lower() not in tabelas and tabela not in tabelas.values():
+    # Verificação case-insensitive usando o catálogo
+    nome_real = resolve_table(conexao, tabela)
+    if nome_real is None:
         print(f"Tabela '{tabela.upper()}' não encontrada.")
-        cursor.close()
         return 0
+    tabela = nome_real
 
+    exibidas = 0
+    cursor = conexao.cursor(buffered=False)
     try:
-        cursor.execute(f"SELECT * FROM `{tabela}`")
-        linhas = cursor.fetchall()
-        tabela_formatada = PrettyTable()
-        tabela_formatada.field_names = [col[0] for col in cursor.description]
-        if linhas:
-            for linha in linhas:
-                tabela_formatada.add_row(linha)
-            print(tabela_formatada)
-        else:
+        # LIMIT + 1 faz o próprio servidor parar de enviar linhas além do limite
+        cursor.execute(f"SELECT * FROM `{tabela}` LIMIT %s", (limite + 1,))
+        exibidas, _ = print_paged(cursor, interativo=interativo, limite=limite)
+        if exibidas == 0:
             print(f"A tabela '{tabela.upper()}' está vazia.")
     except mysql.connector.Error as err:
         print(f"Erro ao consultar: {err}")
@@ -359,7 +589,134 @@ def show_table(conexao, tabela):
         cursor.close()
     
     # Retorna o número de linhas exibidas
-    return len(linhas)
+    return exibidas
+
+
+def fetch_keyset_page(conexao, tabela, chave, colunas, filtro=None, depois=None, antes=None,
+                      tamanho_pagina=TAMANHO_PAGINA):
+    """
+    Lê uma página de uma tabela pela chave primária (paginação por chave, sem OFFSET):
+        WHERE chave > última ORDER BY chave LIMIT n    (próxima página)
+        WHERE chave < primeira ORDER BY chave DESC ... (página anterior, reordenada)
+    Cada página é uma leitura de intervalo no índice da chave, com o mesmo custo em qualquer posição.
+    Parâmetros:
+        chave (list): Colunas da chave primária (também presentes em `colunas`).
+        colunas (list): Colunas selecionadas.
+        filtro (str, opcional): Condição WHERE adicional (sem a palavra WHERE).
+        depois (tuple, opcional): Valores da chave da última linha da página atual.
+        antes (tuple, opcional): Valores da chave da primeira linha da página atual.
+    Retorna:
+        list: Tuplas da página, em ordem crescente de chave.
+    """
+    lista_chave = ", ".join(f"`{c}`" for c in chave)
+    tupla_chave = f"({lista_chave})"
+    marcadores = "(" + ", ".join(["%s"] * len(chave)) + ")"
+
+    condicoes, params = [], []
+    if filtro:
+        condicoes.append(f"({filtro})")
+    if depois is not None:
+        condicoes.append(f"{tupla_chave} > {marcadores}")
+        params.extend(depois)
+    elif antes is not None:
+        condicoes.append(f"{tupla_chave} < {marcadores}")
+        params.extend(antes)
+    ordem = ", ".join(f"`{c}` DESC" for c in chave) if antes is not None and depois is None else lista_chave
+
+    query = f"SELECT {', '.join(f'`{c}`' for c in colunas)} FROM `{tabela}`"
+    if condicoes:
+        query += " WHERE " + " AND ".join(condicoes)
+    query += f" ORDER BY {ordem} LIMIT {int(tamanho_pagina)}"
+
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(query, params or None)
+        linhas = cursor.fetchall()
+    finally:
+        cursor.close()
+    return linhas[::-1] if antes is not None and depois is None else linhas
+
+
+def browse_table(conexao, tabela, colunas=None, filtro=None, tamanho_pagina=TAMANHO_PAGINA):
+    """
+    Navega por uma tabela página a página pela chave primária, para frente e para trás.
+    Tabelas sem chave primária são exibidas com show_table.
+    Parâmetros:
+        conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
+        tabela (str): Nome da tabela.
+        colunas (list, opcional): Colunas exibidas (padrão: todas); a chave primária é sempre incluída.
+        filtro (str, opcional): Condição WHERE aplicada a todas as páginas.
+        tamanho_pagina (int): Linhas por página.
+    Retorna:
+        int: Número de páginas exibidas.
+    """
+    nome_real = resolve_table(conexao, tabela)
+    if nome_real is None:
+        print(f"Tabela '{tabela.upper()}' não encontrada.")
+        return 0
+
+    chave = get_primary_key(conexao, nome_real)
+    if not chave:
+        print(f"A tabela '{nome_real.upper()}' não tem chave primária; exibindo sem navegação.")
+        show_table(conexao, nome_real, interativo=True)
+        return 0
+
+    existentes = {col["nome"].lower(): col["nome"] for col in get_columns(conexao, nome_real)}
+    if colunas:
+        desconhecidas = [c for c in colunas if c.lower() not in existentes]
+        if desconhecidas:
+            print(f"Colunas não encontradas: {', '.join(desconhecidas)}")
+            return 0
+        selecionadas = [existentes[c.lower()] for c in colunas]
+        colunas = chave + [c for c in selecionadas if c not in chave]
+    else:
+        colunas = list(existentes.values())
+    posicoes_chave = [colunas.index(c) for c in chave]
+
+    def valores_chave(linha):
+        return tuple(linha[i] for i in posicoes_chave)
+
+    pagina, n_pagina, exibidas = None, 1, 0
+    depois = antes = None
+    while True:
+        try:
+            nova = fetch_keyset_page(conexao, nome_real, chave, colunas, filtro, depois, antes, tamanho_pagina)
+        except mysql.connector.Error as err:
+            print(f"Erro ao consultar: {err}")
+            return exibidas
+
+        if nova:
+            pagina = nova
+        elif pagina is None or (depois is None and antes is None):
+            print(f"A tabela '{nome_real.upper()}' está vazia" + (" para o filtro informado." if filtro else "."))
+            return exibidas
+        else:
+            # Sem linhas além da página atual: permanece nela
+            n_pagina += -1 if depois is not None else 1
+            print("Fim da tabela." if depois is not None else "Início da tabela.")
+
+        tabela_formatada = PrettyTable()
+        tabela_formatada.field_names = colunas
+        tabela_formatada.add_rows(pagina)
+        print(tabela_formatada)
+        exibidas += 1
+
+        resposta = input(f"Página {n_pagina}. [Enter/n] próxima, [p] anterior, [i] início, [q] sair: ").strip().lower()
+        if resposta == 'q':
+            return exibidas
+        if resposta == 'p':
+            if n_pagina == 1:
+                print("Início da tabela.")
+                depois = antes = None
+            else:
+                depois, antes = None, valores_chave(pagina[0])
+                n_pagina -= 1
+        elif resposta == 'i':
+            depois = antes = None
+            n_pagina = 1
+        else:
+            depois, antes = valores_chave(pagina[-1]), None
+            n_pagina += 1
 
 
 def show_tables(conexao):
@@ -385,75 +742,269 @@ def show_tables(conexao):
         return
     
     nome_real = tabelas[entrada]
+    modo = input("\n[ 1 ] Exibir tabela  [ 2 ] Navegar por páginas (chave primária)\nOpção [1]: ").strip()
     print(f"\nTabela: {nome_real.upper()}")
-    show_table(conexao, nome_real)
+    if modo == '2':
+        colunas = input("Colunas (separadas por vírgula, Enter = todas): ").strip()
+        filtro = input("Filtro WHERE opcional (ex: IUCN = 'EN'): ").strip()
+        colunas = [c.strip() for c in colunas.split(",") if c.strip()] or None
+        browse_table(conexao, nome_real, colunas=colunas, filtro=filtro or None)
+    else:
+        show_table(conexao, nome_real, interativo=True)
     
     print("\n" + "="*50)
 
 
-def run_query(conexao, query, params=None):
+def fetch_pages(cursor, tamanho_pagina=TAMANHO_PAGINA, limite=LIMITE_LINHAS):
     """
-    Executa uma consulta SQL no banco de dados e exibe os resultados formatados.
+    Lê o resultado de um cursor sem buffer em páginas (fetchmany), até `limite` linhas.
+    Retorna:
+        generator: Listas de tuplas com no máximo `tamanho_pagina` linhas.
+    """
+    lidas = 0
+    while lidas < limite:
+        pagina = cursor.fetchmany(min(tamanho_pagina, limite - lidas))
+        if not pagina:
+            return
+        lidas += len(pagina)
+        yield pagina
+
+
+def discard_remaining(cursor):
+    """
+    Descarta as linhas ainda não lidas de um cursor sem buffer, sem acumulá-las em memória.
+    Retorna:
+        bool: True se havia linhas restantes.
+    """
+    restantes = False
+    while cursor.fetchmany(TAMANHO_PAGINA * 20):
+        restantes = True
+    return restantes
+
+
+def print_paged(cursor, tamanho_pagina=TAMANHO_PAGINA, limite=LIMITE_LINHAS, interativo=False, guardar=False,
+                colunar=False):
+    """
+    Exibe o resultado de um cursor sem buffer página a página, mantendo em memória uma página por vez.
     Parâmetros:
-        conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
-        query (str): Consulta SQL a ser executada.
-        params (tuple, opcional): Parâmetros para a consulta SQL, se necessário.
+        cursor: Cursor com a consulta já executada.
+        tamanho_pagina (int): Linhas por página.
+        limite (int): Máximo de linhas lidas; o restante é descartado.
+        interativo (bool): Se True, pergunta antes de exibir cada nova página.
+        guardar (bool): Se True, também retorna as linhas lidas (limitadas por `limite`).
+        colunar (bool): Se True, as linhas guardadas são convertidas em colunas a cada página (columnar).
     Retorna:
-        resultados (list): Lista de tuplas contendo os resultados da consulta.
+        tuple: (número de linhas exibidas, linhas guardadas (lista ou ColumnarResult) ou None)
     """
-    cursor = conexao.cursor()
+    colunas = [col[0] for col in cursor.description]
+    guardadas = None
+    if guardar:
+        guardadas = ColumnarBuilder(colunas) if colunar else []
+    exibidas = 0
+    interrompido = False
+
+    for n_pagina, pagina in enumerate(fetch_pages(cursor, tamanho_pagina, limite), 1):
+        tabela_formatada = PrettyTable()
+        tabela_formatada.field_names = colunas
+        tabela_formatada.add_rows(pagina)
+        print(tabela_formatada)
+        exibidas += len(pagina)
+        if guardar:
+            guardadas.extend(pagina)
+
+        if interativo and len(pagina) == tamanho_pagina and exibidas < limite:
+            resposta = input(f"Página {n_pagina} ({exibidas} linhas). [Enter] próxima página, [q] parar: ")
+            if resposta.strip().lower() == 'q':
+                interrompido = True
+                break
+
+    if discard_remaining(cursor) and not interrompido:
+        print(f"Resultado truncado em {limite} linhas.")
+
+    if isinstance(guardadas, ColumnarBuilder):
+        guardadas = guardadas.build()
+    return exibidas, guardadas
+
+
+def open_query(conexao, query, params=None, limite=LIMITE_LINHAS):
+    """
+    Executa uma consulta e retorna um cursor (sem buffer) pronto para leitura.
+    Leituras determinísticas passam pelo cache de resultados (query_cache); as demais vão direto ao servidor.
+    O chamador deve fechar o cursor retornado.
+    """
+    if is_cacheable(query):
+        # limite + 1 linhas bastam para reproduzir o aviso de resultado truncado
+        return open_cached(conexao, query, params, max_linhas=limite + 1)
+
+    cursor = conexao.cursor(buffered=False)
     try:
         if params:
             cursor.execute(query, params)
         else:
             cursor.execute(query)
-            
-        resultados = cursor.fetchall()
-        
-        if resultados:
-            tabela_formatada = PrettyTable()
-            tabela_formatada.field_names = [col[0] for col in cursor.description]
-            for linha in resultados:
-                tabela_formatada.add_row(linha)
+    except BaseException:
+        cursor.close()
+        raise
+    return cursor
+
+
+def run_query(conexao, query, params=None, interativo=False, limite=LIMITE_LINHAS, colunar=False):
+    """
+    Executa uma consulta SQL no banco de dados e exibe os resultados formatados.
+    O resultado é lido página a página de um cursor sem buffer, até `limite` linhas,
+    ou do cache de resultados se a mesma consulta já tiver sido lida.
+    Parâmetros:
+        conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
+        query (str): Consulta SQL a ser executada.
+        params (tuple, opcional): Parâmetros para a consulta SQL, se necessário.
+        interativo (bool): Se True, pergunta antes de exibir cada nova página.
+        limite (int): Número máximo de linhas lidas.
+        colunar (bool): Se True, retorna um columnar.ColumnarResult (um array NumPy por coluna).
+    Retorna:
+        resultados (list ou ColumnarResult): Lista de tuplas (ou colunas) com os resultados da consulta.
+    """
+    resultados = []
+    cursor = None
+    try:
+        cursor = open_query(conexao, query, params, limite)
+
+        if cursor.description:
             print("\nResultados da Consulta:")
-            print(tabela_formatada)
+            _, resultados = print_paged(cursor, limite=limite, interativo=interativo, guardar=True, colunar=colunar)
             
     except mysql.connector.Error as err:
         print(f"Erro ao executar a consulta: {err}")
         
     finally:
-        cursor.close()
-        return resultados
+        if cursor is not None:
+            cursor.close()
+    return resultados
 
 
 def plot_results(resultados):
     """
     Plota os resultados de uma consulta SQL usando matplotlib.
+    A segunda coluna é usada como categoria e a terceira como quantidade.
     Parâmetros:
-        resultados (list): Lista de tuplas contendo os resultados da consulta.
+        resultados (ColumnarResult ou list): Resultado em colunas (ver run_query) ou lista de tuplas.
     Retorna:
         None
     """
     try:
-        categorias, qntdes = zip(*[(col[1], col[2]) for col in resultados])
-    except ValueError:
+        if isinstance(resultados, ColumnarResult):
+            categorias, qntdes = resultados[1], resultados[2]
+        else:
+            categorias, qntdes = zip(*[(col[1], col[2]) for col in resultados])
+        categorias = np.asarray(categorias, dtype=str)
+        qntdes = np.asarray(qntdes, dtype=np.float64)
+    except (ValueError, TypeError, IndexError):
         print("Resultados inválidos para plotagem.")
         return
 
-    qntdes = [float(q) for q in qntdes]
-
-    plt.barh(categorias, qntdes, color='skyblue')
+    barras = plt.barh(categorias, qntdes, color='skyblue')
     plt.ylabel('Categorias')
     plt.xlabel('Quantidade')
     plt.grid(axis='y', linestyle='--', alpha=0.7)
-
-    for i, (cat, count) in enumerate(zip(categorias, qntdes)):
-        plt.text(count - 0.5, i, str(count), va='center', ha='right', fontsize=10)
+    plt.bar_label(barras, labels=qntdes.astype(str), label_type='edge', padding=-4, fontsize=10, ha='right')
 
     plt.tight_layout()
     plt.show()
 
 
+# Relatórios disponíveis em query_by_user (também usados pelo benchmark e pelo index_advisor).
+# Cada entrada: título exibido no menu, consulta SQL sobre as tabelas base, consulta equivalente
+# sobre as tabelas de resumo (report_summaries) e se a consulta recebe um intervalo de datas.
+CONSULTAS_RELATORIOS = {
+    "1": {
+        "titulo": "Quantidade de Funcionários com Contratos Ativos (por Projeto)",
+        "periodo": False,
+        "sql": """
+        SELECT  p.ID_Proj, p.Nome, COUNT(*) AS Quantidade
+        FROM    Projeto AS p, Proj_Func AS pf, Funcionario AS f, Contrato AS c
+        WHERE   p.ID_Proj = pf.ID_Proj AND pf.ID_Func = f.ID_Func AND
+                f.ID_Func = c.ID_Func AND c.Status = 'Ativo'
+        GROUP BY 1,2
+        ORDER BY 1;
+        """,
+        "sql_resumo": """
+        SELECT  p.ID_Proj, p.Nome, r.Quantidade
+        FROM    nb_resumo_contratos_projeto AS r, Projeto AS p
+        WHERE   r.ID_Proj = p.ID_Proj AND r.Quantidade > 0
+        ORDER BY 1;
+        """
+    },
+    "2": {
+        "titulo": "Quantidade de Usos de Equipamentos (por Laboratório)",
+        "periodo": True,
+        "sql": """
+        SELECT  l.ID_Lab, l.Nome, COUNT(*) AS Quantidade
+        FROM    Laboratorio AS l, Equipamento AS e, Registro_de_Uso AS r
+        WHERE   l.ID_Lab = e.ID_Lab AND e.ID_Equip = r.ID_Equip AND
+                r.Dt_Reg >= %s AND r.Dt_Reg < DATE_ADD(%s, INTERVAL 1 DAY)
+        GROUP BY 1,2
+        ORDER BY 1;
+        """,
+        "sql_resumo": """
+        SELECT  l.ID_Lab, l.Nome, SUM(r.Quantidade) AS Quantidade
+        FROM    nb_resumo_uso_lab AS r, Laboratorio AS l
+        WHERE   r.ID_Lab = l.ID_Lab AND r.Dt_Reg BETWEEN %s AND %s
+        GROUP BY 1,2
+        ORDER BY 1;
+        """
+    },
+    "3": {
+        "titulo": "Valor Médio de Financiamento (por Projeto)",
+        "periodo": True,
+        "sql": """
+        SELECT  p.ID_Proj, p.Nome, ROUND(AVG(f.Valor), 2) AS Media
+        FROM    Financiamento AS f, Projeto AS p, Artigo AS a
+        WHERE   f.ID_Proj = p.ID_Proj AND p.ID_Proj = a.ID_Proj AND
+                a.Dt_Pub BETWEEN %s AND %s
+        GROUP BY 1,2
+        ORDER BY 1;
+        """,
+        # Cada financiamento aparece uma vez por artigo do projeto no período; como esse fator
+        # é o mesmo para todos os financiamentos do projeto, a média é SOMA/QUANTIDADE
+        # dos projetos com ao menos um artigo no período.
+        "sql_resumo": """
+        SELECT  p.ID_Proj, p.Nome, ROUND(r.Soma / r.Quantidade, 2) AS Media
+        FROM    nb_resumo_financiamento_projeto AS r, Projeto AS p
+        WHERE   r.ID_Proj = p.ID_Proj AND r.Quantidade > 0 AND
+                EXISTS (SELECT 1 FROM Artigo AS a
+                        WHERE a.ID_Proj = r.ID_Proj AND a.Dt_Pub BETWEEN %s AND %s)
+        ORDER BY 1;
+        """
+    },
+}
+
+
+def valid_date_range(data_ini, data_fim):
+    """
+    Verifica se as datas inicial e final estão no formato YYYY-MM-DD.
+    """
+    return bool(re.fullmatch(r"\d{4}-\d{2}-\d{2}", data_ini) and re.fullmatch(r"\d{4}-\d{2}-\d{2}", data_fim))
+
+
+def run_report(conexao, opcao, data_ini=None, data_fim=None, interativo=False, limite=LIMITE_LINHAS, colunar=False):
+    """
+    Executa um dos relatórios de CONSULTAS_RELATORIOS.
+    Usa as tabelas de resumo quando existirem; caso contrário, consulta as tabelas base.
+    Parâmetros:
+        conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
+        opcao (str): Chave do relatório em CONSULTAS_RELATORIOS.
+        data_ini (str), data_fim (str): Intervalo de datas (YYYY-MM-DD), para relatórios com período.
+        interativo (bool): Se True, pergunta antes de exibir cada nova página.
+        limite (int): Número máximo de linhas lidas.
+        colunar (bool): Se True, retorna o resultado em colunas (ver run_query).
+    Retorna:
+        list ou ColumnarResult: Resultados da consulta.
+    """
+    relatorio = CONSULTAS_RELATORIOS[opcao]
+    params = (data_ini, data_fim) if relatorio["periodo"] else None
+    sql = relatorio["sql_resumo"] if summaries_available(conexao) else relatorio["sql"]
+    return run_query(conexao, sql, params, interativo=interativo, limite=limite, colunar=colunar)
+
+
 def query_by_user(conexao):
     """
     Permite ao usuário executar uma das consultas SQL disponíveis.
@@ -463,65 +1014,57 @@ def query_by_user(conexao):
         None
     """
     print("\n" + "="*50)
-    
-    opcao = input("""\nConsultas disponíveis:
 
-[ 1 ] > Quantidade de Funcionários com Contratos Ativos (por Projeto)
-[ 2 ] > Quantidade de Usos de Equipamentos (por Laboratório)
-[ 3 ] > Valor Médio de Financiamento (por Projeto)
+    menu = "\n".join(f"[ {chave} ] > {relatorio['titulo']}" for chave, relatorio in CONSULTAS_RELATORIOS.items())
+    opcao = input(f"""\nConsultas disponíveis:
+
+{menu}
+[ 7 ] > Quantidade de Espécies (por Táxon)
+[ 8 ] > Estatísticas do Cache de Consultas
+[ 9 ] > Verificar/Reconstruir Tabelas de Resumo
 [ 0 ] > Voltar ao Menu Principal
 
 Opção: """).strip()
 
-    if opcao == '1':
-        data_ini = None
-        data_fim = None
-        query = """
-        SELECT  p.ID_Proj, p.Nome, COUNT(*) AS Quantidade
-        FROM    Projeto AS p, Proj_Func AS pf, Funcionario AS f, Contrato AS c
-        WHERE   p.ID_Proj = pf.ID_Proj AND pf.ID_Func = f.ID_Func AND
-                f.ID_Func = c.ID_Func AND c.Status = 'Ativo'
-        GROUP BY 1,2
-        ORDER BY 1;
-            """   
-    elif opcao == '2' or opcao == '3': 
+    if opcao == '0':
+        return
+    if opcao == '7':
+        tipo = input("\nTipo de táxon (Dominio, Reino, Filo, Classe, Ordem, Familia, Genero) [Reino]: ").strip().capitalize() or "Reino"
         try:
-            data_ini = input("\nDigite a data inicial (YYYY-MM-DD) da consulta: ").strip()
-            data_fim = input("Digite a data final (YYYY-MM-DD) da consulta: ").strip()
-        except ValueError:
-            print("Data inválida. Por favor, digite no formato YYYY-MM-DD.")
+            resultados = [linha[:3] for linha in print_rollup(conexao, tipo) if linha[2]]
+        except mysql.connector.Error as err:
+            print(f"Erro ao carregar a árvore taxonômica: {err}")
             return
-        if opcao == 2:
-            query = """
-            SELECT  l.ID_Lab, l.Nome, COUNT(*) AS Quantidade
-            FROM    Laboratorio AS l, Equipamento AS e, Registro_de_Uso AS r
-            WHERE   l.ID_Lab = e.ID_Lab AND e.ID_Equip = r.ID_Equip AND
-                    r.Dt_Reg BETWEEN %s AND %s
-            GROUP BY 1,2
-            ORDER BY 1;
-            """
-        else:  # opcao == 3
-            query = """
-            SELECT  p.ID_Proj, p.Nome, ROUND(AVG(f.Valor), 2) AS Media
-            FROM    Financiamento AS f, Projeto AS p, Artigo AS a
-            WHERE   f.ID_Proj = p.ID_Proj AND p.ID_Proj = a.ID_Proj AND
-                    a.Dt_Pub BETWEEN %s AND %s
-            GROUP BY 1,2
-            ORDER BY 1;
-            """    
-    elif opcao == 0:
+        if resultados:
+            print("\nGráfico gerado na nova janela.")
+            plot_results(resultados)
+        else:
+            print(f"Nenhuma espécie encontrada para o tipo '{tipo}'.")
         return
-    else:
+    if opcao == '8':
+        print_cache_stats()
+        return
+    if opcao == '9':
+        try:
+            check_summaries(conexao)
+        except mysql.connector.Error as err:
+            print(f"Erro ao verificar os resumos: {err}")
+        return
+    if opcao not in CONSULTAS_RELATORIOS:
         print("Opção inválida. Por favor, escolha uma opção válida.")
         return
-    
+
+    data_ini = data_fim = None
+    if CONSULTAS_RELATORIOS[opcao]["periodo"]:
+        data_ini = input("\nDigite a data inicial (YYYY-MM-DD) da consulta: ").strip()
+        data_fim = input("Digite a data final (YYYY-MM-DD) da consulta: ").strip()
+        if not valid_date_range(data_ini, data_fim):
+            print("Data inválida. Por favor, digite no formato YYYY-MM-DD.")
+            return
+
     try:
-        if data_ini and data_fim:
-            params = (data_ini, data_fim)
-            resultados = run_query(conexao, query, params)
-        else:
-            resultados = run_query(conexao, query)
-        if resultados:
+        resultados = run_report(conexao, opcao, data_ini, data_fim, colunar=True)
+        if len(resultados):
             print("\nGráfico gerado na nova janela.")
             plot_results(resultados)
             return
@@ -536,46 +1079,45 @@ def get_schema_info(conexao):
         conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados.
     Retorna:
         dict: Um dicionário onde as chaves são os nomes das tabelas e os valores são listas de dicionários
-              contendo o nome e o tipo de cada coluna da tabela.
+              contendo o nome, o tipo, a nulidade, a chave e o default de cada coluna da tabela.
     """
     
-    # Obtém o schema de todas as tabelas no banco de dados
+    # Obtém o schema de todas as tabelas a partir do catálogo em cache
     schema = {}
-    cursor = conexao.cursor()
-    cursor.execute("SHOW TABLES")
-    tabelas = [linha[0] for linha in cursor.fetchall()]
+    catalogo = get_catalog(conexao)
 
-    # Para cada tabela, obtém as colunas e seus tipos
-    for tabela_nome in tabelas:
-        cursor.execute(f"DESCRIBE `{tabela_nome}`")
-        colunas = cursor.fetchall()
-        schema[tabela_nome] = [{"nome": col[0], "tipo": col[1]} for col in colunas]
+    # Para cada tabela, obtém as colunas, tipos, nulidade, chave e default
+    for tabela_nome in list_tables(conexao):
+        schema[tabela_nome] = [
+            {"nome": col["nome"], "tipo": col["tipo"], "nulo": col["nulo"],
+             "chave": col["chave"], "default": col["default"]}
+            for col in catalogo[tabela_nome]["colunas"]
+        ]
 
-    cursor.close()
     return schema
 
 
-def make_query(conexao, sql_query):
-    """Executa consulta SQL e exibe resultados formatados com melhor tratamento de erros."""
-    cursor = conexao.cursor()
+def make_query(conexao, sql_query, interativo=True, limite=LIMITE_LINHAS, colunar=False):
+    """
+    Executa consulta SQL e exibe resultados formatados com melhor tratamento de erros.
+    Resultados são lidos e exibidos página a página (cursor sem buffer), até `limite` linhas;
+    leituras repetidas são servidas pelo cache de resultados.
+    Se `colunar` for True, também retorna as linhas lidas como columnar.ColumnarResult
+    (ex.: para estatísticas com describe() ou exportação com to_parquet()).
+    """
+    cursor = None
+    resultado = None
     
     try:
         print(f"\nExecutando consulta: {sql_query}")
-        cursor.execute(sql_query)
-        resultados = cursor.fetchall()
+        cursor = open_query(conexao, sql_query, limite=limite)
         
         if cursor.description:  # Para queries que retornam dados
-            colunas = [desc[0] for desc in cursor.description]
+            exibidos, resultado = print_paged(cursor, limite=limite, interativo=interativo,
+                                              guardar=colunar, colunar=colunar)
             
-            if resultados:
-                print(f"\nResultados encontrados: {len(resultados)} registro(s)")
-                tabela_formatada = PrettyTable()
-                tabela_formatada.field_names = colunas
-                
-                # Exibe dados (limita a 20 registros para não sobrecarregar)
-                for i, linha in enumerate(resultados[:20], 1):
-                    tabela_formatada.add_row(linha)
-                print(tabela_formatada)
+            if exibidos:
+                print(f"\nResultados exibidos: {exibidos} registro(s)")
                 print("\n" + "="*50)
             else:
                 print("Nenhum resultado encontrado para a consulta.")
@@ -585,6 +1127,11 @@ def make_query(conexao, sql_query):
                 print("   - Verifique a ortografia dos nomes")
         else:
             # Para queries que não retornam dados (INSERT, UPDATE, DELETE)
+            if is_ddl(sql_query):
+                invalidate_catalog()
+            # As tabelas alteradas não são conhecidas: dados derivados são recalculados
+            notify_write(conexao, None)
+            conexao.commit()
             print("Consulta executada com sucesso.")
             
     except mysql.connector.Error as err:
@@ -612,12 +1159,22 @@ def make_query(conexao, sql_query):
     except Exception as e:
         print(f"❌ Erro inesperado: {e}")
     finally:
-        cursor.close()
+        if cursor is not None:
+            cursor.close()
+    return resultado
+
+
+def is_ddl(sql_query):
+    """
+    Verifica se um comando SQL é DDL (altera a estrutura do banco).
+    """
+    primeira = sql_query.lstrip().split(None, 1)
+    return bool(primeira) and primeira[0].upper() in ("CREATE", "ALTER", "DROP", "RENAME", "TRUNCATE")
 
 
 def exit_db(conexao):
     """
-    Encerra a conexão com o banco de dados.
+    Encerra a conexão com o banco de dados e, se ela vier de um pool, fecha o pool inteiro.
     Parâmetros:
         conexao (mysql.connector.connection.MySQLConnection): Objeto de conexão com o banco de dados.
     Exceções:
@@ -625,10 +1182,13 @@ def exit_db(conexao):
     """
     
     try:
+        pool = getattr(conexao, "pool", None)
         if conexao.is_connected():
             conexao.close()
             print("Conexão com o banco de dados foi encerrada!")
         else:
             print("A conexão já estava encerrada.")
+        if pool is not None:
+            pool.close()
     except mysql.connector.Error as err:
         print(f"Erro ao encerrar a conexão: {err}")
\ No newline at end of file
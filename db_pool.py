@@ -0,0 +1,230 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+import mysql.connector
+
+from write_events import notify_commit, notify_rollback
+
+
+TAMANHO_POOL_PADRAO = 5     # Conexões simultâneas por padrão
+TENTATIVAS_RECONEXAO = 3    # Tentativas de reconexão ao emprestar/usar uma conexão
+ESPERA_RECONEXAO = 1        # Segundos entre tentativas
+
+
+class PoolError(Exception):
+    """Erro ao obter uma conexão do pool (pool fechado ou esgotado)."""
+
+
+class PooledConnection:
+    """
+    Conexão emprestada de um ConnectionPool.
+    Repassa todos os atributos à conexão MySQL real, reconecta de forma transparente
+    quando a conexão cai e, ao ser fechada, é devolvida ao pool em vez de encerrada.
+    """
+
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    @property
+    def pool(self):
+        return self._pool
+
+    def __getattr__(self, nome):
+        cnx = self.__dict__.get("_cnx")
+        if cnx is None:
+            raise mysql.connector.errors.OperationalError("Conexão já devolvida ao pool.")
+        return getattr(cnx, nome)
+
+    def cursor(self, *args, **kwargs):
+        """Abre um cursor, reconectando uma vez caso a conexão tenha caído."""
+        if self._cnx is None:
+            raise mysql.connector.errors.OperationalError("Conexão já devolvida ao pool.")
+        try:
+            return self._cnx.cursor(*args, **kwargs)
+        except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError):
+            print("Conexão perdida. Reconectando...")
+            self._pool.reconnect(self)
+            return self._cnx.cursor(*args, **kwargs)
+
+    def commit(self):
+        """Confirma a transação e avisa os ouvintes de commit (write_events)."""
+        if self._cnx is None:
+            raise mysql.connector.errors.OperationalError("Conexão já devolvida ao pool.")
+        self._cnx.commit()
+        notify_commit(self)
+
+    def rollback(self):
+        """Desfaz a transação e descarta as escritas pendentes (write_events)."""
+        if self._cnx is None:
+            raise mysql.connector.errors.OperationalError("Conexão já devolvida ao pool.")
+        try:
+            self._cnx.rollback()
+        finally:
+            notify_rollback(self)
+
+    def is_connected(self):
+        return self._cnx is not None and self._cnx.is_connected()
+
+    def close(self):
+        """Devolve a conexão ao pool."""
+        if self._cnx is not None:
+            self._pool.checkin(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool de conexões MySQL com tamanho configurável.
+    Conexões são criadas sob demanda até o limite, verificadas (ping) a cada empréstimo
+    e recriadas automaticamente se estiverem inválidas.
+    """
+
+    def __init__(self, tamanho=TAMANHO_POOL_PADRAO, **config):
+        if tamanho < 1:
+            raise ValueError("O tamanho do pool deve ser pelo menos 1")
+        self.tamanho = tamanho
+        self.config = config
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._trava = threading.Lock()
+        self._fechado = False
+
+    def _nova_conexao(self):
+        return mysql.connector.connect(**self.config)
+
+    def _health_check(self, cnx):
+        """Verifica a conexão com ping, reconectando ou recriando-a se necessário."""
+        try:
+            cnx.ping(reconnect=True, attempts=TENTATIVAS_RECONEXAO, delay=ESPERA_RECONEXAO)
+            return cnx
+        except mysql.connector.Error:
+            try:
+                cnx.close()
+            except mysql.connector.Error:
+                pass
+            return self._nova_conexao()
+
+    def checkout(self, timeout=None):
+        """
+        Empresta uma conexão do pool.
+        Parâmetros:
+            timeout (float, opcional): Segundos para aguardar uma conexão livre (None = aguarda indefinidamente).
+        Retorna:
+            PooledConnection: Conexão pronta para uso.
+        """
+        if self._fechado:
+            raise PoolError("Pool de conexões fechado.")
+
+        try:
+            cnx = self._livres.get_nowait()
+        except queue.Empty:
+            with self._trava:
+                criar = self._criadas < self.tamanho
+                if criar:
+                    self._criadas += 1
+            if criar:
+                try:
+                    return PooledConnection(self, self._nova_conexao())
+                except mysql.connector.Error:
+                    with self._trava:
+                        self._criadas -= 1
+                    raise
+            try:
+                cnx = self._livres.get(timeout=timeout)
+            except queue.Empty:
+                raise PoolError(f"Nenhuma conexão livre após {timeout}s (pool de {self.tamanho}).")
+
+        try:
+            return PooledConnection(self, self._health_check(cnx))
+        except mysql.connector.Error:
+            with self._trava:
+                self._criadas -= 1
+            raise
+
+    def open_dedicated(self, **config):
+        """
+        Abre uma conexão avulsa com a mesma configuração do pool, fora do limite de conexões
+        (ex.: para um KILL QUERY enquanto todas as conexões do pool estão ocupadas).
+        O chamador deve fechá-la.
+        Parâmetros:
+            **config: Opções que substituem as do pool só nesta conexão (ex.: allow_local_infile_in_path).
+        """
+        if self._fechado:
+            raise PoolError("Pool de conexões fechado.")
+        return mysql.connector.connect(**dict(self.config, **config))
+
+    def checkin(self, conexao):
+        """
+        Devolve uma conexão ao pool, descartando transações pendentes.
+        """
+        cnx, conexao._cnx = conexao._cnx, None
+        if cnx is None:
+            return
+        notify_rollback(conexao)
+
+        if not self._fechado:
+            try:
+                if cnx.unread_result:
+                    cnx.consume_results()
+                cnx.rollback()
+                self._livres.put(cnx)
+                return
+            except mysql.connector.Error:
+                pass
+
+        # Pool fechado ou conexão inutilizável
+        with self._trava:
+            self._criadas -= 1
+        try:
+            cnx.close()
+        except mysql.connector.Error:
+            pass
+
+    def reconnect(self, conexao):
+        """Reconecta a conexão real de uma PooledConnection."""
+        conexao._cnx = self._health_check(conexao._cnx)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Empresta uma conexão durante um bloco `with`, devolvendo-a ao final."""
+        conexao = self.checkout(timeout)
+        try:
+            yield conexao
+        finally:
+            conexao.close()
+
+    def close(self):
+        """Fecha todas as conexões livres; as emprestadas são fechadas ao serem devolvidas."""
+        self._fechado = True
+        while True:
+            try:
+                cnx = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            with self._trava:
+                self._criadas -= 1
+            try:
+                cnx.close()
+            except mysql.connector.Error:
+                pass
+
+
+@contextmanager
+def borrow_connection(conexao):
+    """
+    Empresta uma conexão adicional do mesmo pool de `conexao`.
+    Se `conexao` não vier de um pool, usa a própria conexão (execução serial).
+    """
+    pool = getattr(conexao, "pool", None)
+    if pool is None:
+        yield conexao
+        return
+    with pool.connection() as outra:
+        yield outra
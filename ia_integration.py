@@ -8,10 +8,174 @@ import re
 import random
 import time
 import io
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from PIL import Image, ImageDraw, ImageFont
 from duckduckgo_search import DDGS
 
-from db_operations import insert_data_from_json, get_schema_info
+from db_operations import insert_data_from_json, insert_record_batches, get_schema_info
+from schema_catalog import list_tables, get_columns, get_primary_key, get_indexes, dependency_levels, table_dependencies
+from write_events import notify_write, add_write_listener, remove_write_listener
+from taxonomy import TABELA_FECHAMENTO, get_tree
+from prepared_statements import execute_prepared, insert_prepared, max_rows, print_statement_stats
+from llm_cache import cache_llm, print_llm_cache_stats
+from seed_loader import RecordStreamParser
+
+
+# Colunas dos INSERTs preparados das cargas especiais (mesmo formato reutiliza o mesmo comando)
+CAMPOS_TAXON = ("ID_Tax", "Tipo", "Nome")
+CAMPOS_HIERARQUIA = ("ID_Tax", "ID_TaxTopo")
+CAMPOS_MIDIA = ("ID_Especime", "Tipo", "Dado")
+
+ORDEM_HIERARQUICA = ('Dominio', 'Reino', 'Filo', 'Classe', 'Ordem', 'Familia', 'Genero')
+
+# Geração concorrente em populate_all_tables
+MAX_GERACOES_SIMULTANEAS = 4       # Chamadas à API em andamento ao mesmo tempo
+LIMITE_REQUISICOES_MINUTO = 500    # Requisições por minuto permitidas pela conta da API
+LIMITE_TOKENS_MINUTO = 200000      # Tokens (prompt + resposta) por minuto permitidos pela conta
+MAX_TOKENS_RESPOSTA = 4000         # Limite de tokens de cada resposta
+MAX_TOKENS_SQL = 2500              # Limite de tokens da resposta de generate_sql_query
+TAMANHO_BLOCO_GERACAO = 25         # Registros pedidos por chamada (respostas maiores são truncadas)
+MAX_VALORES_EVITAR = 30            # Valores únicos já usados listados no prompt de cada bloco
+TAMANHO_LOTE_STREAM = 10           # Registros por INSERT no modo streaming (lotes menores saem assim que prontos)
+
+
+def estimate_tokens(texto: str) -> int:
+    """Estimativa simples do número de tokens de um texto (~4 caracteres por token)."""
+    return len(texto) // 4 + 1
+
+
+class RateLimiter:
+    """
+    Limitador de requisições e tokens por minuto (janela deslizante de 60s), seguro entre threads.
+    acquire() bloqueia até que a nova requisição caiba nos dois limites.
+    """
+    
+    def __init__(self, requisicoes_minuto: int = LIMITE_REQUISICOES_MINUTO,
+                 tokens_minuto: int = LIMITE_TOKENS_MINUTO, janela: float = 60.0):
+        self.requisicoes_minuto = requisicoes_minuto
+        self.tokens_minuto = tokens_minuto
+        self.janela = janela
+        self._registros = deque()   # (instante, tokens)
+        self._tokens = 0
+        self._trava = threading.Lock()
+        self.espera_total = 0.0
+    
+    def acquire(self, tokens: int) -> float:
+        """
+        Reserva uma requisição de `tokens` tokens, aguardando se necessário.
+        Retorna:
+            float: Segundos aguardados.
+        """
+        tokens = min(tokens, self.tokens_minuto)
+        inicio = time.monotonic()
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                while self._registros and agora - self._registros[0][0] >= self.janela:
+                    self._tokens -= self._registros.popleft()[1]
+                
+                if len(self._registros) < self.requisicoes_minuto and self._tokens + tokens <= self.tokens_minuto:
+                    self._registros.append((agora, tokens))
+                    self._tokens += tokens
+                    esperado = agora - inicio
+                    self.espera_total += esperado
+                    return esperado
+                
+                # Espera até a requisição mais antiga sair da janela
+                espera = self.janela - (agora - self._registros[0][0])
+            time.sleep(max(espera, 0.01))
+
+
+class ChunkPlan:
+    """
+    Divisão da geração de uma tabela em blocos de até TAMANHO_BLOCO_GERACAO registros, pedidos em paralelo.
+    Cada bloco recebe uma faixa própria de IDs (chave primária inteira) e os valores únicos já usados;
+    merge() junta os blocos descartando repetições nas chaves únicas (ex.: Funcionario.CPF, Taxon (Tipo, Nome)).
+    """
+    
+    def __init__(self, tabela_nome: str, prompts: List[str], chave_id: Optional[str] = None, inicio_id: int = 1,
+                 chaves_unicas: Optional[List[tuple]] = None, existentes: Optional[Dict[tuple, set]] = None):
+        """
+        Parâmetros:
+            prompts (list): Prompt de cada bloco.
+            chave_id (str, opcional): Chave primária inteira cujas faixas foram distribuídas entre os blocos.
+            inicio_id (int): Primeiro ID livre da tabela.
+            chaves_unicas (list): Tuplas de colunas de cada índice único.
+            existentes (dict): Chave única -> valores já gravados no banco (tuplas de texto).
+        """
+        self.tabela_nome = tabela_nome
+        self.prompts = prompts
+        self.chave_id = chave_id
+        self.inicio_id = inicio_id
+        self.chaves_unicas = chaves_unicas or []
+        self.existentes = existentes or {}
+    
+    def __len__(self):
+        return len(self.prompts)
+    
+    def start(self):
+        """Reinicia a combinação: os valores únicos já vistos passam a ser apenas os do banco."""
+        self._vistos = {chave: set(valores) for chave, valores in self.existentes.items()}
+        self._ids_usados = self._vistos.pop((self.chave_id,), set()) if self.chave_id else set()
+        self._proximo_id = self.inicio_id
+        self.repetidos, self.reatribuidos = 0, 0
+    
+    def accept(self, registro: Dict) -> bool:
+        """
+        Registra um registro na combinação (ver start).
+        Um ID ausente, repetido ou já usado é substituído pelo próximo livre.
+        Retorna:
+            bool: False se o registro repete outra chave única e deve ser descartado.
+        """
+        valores = {}
+        for chave in self.chaves_unicas:
+            if chave == (self.chave_id,):
+                continue
+            valor = tuple(_unique_text(registro.get(coluna)) for coluna in chave)
+            if None not in valor:
+                valores[chave] = valor
+        if any(valor in self._vistos.setdefault(chave, set()) for chave, valor in valores.items()):
+            self.repetidos += 1
+            return False
+        for chave, valor in valores.items():
+            self._vistos[chave].add(valor)
+        
+        if self.chave_id:
+            id_atual = _unique_text(registro.get(self.chave_id))
+            if id_atual is None or not id_atual.isdigit() or (id_atual,) in self._ids_usados:
+                while (str(self._proximo_id),) in self._ids_usados:
+                    self._proximo_id += 1
+                registro[self.chave_id] = self._proximo_id
+                id_atual = str(self._proximo_id)
+                self.reatribuidos += 1
+            self._ids_usados.add((id_atual,))
+        return True
+    
+    def merge(self, blocos: List[Optional[Dict]]) -> Optional[Dict]:
+        """
+        Junta os registros dos blocos (None para blocos que falharam), na ordem dos blocos (ver accept).
+        Retorna:
+            dict ou None: {"registros": [...]} ou None se nenhum registro restou.
+        """
+        self.start()
+        registros = [
+            registro for bloco in blocos for registro in (bloco or {}).get("registros", [])
+            if self.accept(registro)
+        ]
+        print(f"🔗 {self.tabela_nome.upper()}: {len(registros)} registros de {len(blocos)} bloco(s) "
+              f"({self.repetidos} repetidos descartados, {self.reatribuidos} IDs reatribuídos)")
+        return {"registros": registros} if registros else None
+
+
+def _unique_text(valor):
+    """Forma normalizada de um valor de chave única (texto sem espaços nas bordas), ou None."""
+    if valor is None:
+        return None
+    texto = str(valor).strip()
+    return texto or None
 
 
 class DatabaseContextManager:
@@ -23,6 +187,23 @@ class DatabaseContextManager:
         self.contexto_global = {}
         self.relacionamentos = self._build_relationship_map()
         self.constraints = self._define_constraints()
+        self._contagens = None   # tabela (minúsculas) -> número de registros
+        add_write_listener(self._on_write)
+    
+    def close(self):
+        """Deixa de acompanhar as escritas (ver _on_write)."""
+        remove_write_listener(self._on_write)
+    
+    def _on_write(self, conexao, tabela, linhas_antes, linhas_depois):
+        """Mantém as contagens em cache atualizadas a cada escrita feita pela aplicação."""
+        if self._contagens is None:
+            return
+        if tabela is None:
+            self._contagens = None
+        elif linhas_antes is None or linhas_depois is None or tabela.lower() not in self._contagens:
+            self._contagens.pop(tabela.lower(), None)   # Recontada na próxima consulta
+        else:
+            self._contagens[tabela.lower()] += len(linhas_depois) - len(linhas_antes)
         
     def _build_relationship_map(self) -> Dict[str, Dict[str, str]]:
         """Constrói mapa completo de relacionamentos FK -> PK."""
@@ -52,16 +233,8 @@ class DatabaseContextManager:
         }
     
     def get_available_tables(self) -> List[str]:
-        """Retorna lista de tabelas existentes no banco."""
-        cursor = self.conexao.cursor()
-        try:
-            cursor.execute("SHOW TABLES")
-            return [row[0] for row in cursor.fetchall()]
-        except mysql.connector.Error as e:
-            print(f"Erro ao obter tabelas: {e}")
-            return []
-        finally:
-            cursor.close()
+        """Retorna lista de tabelas existentes no banco (via catálogo em cache)."""
+        return list_tables(self.conexao)
     
     def get_table_context(self, tabela_nome: str, limite: int = 10) -> List[Dict]:
         """Obtém contexto de dados de uma tabela específica."""
@@ -76,8 +249,7 @@ class DatabaseContextManager:
             if not registros:
                 return []
             
-            cursor.execute(f"DESCRIBE `{tabela_nome}`")
-            colunas = [col[0] for col in cursor.fetchall()]
+            colunas = [col["nome"] for col in get_columns(self.conexao, tabela_nome)]
             
             registros_dict = []
             for registro in registros:
@@ -164,46 +336,260 @@ class DatabaseContextManager:
         
         return "\n".join(context_parts)
     
+    def table_counts(self) -> Dict[str, int]:
+        """
+        Número de registros de todas as tabelas, obtido em uma única consulta (COUNT(*) exatos
+        unidos por UNION ALL; as estimativas do information_schema podem indicar 0 em tabelas
+        com dados) e mantido em cache, atualizado pelas escritas da aplicação.
+        Retorna:
+            dict: Tabela (minúsculas) -> número de registros.
+        """
+        if self._contagens is not None:
+            return self._contagens
+        
+        tabelas = self.get_available_tables()
+        if not tabelas:
+            return {}
+        consulta = " UNION ALL ".join(
+            f"SELECT '{tabela}', COUNT(*) FROM `{tabela}`" for tabela in tabelas
+        )
+        cursor = self.conexao.cursor()
+        try:
+            cursor.execute(consulta)
+            self._contagens = {tabela.lower(): total for tabela, total in cursor.fetchall()}
+        except mysql.connector.Error as e:
+            print(f"Erro ao contar registros das tabelas: {e}")
+            return {}
+        finally:
+            cursor.close()
+        return self._contagens
+    
     def _get_table_count(self, tabela_nome: str) -> int:
-        """Obtém número de registros de uma tabela."""
+        """Obtém número de registros de uma tabela (das contagens em cache)."""
+        contagens = self.table_counts()
+        if tabela_nome.lower() in contagens:
+            return contagens[tabela_nome.lower()]
+        
         cursor = self.conexao.cursor()
         try:
             cursor.execute(f"SELECT COUNT(*) FROM `{tabela_nome}`")
-            return cursor.fetchone()[0]
+            total = cursor.fetchone()[0]
         except mysql.connector.Error:
             return 0
         finally:
             cursor.close()
+        if self._contagens is not None:
+            self._contagens[tabela_nome.lower()] = total
+        return total
 
 
 class AIDataGenerator:
     """Classe responsável pela geração inteligente de dados usando IA."""
     
-    def __init__(self, api_key: str, context_manager: DatabaseContextManager):
+    def __init__(self, api_key: str, context_manager: DatabaseContextManager,
+                 limitador: Optional[RateLimiter] = None, completion=None, usar_cache: Optional[bool] = None):
+        """
+        Parâmetros:
+            limitador (RateLimiter, opcional): Limita requisições/tokens por minuto (compartilhado entre threads).
+            completion (callable, opcional): Substitui a chamada à API (ex.: um servidor local de testes);
+                recebe (modelo, mensagens, temperatura, max_tokens) e retorna o texto da resposta.
+            usar_cache (bool, opcional): Usa o cache persistente de respostas (llm_cache).
+                Padrão: apenas para a API OpenAI, para que respostas de testes não sejam reaproveitadas.
+        """
         self.api_key = api_key
         self.context_manager = context_manager
+        self.limitador = limitador
+        self._chat_completion = completion or self._openai_completion
+        self.usar_cache = completion is None if usar_cache is None else usar_cache
         openai.api_key = api_key
+    
+    @staticmethod
+    def _openai_completion(modelo, mensagens, temperatura, max_tokens):
+        response = openai.chat.completions.create(
+            model=modelo,
+            messages=mensagens,
+            temperature=temperatura,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+    
+    @staticmethod
+    def _openai_stream(modelo, mensagens, temperatura, max_tokens):
+        response = openai.chat.completions.create(
+            model=modelo,
+            messages=mensagens,
+            temperature=temperatura,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _stream_completion(self, modelo, mensagens, temperatura, max_tokens):
+        """Pedaços de texto da resposta: em fluxo pela API; de uma vez com uma completion substituta."""
+        if self._chat_completion is self._openai_completion:
+            return self._openai_stream(modelo, mensagens, temperatura, max_tokens)
+        return [self._chat_completion(modelo, mensagens, temperatura, max_tokens)]
         
-    def generate_data(self, prompt: str, modelo: str = "gpt-4o-mini", temperatura: float = 0.4) -> Optional[str]:
-        """Gera dados usando OpenAI com tratamento de erros robusto."""
-        if not self.api_key:
-            print("Chave OpenAI não configurada")
-            return None
+    def generate_data(self, prompt: str, modelo: str = "gpt-4o-mini", temperatura: float = 0.4,
+                      renovar: bool = False) -> Optional[str]:
+        """
+        Gera dados usando OpenAI com tratamento de erros robusto. Pode ser chamada de várias threads.
+        Respostas a prompts idênticos vêm do cache persistente, sem chamar a API nem o limitador;
+        `renovar=True` ignora a resposta em cache (ex.: nova tentativa após resposta inválida).
+        """
+        def chamar(modelo, mensagens, temperatura, max_tokens):
+            if not self.api_key:
+                print("Chave OpenAI não configurada")
+                return None
+            if self.limitador:
+                self.limitador.acquire(estimate_tokens(prompt) + max_tokens)
+            return self._chat_completion(modelo, mensagens, temperatura, max_tokens)
         
+        mensagens = [{"role": "user", "content": prompt}]
         try:
-            response = openai.chat.completions.create(
-                model=modelo,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperatura,
-                max_tokens=4000  # Aumenta limite para contexto maior
-            )
-            return response.choices[0].message.content
+            if self.usar_cache:
+                return cache_llm.completion(chamar, modelo, mensagens, temperatura, MAX_TOKENS_RESPOSTA, renovar)
+            return chamar(modelo, mensagens, temperatura, MAX_TOKENS_RESPOSTA)
         except Exception as e:
             print(f"Erro na API OpenAI: {e}")
             return None
     
-    def build_enhanced_prompt(self, tabela_nome: str, n_linhas: int) -> str:
-        """Constrói prompt aprimorado com contexto abrangente."""
+    def generate_records_stream(self, prompt: str, modelo: str = "gpt-4o-mini", temperatura: float = 0.4,
+                                renovar: bool = False):
+        """
+        Gera registros em fluxo: cada objeto de "registros" é entregue assim que fecha na resposta.
+        Uma resposta truncada ou interrompida mantém todos os registros completos já entregues.
+        Respostas completas são gravadas no cache persistente (ver generate_data).
+        Retorna:
+            generator: Registros (dicts, ainda não validados).
+        """
+        mensagens = [{"role": "user", "content": prompt}]
+        pedacos, gravar = None, False
+        if self.usar_cache and not renovar:
+            resposta = cache_llm.get(modelo, mensagens, temperatura, MAX_TOKENS_RESPOSTA)
+            if resposta is not None:
+                pedacos = [resposta]
+        if pedacos is None:
+            if not self.api_key:
+                print("Chave OpenAI não configurada")
+                return
+            if self.limitador:
+                self.limitador.acquire(estimate_tokens(prompt) + MAX_TOKENS_RESPOSTA)
+            pedacos = self._stream_completion(modelo, mensagens, temperatura, MAX_TOKENS_RESPOSTA)
+            gravar = self.usar_cache
+        
+        parser = RecordStreamParser()
+        texto = []
+        entregues = 0
+        try:
+            for pedaco in pedacos:
+                if not pedaco:
+                    continue
+                texto.append(pedaco)
+                for registro in parser.feed(pedaco):
+                    entregues += 1
+                    yield registro
+        except Exception as e:
+            print(f"Erro na API OpenAI: {e}")
+        
+        if parser.erros:
+            print(f"⚠️ {parser.erros} registros inválidos ignorados na resposta")
+        if parser.finished:
+            if gravar and not parser.erros:
+                cache_llm.put(modelo, mensagens, temperatura, MAX_TOKENS_RESPOSTA, "".join(texto))
+        elif entregues:
+            print(f"⚠️ Resposta incompleta: {entregues} registros completos mantidos")
+    
+    def stream_table_data(self, tabela_nome: str, n_linhas: int, max_tentativas: int = 3,
+                          tamanho_bloco: int = TAMANHO_BLOCO_GERACAO, tamanho_lote: int = TAMANHO_LOTE_STREAM) -> bool:
+        """
+        Gera e insere os registros de uma tabela em fluxo contínuo (ver stream_plan).
+        Retorna:
+            bool: True se ao menos uma linha foi inserida.
+        """
+        return self.stream_plan(self.plan_chunks(tabela_nome, n_linhas, tamanho_bloco), max_tentativas, tamanho_lote)
+    
+    def stream_plan(self, plano: ChunkPlan, max_tentativas: int = 3, tamanho_lote: int = TAMANHO_LOTE_STREAM) -> bool:
+        """
+        Executa um plano de blocos em fluxo contínuo: os blocos são pedidos em paralelo e cada
+        registro, assim que termina de chegar, é validado, combinado (sem repetir chaves únicas)
+        e enviado ao inseridor em lotes. Geração, validação e escrita no banco se sobrepõem.
+        Deve rodar na thread dona da conexão.
+        Retorna:
+            bool: True se ao menos uma linha foi inserida.
+        """
+        tabela_nome = plano.tabela_nome
+        plano.start()
+        inicio = time.perf_counter()
+        primeiro = []
+        
+        def validados():
+            for lote in self._stream_chunks(plano, max_tentativas, tamanho_lote):
+                lote = [r for r in self._validate_and_fix_data(lote, tabela_nome) if plano.accept(r)]
+                if lote and not primeiro:
+                    primeiro.append(time.perf_counter() - inicio)
+                    print(f"⚡ Primeiros registros de {tabela_nome.upper()} após {primeiro[0]:.2f}s")
+                yield lote
+        
+        resultado = insert_record_batches(self.context_manager.conexao, tabela_nome, validados())
+        print(f"🔗 {tabela_nome.upper()}: {plano.repetidos} repetidos descartados, "
+              f"{plano.reatribuidos} IDs reatribuídos ({time.perf_counter() - inicio:.2f}s)")
+        return resultado
+    
+    def _stream_chunks(self, plano: ChunkPlan, max_tentativas: int, tamanho_lote: int):
+        """
+        Executa os blocos do plano em threads e entrega os registros recebidos em lotes de até
+        `tamanho_lote`, sem esperar o lote encher (cada lote leva o que já chegou).
+        Um bloco sem nenhum registro é repetido até `max_tentativas` vezes.
+        """
+        fila = queue.Queue()
+        parar = threading.Event()
+        fim = object()
+        
+        def produzir(i):
+            try:
+                for tentativa in range(1, max_tentativas + 1):
+                    recebidos = 0
+                    for registro in self.generate_records_stream(plano.prompts[i], renovar=tentativa > 1):
+                        if parar.is_set():
+                            return
+                        fila.put(registro)
+                        recebidos += 1
+                    if recebidos or parar.is_set():
+                        return
+                    print(f"🤖 Bloco {i + 1}/{len(plano)}: nova tentativa {tentativa + 1}/{max_tentativas}"
+                          if tentativa < max_tentativas else f"❌ Bloco {i + 1}/{len(plano)} falhou")
+            finally:
+                fila.put(fim)
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_GERACOES_SIMULTANEAS, len(plano))) as executor:
+            for i in range(len(plano)):
+                executor.submit(produzir, i)
+            ativos = len(plano)
+            try:
+                while ativos:
+                    lote = []
+                    item = fila.get()
+                    while True:
+                        if item is fim:
+                            ativos -= 1
+                        else:
+                            lote.append(item)
+                        if len(lote) >= tamanho_lote:
+                            break
+                        try:
+                            item = fila.get_nowait()
+                        except queue.Empty:
+                            break
+                    if lote:
+                        yield lote
+            finally:
+                parar.set()
+    
+    def build_enhanced_prompt(self, tabela_nome: str, n_linhas: int, instrucoes_bloco: str = "") -> str:
+        """Constrói prompt aprimorado com contexto abrangente (e as instruções do bloco, se houver)."""
         
         # Schema da tabela
         schema_info = []
@@ -247,6 +633,8 @@ SCHEMA DA TABELA:
 
 {instrucoes_especificas}
 
+{instrucoes_bloco}
+
 REGRAS GLOBAIS:
 1. USE APENAS valores de FK listados acima
 2. Mantenha COERÊNCIA SEMÂNTICA com dados existentes
@@ -309,46 +697,91 @@ INSTRUÇÕES ESPECÍFICAS PARA AMOSTRA:
         
         return instrucoes.get(tabela_nome.lower(), "")
     
-    def generate_table_data(self, tabela_nome: str, n_linhas: int, max_tentativas: int = 3) -> Optional[Dict]:
-        """Gera dados para tabela com retry inteligente."""
+    def plan_chunks(self, tabela_nome: str, n_linhas: int, tamanho_bloco: int = TAMANHO_BLOCO_GERACAO) -> ChunkPlan:
+        """
+        Divide a geração de `n_linhas` registros em blocos de até `tamanho_bloco`, cada um com uma
+        faixa disjunta de IDs e a lista (resumida) de valores únicos que não devem ser repetidos.
+        Lê o banco, portanto deve rodar na thread dona da conexão.
+        """
+        conexao = self.context_manager.conexao
+        colunas = {col["nome"]: col for col in get_columns(conexao, tabela_nome)}
+        chave_primaria = get_primary_key(conexao, tabela_nome)
         
-        for tentativa in range(1, max_tentativas + 1):
-            try:
-                print(f"🤖 Gerando dados IA - Tentativa {tentativa}/{max_tentativas}")
-                
-                prompt = self.build_enhanced_prompt(tabela_nome, n_linhas)
-                resposta = self.generate_data(prompt)
-                
-                if not resposta:
-                    continue
-                
-                # Limpa e valida JSON
-                resposta_limpa = self._clean_json_response(resposta)
-                dados_json = json.loads(resposta_limpa)
-                
-                if not isinstance(dados_json, dict) or "registros" not in dados_json:
-                    print(f"⚠️ Estrutura JSON inválida na tentativa {tentativa}")
-                    continue
-                
-                registros = dados_json["registros"]
-                if not registros or not isinstance(registros, list):
-                    print(f"⚠️ Registros vazios na tentativa {tentativa}")
+        # IDs só são distribuídos para chaves primárias inteiras simples, sem AUTO_INCREMENT
+        chave_id = None
+        if len(chave_primaria) == 1:
+            coluna = colunas.get(chave_primaria[0], {})
+            if "int" in coluna.get("tipo", "").lower() and "auto_increment" not in (coluna.get("extra") or "").lower():
+                chave_id = chave_primaria[0]
+        
+        chaves_unicas = [tuple(indice["colunas"]) for indice in get_indexes(conexao, tabela_nome).values() if indice["unico"]]
+        existentes = {}
+        inicio_id = 1
+        cursor = conexao.cursor()
+        try:
+            for chave in chaves_unicas:
+                cursor.execute(f"SELECT {', '.join(f'`{c}`' for c in chave)} FROM `{tabela_nome}`")
+                existentes[chave] = {tuple(_unique_text(v) for v in linha) for linha in cursor.fetchall()}
+            if chave_id:
+                ids = [int(valor) for (valor,) in existentes.get((chave_id,), ()) if valor and valor.lstrip("-").isdigit()]
+                inicio_id = max(ids, default=0) + 1
+        except mysql.connector.Error as e:
+            print(f"Erro ao ler chaves únicas de {tabela_nome}: {e}")
+        finally:
+            cursor.close()
+        
+        n_blocos = max(1, -(-n_linhas // tamanho_bloco))
+        prompts = []
+        for i in range(n_blocos):
+            quantidade = max(0, min(tamanho_bloco, n_linhas - i * tamanho_bloco))
+            instrucoes = [f"BLOCO {i + 1} DE {n_blocos} (os demais blocos são gerados separadamente):"]
+            if chave_id:
+                primeiro = inicio_id + i * tamanho_bloco
+                instrucoes.append(f"- {chave_id}: use APENAS valores de {primeiro} a {primeiro + quantidade - 1}")
+            for chave, valores in existentes.items():
+                if chave == (chave_id,) or not valores:
                     continue
-                
-                # Valida e corrige dados
-                registros_validados = self._validate_and_fix_data(registros, tabela_nome)
-                dados_json["registros"] = registros_validados
-                
-                print(f"✅ Gerados {len(registros_validados)} registros válidos")
-                return dados_json
-                
-            except (json.JSONDecodeError, ValueError, KeyError) as e:
-                print(f"❌ Erro na tentativa {tentativa}: {e}")
-                if tentativa < max_tentativas:
-                    time.sleep(2)
+                amostra = sorted(" / ".join(str(v) for v in valor) for valor in valores)[-MAX_VALORES_EVITAR:]
+                instrucoes.append(f"- NÃO REPITA {' + '.join(chave)} já usados: {amostra}")
+            if n_blocos > 1:
+                instrucoes.append("- Varie nomes, descrições e valores únicos para não coincidir com os outros blocos")
+            prompts.append(self.build_enhanced_prompt(tabela_nome, quantidade, "\n".join(instrucoes)))
         
-        print(f"❌ Falha na geração após {max_tentativas} tentativas")
-        return None
+        return ChunkPlan(tabela_nome, prompts, chave_id, inicio_id, chaves_unicas, existentes)
+    
+    def parse_table_response(self, tabela_nome: str, resposta: Optional[str], tentativa: int = 1) -> Optional[Dict]:
+        """
+        Extrai, valida e corrige os registros de uma resposta da IA.
+        Usa o contexto do banco (FKs válidas), portanto deve rodar na thread dona da conexão.
+        Retorna:
+            dict ou None: {"registros": [...]} ou None se a resposta for inválida.
+        """
+        if not resposta:
+            return None
+        try:
+            # Limpa e valida JSON
+            resposta_limpa = self._clean_json_response(resposta)
+            dados_json = json.loads(resposta_limpa)
+            
+            if not isinstance(dados_json, dict) or "registros" not in dados_json:
+                print(f"⚠️ Estrutura JSON inválida na tentativa {tentativa}")
+                return None
+            
+            registros = dados_json["registros"]
+            if not registros or not isinstance(registros, list):
+                print(f"⚠️ Registros vazios na tentativa {tentativa}")
+                return None
+            
+            # Valida e corrige dados
+            registros_validados = self._validate_and_fix_data(registros, tabela_nome)
+            dados_json["registros"] = registros_validados
+            
+            print(f"✅ Gerados {len(registros_validados)} registros válidos")
+            return dados_json
+            
+        except (json.JSONDecodeError, ValueError, KeyError) as e:
+            print(f"❌ Erro na tentativa {tentativa}: {e}")
+            return None
     
     def _clean_json_response(self, response: str) -> str:
         """Limpa resposta da IA removendo markdown e texto extra."""
@@ -464,91 +897,66 @@ def check_ai_dependencies():
     return True
 
 
-def populate_all_tables(conexao, n_linhas=10, n_especies=20):
+def populate_all_tables(conexao, n_linhas=10, n_especies=20, max_workers=MAX_GERACOES_SIMULTANEAS,
+                        limitador=None, completion=None, max_tentativas=3, usar_cache=None, streaming=False):
     """
     Função principal otimizada para popular todas as tabelas com contexto inteligente.
+    As chamadas à IA de todas as tabelas cujas dependências (FKs) já foram preenchidas rodam
+    em paralelo (até `max_workers`, respeitando o RateLimiter), divididas em blocos de até
+    TAMANHO_BLOCO_GERACAO registros; leituras de contexto, validação e inserções ficam na thread
+    principal, na ordem das dependências.
+    Parâmetros:
+        max_workers (int): Chamadas à API simultâneas.
+        limitador (RateLimiter, opcional): Limite de requisições/tokens por minuto (padrão: limites da conta).
+        completion (callable, opcional): Substitui a API (ver AIDataGenerator); dispensa a chave OpenAI.
+        max_tentativas (int): Tentativas de geração por bloco.
+        usar_cache (bool, opcional): Reaproveita respostas gravadas no cache persistente (llm_cache);
+            False sempre chama a API. Padrão: ativo apenas para a API OpenAI.
+        streaming (bool): Insere os registros de cada tabela à medida que a IA os gera (ver
+            AIDataGenerator.stream_plan); as tabelas passam a ser processadas uma por vez.
+    Retorna:
+        tuple: (sucessos, erros)
     """
     print(f"\n{'='*70}")
     print("🚀 INICIANDO POPULAÇÃO INTELIGENTE DE TABELAS")
     print(f"{'='*70}")
     
+    api_key = get_openai_key() if completion is None else "local"
+    if not api_key:
+        if usar_cache is False or not cache_llm.ativo:
+            print("❌ Chave OpenAI não encontrada. Abortando...")
+            return 0, 1
+        print("⚠️ Chave OpenAI não encontrada: usando apenas respostas do cache")
+    
     # Inicializa gerenciadores
     schema = get_schema_info(conexao)
     context_manager = DatabaseContextManager(conexao, schema)
+    limitador = limitador or RateLimiter()
+    ai_generator = AIDataGenerator(api_key, context_manager, limitador, completion, usar_cache)
     
-    api_key = get_openai_key()
-    if not api_key:
-        print("❌ Chave OpenAI não encontrada. Abortando...")
-        return 0, 1
-    
-    ai_generator = AIDataGenerator(api_key, context_manager)
-    
-    # Verifica tabelas existentes
-    tabelas_existentes = context_manager.get_available_tables()
-    if not tabelas_existentes:
-        print("❌ Nenhuma tabela encontrada no banco!")
-        return 0, 1
-    
-    print(f"📊 Tabelas encontradas: {len(tabelas_existentes)}")
-    print(f"🎯 Tabelas: {', '.join(tabelas_existentes)}")
-    
-    # Ordem de população otimizada
-    ordem_execucao = [
-        # Tabelas base (sem dependências)
-        "taxon", "local_de_coleta", "funcionario", "categoria", 
-        "laboratorio", "financiador", "projeto",
-        
-        # Tabelas com dependências simples
-        "hierarquia", "especie", "equipamento",
-        
-        # Tabelas com dependências múltiplas
-        "especime", "amostra", "artigo", "contrato", "financiamento",
-        
-        # Tabelas de relacionamento
-        "proj_func", "proj_esp", "proj_cat", "registro_de_uso",
-        
-        # Tabela especial (por último)
-        "midia"
-    ]
-    
-    # Filtra apenas tabelas existentes
-    tabelas_para_processar = []
-    for tabela in ordem_execucao:
-        tabela_real = next((t for t in tabelas_existentes if t.lower() == tabela.lower()), None)
-        if tabela_real:
-            tabelas_para_processar.append(tabela_real)
-    
-    print(f"📋 Ordem de execução: {' → '.join(tabelas_para_processar)}")
-    
-    sucessos, erros = 0, 0
-    
-    for idx, tabela_nome in enumerate(tabelas_para_processar, 1):
-        print(f"\n{'='*50}")
-        print(f"📝 [{idx}/{len(tabelas_para_processar)}] Processando: {tabela_nome.upper()}")
-        print(f"{'='*50}")
-        
-        try:
-            # Verifica se já tem dados
-            count_existente = context_manager._get_table_count(tabela_nome)
-            if count_existente > 0:
-                print(f"✅ Tabela já possui {count_existente} registros - atualizando contexto")
-                context_manager.get_table_context(tabela_nome)
-                sucessos += 1
-                continue
-            
-            # Tratamento especial para tabelas específicas
-            if tabela_nome.lower() == 'taxon':
-                resultado = populate_taxon_table(conexao, n_especies, ai_generator)
-            elif tabela_nome.lower() == 'hierarquia':
-                resultado = populate_hierarquia_table(conexao)
-            elif tabela_nome.lower() == 'midia':
-                resultado = populate_midia_table(conexao)
-            else:
-                # Geração normal com IA aprimorada
-                resultado = process_regular_table(
-                    conexao, tabela_nome, n_linhas, context_manager, ai_generator
-                )
-            
+    try:
+        # Verifica tabelas existentes
+        tabelas_existentes = context_manager.get_available_tables()
+        if not tabelas_existentes:
+            print("❌ Nenhuma tabela encontrada no banco!")
+            return 0, 1
+    
+        print(f"📊 Tabelas encontradas: {len(tabelas_existentes)}")
+        print(f"🎯 Tabelas: {', '.join(tabelas_existentes)}")
+    
+        # Dependências (FKs) de cada tabela; os níveis são exibidos apenas como referência
+        pendentes = table_dependencies(conexao, tabelas_existentes)
+        for i, nivel in enumerate(dependency_levels(conexao, tabelas_existentes)):
+            print(f"📋 Nível {i}: {', '.join(nivel)}")
+    
+        sucessos, erros = 0, 0
+        tempos, inicios, tentativas = {}, {}, {}
+        planos, blocos, restantes = {}, {}, {}
+        em_andamento = {}   # futuro -> (tabela, índice do bloco)
+        inicio_total = time.perf_counter()
+    
+        def concluir(tabela_nome, resultado):
+            nonlocal sucessos, erros
             if resultado:
                 sucessos += 1
                 # Atualiza contexto após inserção bem-sucedida
@@ -557,10 +965,105 @@ def populate_all_tables(conexao, n_linhas=10, n_especies=20):
             else:
                 erros += 1
                 print(f"❌ Falha ao processar {tabela_nome.upper()}")
+            tempos[tabela_nome] = time.perf_counter() - inicios[tabela_nome]
+            # Libera as tabelas que dependiam desta (mesmo em caso de falha: verify_dependencies_v2 decide)
+            for dependencias in pendentes.values():
+                dependencias.discard(tabela_nome)
+    
+        def iniciar(tabela_nome):
+            """Processa tabelas especiais e já preenchidas; para as demais, retorna o plano de blocos a enviar."""
+            print(f"\n{'='*50}")
+            print(f"📝 [{len(inicios)}/{len(tabelas_existentes)}] Processando: {tabela_nome.upper()}")
+            print(f"{'='*50}")
+        
+            # Verifica se já tem dados
+            count_existente = context_manager._get_table_count(tabela_nome)
+            if count_existente > 0:
+                print(f"✅ Tabela já possui {count_existente} registros - atualizando contexto")
+                return True
+        
+            # Tratamento especial para tabelas específicas
+            if tabela_nome.lower() == 'taxon':
+                return populate_taxon_table(conexao, n_especies, ai_generator)
+            if tabela_nome.lower() == 'hierarquia':
+                return populate_hierarquia_table(conexao)
+            if tabela_nome.lower() == 'midia':
+                return populate_midia_table(conexao)
+        
+            # Geração normal com IA aprimorada: os prompts são montados aqui (leem o banco) e enviados em paralelo
+            plano = prepare_regular_table(tabela_nome, n_linhas, context_manager, ai_generator)
+            if streaming and plano:
+                return ai_generator.stream_plan(plano, max_tentativas)
+            return plano
+    
+        def enviar(tabela_nome, i):
+            renovar = tentativas[tabela_nome, i] > 1
+            futuro = executor.submit(ai_generator.generate_data, planos[tabela_nome].prompts[i], renovar=renovar)
+            em_andamento[futuro] = (tabela_nome, i)
+    
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pendentes or em_andamento:
+                prontas = sorted((t for t, dependencias in pendentes.items() if not dependencias), key=str.lower)
+                if not prontas and not em_andamento:
+                    # Ciclo de FKs: libera o restante
+                    print(f"Aviso: dependência circular entre {', '.join(sorted(pendentes))}")
+                    prontas = sorted(pendentes, key=str.lower)
+            
+                for tabela_nome in prontas:
+                    del pendentes[tabela_nome]
+                    inicios[tabela_nome] = time.perf_counter()
+                    try:
+                        resultado = iniciar(tabela_nome)
+                    except Exception as e:
+                        print(f"💥 Erro crítico em {tabela_nome.upper()}: {e}")
+                        resultado = False
+                    if isinstance(resultado, ChunkPlan):
+                        planos[tabela_nome] = resultado
+                        blocos[tabela_nome] = [None] * len(resultado)
+                        restantes[tabela_nome] = len(resultado)
+                        for i in range(len(resultado)):
+                            tentativas[tabela_nome, i] = 1
+                            enviar(tabela_nome, i)
+                    else:
+                        concluir(tabela_nome, resultado)
+            
+                if not em_andamento:
+                    continue
+            
+                feitos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for futuro in feitos:
+                    tabela_nome, i = em_andamento.pop(futuro)
+                    try:
+                        bloco = ai_generator.parse_table_response(tabela_nome, futuro.result(), tentativas[tabela_nome, i])
+                        if not bloco and tentativas[tabela_nome, i] < max_tentativas:
+                            tentativas[tabela_nome, i] += 1
+                            print(f"🤖 {tabela_nome.upper()} (bloco {i + 1}/{len(blocos[tabela_nome])}): "
+                                  f"nova tentativa {tentativas[tabela_nome, i]}/{max_tentativas}")
+                            enviar(tabela_nome, i)
+                            continue
+                        blocos[tabela_nome][i] = bloco
+                    except Exception as e:
+                        print(f"💥 Erro crítico em {tabela_nome.upper()} (bloco {i + 1}): {e}")
+                    restantes[tabela_nome] -= 1
+                    if restantes[tabela_nome]:
+                        continue
                 
-        except Exception as e:
-            print(f"💥 Erro crítico em {tabela_nome.upper()}: {e}")
-            erros += 1
+                    # Todos os blocos da tabela terminaram: combina e insere
+                    try:
+                        dados_gerados = planos[tabela_nome].merge(blocos.pop(tabela_nome))
+                        resultado = False
+                        if dados_gerados:
+                            # Insere no banco (as tabelas referenciadas já foram concluídas)
+                            print(f"Inserindo {len(dados_gerados['registros'])} registros em {tabela_nome.upper()}...")
+                            resultado = insert_data_from_json(conexao, tabela_nome, dados_gerados) is not False
+                        else:
+                            print(f"Falha na geração de dados pela IA para {tabela_nome.upper()}")
+                    except Exception as e:
+                        print(f"💥 Erro crítico em {tabela_nome.upper()}: {e}")
+                        resultado = False
+                    concluir(tabela_nome, resultado)
+    finally:
+        context_manager.close()
     
     # Relatório final
     print(f"\n{'='*70}")
@@ -569,39 +1072,36 @@ def populate_all_tables(conexao, n_linhas=10, n_especies=20):
     print(f"✅ Sucessos: {sucessos}")
     print(f"❌ Erros: {erros}")
     print(f"📈 Taxa de sucesso: {(sucessos/(sucessos+erros)*100):.1f}%" if (sucessos+erros) > 0 else "N/A")
+    print("⏱️ Tempo por tabela:")
+    for tabela_nome, segundos in tempos.items():
+        print(f"   {tabela_nome.upper()}: {segundos:.2f}s")
+    print(f"⏱️ Tempo total: {time.perf_counter() - inicio_total:.2f}s "
+          f"(soma por tabela: {sum(tempos.values()):.2f}s; espera do limitador: {limitador.espera_total:.2f}s)")
+    print_statement_stats()
+    print_llm_cache_stats()
     print(f"{'='*70}")
     
     return sucessos, erros
 
 
-def process_regular_table(conexao, tabela_nome, n_linhas, context_manager, ai_generator):
-    """Processa tabela regular usando IA com contexto aprimorado."""
-    
-    # Verifica dependências
-    if not verify_dependencies_v2(conexao, tabela_nome, context_manager):
+def prepare_regular_table(tabela_nome, n_linhas, context_manager, ai_generator):
+    """
+    Verifica dependências, calcula o número de linhas e monta os prompts (um por bloco) de uma tabela regular.
+    Retorna:
+        ChunkPlan ou False: Blocos a enviar à IA, ou False se a tabela não puder ser gerada.
+    """
+    if not verify_dependencies_v2(context_manager.conexao, tabela_nome, context_manager):
         print(f"Dependências não atendidas para {tabela_nome}")
         return False
     
-    # Calcula número otimizado de linhas
     n_linhas_otimizado = calculate_optimal_rows_v2(tabela_nome, n_linhas, context_manager)
     if n_linhas_otimizado == 0:
         print("Número de linhas calculado como 0 - pulando")
         return False
     
-    print(f"Gerando {n_linhas_otimizado} registros com contexto inteligente")
-    
-    # Gera dados com IA aprimorada
-    dados_gerados = ai_generator.generate_table_data(tabela_nome, n_linhas_otimizado)
-    
-    if not dados_gerados:
-        print("Falha na geração de dados pela IA")
-        return False
-    
-    # Insere no banco
-    print(f"Inserindo {len(dados_gerados['registros'])} registros...")
-    resultado = insert_data_from_json(conexao, tabela_nome, dados_gerados)
-    
-    return resultado is not False
+    plano = ai_generator.plan_chunks(tabela_nome, n_linhas_otimizado)
+    print(f"Gerando {n_linhas_otimizado} registros com contexto inteligente ({len(plano)} bloco(s))")
+    return plano
 
 
 def verify_dependencies_v2(conexao, tabela_nome, context_manager):
@@ -677,10 +1177,7 @@ def populate_taxon_table(conexao, n_especies=250, ai_generator=None):
         
         for tipo in ['Dominio', 'Reino', 'Filo', 'Classe', 'Ordem', 'Familia']:
             for nome in taxonomia_estruturada[tipo]:
-                cursor.execute(
-                    "INSERT INTO Taxon (ID_Tax, Tipo, Nome) VALUES (%s, %s, %s)",
-                    (id_counter, tipo, nome)
-                )
+                insert_prepared(conexao, "Taxon", CAMPOS_TAXON, (id_counter, tipo, nome))
                 registros_inseridos.append({'ID_Tax': id_counter, 'Tipo': tipo, 'Nome': nome})
                 id_counter += 1
         
@@ -718,10 +1215,7 @@ RESPONDA APENAS COM O JSON.
                     
                     if 'generos' in dados_generos and dados_generos['generos']:
                         for nome_genero in dados_generos['generos']:
-                            cursor.execute(
-                                "INSERT INTO Taxon (ID_Tax, Tipo, Nome) VALUES (%s, %s, %s)",
-                                (id_counter, 'Genero', str(nome_genero)[:50])
-                            )
+                            insert_prepared(conexao, "Taxon", CAMPOS_TAXON, (id_counter, 'Genero', str(nome_genero)[:50]))
                             registros_inseridos.append({'ID_Tax': id_counter, 'Tipo': 'Genero', 'Nome': nome_genero})
                             id_counter += 1
                             
@@ -730,13 +1224,11 @@ RESPONDA APENAS COM O JSON.
                     # Fallback: gêneros predefinidos
                     generos_fallback = ['Homo', 'Felis', 'Canis', 'Mus', 'Corvus', 'Naja', 'Danio', 'Helix', 'Rosa', 'Agaricus']
                     for nome_genero in generos_fallback:
-                        cursor.execute(
-                            "INSERT INTO Taxon (ID_Tax, Tipo, Nome) VALUES (%s, %s, %s)",
-                            (id_counter, 'Genero', nome_genero)
-                        )
+                        insert_prepared(conexao, "Taxon", CAMPOS_TAXON, (id_counter, 'Genero', nome_genero))
                         registros_inseridos.append({'ID_Tax': id_counter, 'Tipo': 'Genero', 'Nome': nome_genero})
                         id_counter += 1
         
+        notify_write(conexao, "Taxon", [], registros_inseridos)
         conexao.commit()
         cursor.close()
         
@@ -756,14 +1248,42 @@ RESPONDA APENAS COM O JSON.
         return False  
 
 
+def build_hierarchy_edges(taxons):
+    """
+    Calcula em memória as arestas (filho, pai) da Hierarquia.
+    Os táxons de cada nível são distribuídos entre os do nível acima (em rodízio);
+    domínios são as raízes e não têm aresta (como em data/hierarquia.json).
+    Parâmetros:
+        taxons (iterable): Tuplas (ID_Tax, Tipo, Nome).
+    Retorna:
+        list: Tuplas (ID_Tax, ID_TaxTopo).
+    """
+    taxons_por_tipo = {}
+    for id_tax, tipo, _ in taxons:
+        taxons_por_tipo.setdefault(tipo, []).append(id_tax)
+
+    arestas = []
+    for tipo_pai, tipo_filho in zip(ORDEM_HIERARQUICA, ORDEM_HIERARQUICA[1:]):
+        pais = taxons_por_tipo.get(tipo_pai)
+        if not pais:
+            continue
+        arestas.extend(
+            (id_filho, pais[j % len(pais)])
+            for j, id_filho in enumerate(taxons_por_tipo.get(tipo_filho, []))
+        )
+    return arestas
+
+
 def populate_hierarquia_table(conexao):
     """
     Popula a tabela Hierarquia com relacionamentos taxonomicamente válidos.
+    As arestas são calculadas em memória e gravadas em INSERTs multi-linha,
+    em uma única transação; táxons que já têm pai são mantidos.
     """
+    cursor = conexao.cursor()
     try:
         print("Construindo hierarquia taxonômica...")
-        
-        cursor = conexao.cursor()
+        inicio = time.perf_counter()
         
         # Busca todos os táxons ordenados por tipo hierárquico
         cursor.execute("SELECT ID_Tax, Tipo, Nome FROM Taxon ORDER BY Tipo, Nome")
@@ -773,58 +1293,28 @@ def populate_hierarquia_table(conexao):
             print("Erro: Nenhum táxon encontrado na tabela Taxon")
             return False
         
-        # Organiza táxons por tipo
-        taxons_por_tipo = {}
-        for id_tax, tipo, nome in todos_taxons:
-            if tipo not in taxons_por_tipo:
-                taxons_por_tipo[tipo] = []
-            taxons_por_tipo[tipo].append((id_tax, nome))
-        
-        print(f"Táxons encontrados por tipo: {[(tipo, len(lista)) for tipo, lista in taxons_por_tipo.items()]}")
+        contagem = {}
+        for _, tipo, _ in todos_taxons:
+            contagem[tipo] = contagem.get(tipo, 0) + 1
+        print(f"Táxons encontrados por tipo: {list(contagem.items())}")
         
-        # Hierarquia taxonômica padrão
-        ordem_hierarquica = ['Dominio', 'Reino', 'Filo', 'Classe', 'Ordem', 'Familia', 'Genero']
-        relacoes_criadas = 0
+        cursor.execute("SELECT ID_Tax FROM Hierarquia")
+        existentes = {id_tax for (id_tax,) in cursor.fetchall()}
+        arestas = [aresta for aresta in build_hierarchy_edges(todos_taxons) if aresta[0] not in existentes]
+        calculo = time.perf_counter() - inicio
         
-        # Cria relacionamentos hierárquicos
-        for i in range(len(ordem_hierarquica) - 1):
-            tipo_filho = ordem_hierarquica[i + 1]
-            tipo_pai = ordem_hierarquica[i]
-            
-            if tipo_filho in taxons_por_tipo and tipo_pai in taxons_por_tipo:
-                filhos = taxons_por_tipo[tipo_filho]
-                pais = taxons_por_tipo[tipo_pai]
-                
-                # Distribui filhos entre pais
-                for j, (id_filho, nome_filho) in enumerate(filhos):
-                    # Seleciona pai baseado na distribuição
-                    pai_index = j % len(pais)
-                    id_pai, nome_pai = pais[pai_index]
-                    
-                    try:
-                        cursor.execute(
-                            "INSERT INTO Hierarquia (ID_Tax, ID_TaxTopo) VALUES (%s, %s)",
-                            (id_filho, id_pai)
-                        )
-                        relacoes_criadas += 1
-                    except mysql.connector.Error as e:
-                        if e.errno != 1062:  # Ignora duplicate key
-                            print(f"Erro ao criar relação {nome_filho} → {nome_pai}: {e}")
-        
-        # Conecta domínios à raiz (se necessário)
-        if 'Dominio' in taxons_por_tipo:
-            for id_dominio, nome_dominio in taxons_por_tipo['Dominio']:
-                try:
-                    # Insere domínio como raiz (ID_TaxTopo = NULL ou auto-referência)
-                    cursor.execute(
-                        "INSERT IGNORE INTO Hierarquia (ID_Tax, ID_TaxTopo) VALUES (%s, NULL)",
-                        (id_dominio,)
-                    )
-                    relacoes_criadas += 1
-                except mysql.connector.Error:
-                    pass  # Ignora erros
-        
-        conexao.commit()
+        inicio_gravacao = time.perf_counter()
+        try:
+            lote = max_rows(CAMPOS_HIERARQUIA)
+            for i in range(0, len(arestas), lote):
+                execute_prepared(conexao, "Hierarquia", CAMPOS_HIERARQUIA, arestas[i:i + lote])
+            notify_write(conexao, "Hierarquia", [],
+                         [dict(zip(CAMPOS_HIERARQUIA, aresta)) for aresta in arestas])
+            conexao.commit()
+        except mysql.connector.Error:
+            conexao.rollback()
+            raise
+        gravacao = time.perf_counter() - inicio_gravacao
         
         # Mostra exemplos das relações criadas
         cursor.execute("""
@@ -844,13 +1334,15 @@ def populate_hierarquia_table(conexao):
                 else:
                     print(f"   {filho} ({tipo_filho}) → RAIZ")
         
-        cursor.close()
-        print(f"✅ Hierarquia criada com sucesso: {relacoes_criadas} relações")
+        print(f"✅ Hierarquia criada com sucesso: {len(arestas)} relações "
+              f"({len(existentes)} já existentes; cálculo {calculo:.3f}s, gravação {gravacao:.3f}s)")
         return True
         
     except mysql.connector.Error as e:
         print(f"Erro ao popular Hierarquia: {e}")
         return False
+    finally:
+        cursor.close()
 
 
 def populate_midia_table(conexao, delay=1):
@@ -924,10 +1416,7 @@ def populate_midia_table(conexao, delay=1):
 
             if imagem:
                 try:
-                    cursor.execute(
-                        "INSERT INTO Midia (ID_Especime, Tipo, Dado) VALUES (%s, %s, %s)",
-                        (id_especime, tipo[:50], imagem)
-                    )
+                    insert_prepared(conexao, "Midia", CAMPOS_MIDIA, (id_especime, tipo[:50], imagem))
                     sucessos += 1
                     print("   ✅ Registro inserido")
                 except mysql.connector.Error as e:
@@ -939,6 +1428,7 @@ def populate_midia_table(conexao, delay=1):
 
             time.sleep(delay)
 
+        notify_write(conexao, "Midia")
         conexao.commit()
         print(f"\n📊 Finalizado: {sucessos} inserções, {falhas} falhas")
         return sucessos > 0
@@ -951,10 +1441,12 @@ def populate_midia_table(conexao, delay=1):
 
 
 
-def generate_sql_query(user_prompt: str, schema: Dict, conexao=None, modelo: str = "gpt-4o-mini", temperatura: float = 0.3) -> Optional[str]:
+def generate_sql_query(user_prompt: str, schema: Dict, conexao=None, modelo: str = "gpt-4o-mini", temperatura: float = 0.3,
+                       usar_cache: bool = True) -> Optional[str]:
     """
     Função única ultra-robusta para geração de SQL complexo usando IA avançada.
     Analisa semanticamente, constrói contexto dinâmico e gera queries sofisticadas.
+    Respostas a prompts idênticos vêm do cache persistente (llm_cache), salvo se `usar_cache` for False.
     """
     if not schema:
         print("❌ Schema não fornecido")
@@ -1045,18 +1537,18 @@ def generate_sql_query(user_prompt: str, schema: Dict, conexao=None, modelo: str
                         except:
                             pass
             
-            # Dados específicos para recursos detectados
+            # Dados específicos para recursos detectados (agregados na árvore taxonômica em memória)
             if 'hierarquia' in intent['recursos']:
                 try:
-                    cursor.execute("SELECT Tipo, COUNT(*) FROM Taxon GROUP BY Tipo")
-                    context['taxonomia'] = cursor.fetchall()
+                    context['taxonomia'] = get_tree(conexao).count_by_type()
                 except:
                     pass
             
             if 'analise' in intent['recursos'] and 'especie' in intent['tabelas']:
                 try:
-                    cursor.execute("SELECT IUCN, COUNT(*) FROM Especie GROUP BY IUCN")
-                    context['iucn_dist'] = cursor.fetchall()
+                    arvore = get_tree(conexao)
+                    context['iucn_dist'] = arvore.iucn_distribution()
+                    context['especies_reino'] = arvore.rollup('Reino')
                 except:
                     pass
             
@@ -1065,10 +1557,6 @@ def generate_sql_query(user_prompt: str, schema: Dict, conexao=None, modelo: str
             pass
     
     # === PROMPT ULTRA-AVANÇADO PARA IA ===
-    api_key = get_openai_key()
-    if not api_key:
-        return _generate_smart_fallback(user_prompt, intent, schema, context)
-    
     # Constrói prompt sofisticado
     prompt_sections = [
         f"PERGUNTA DO USUÁRIO: \"{user_prompt}\"",
@@ -1144,22 +1632,33 @@ def generate_sql_query(user_prompt: str, schema: Dict, conexao=None, modelo: str
             prompt_sections.append(f"{status}: {count}")
         prompt_sections.append("")
     
+    if 'especies_reino' in context:
+        prompt_sections.append("=== ESPÉCIES POR REINO (total / ameaçadas) ===")
+        for _, reino, total, ameacadas in context['especies_reino']:
+            prompt_sections.append(f"{reino}: {total} / {ameacadas}")
+        prompt_sections.append("")
+    
     # Padrões SQL complexos baseados na intenção
     prompt_sections.extend([
         "=== PADRÕES SQL AVANÇADOS ===",
         "",
-        "1. HIERARQUIA TAXONÔMICA (CTE Recursiva):",
-        "WITH RECURSIVE hierarchy AS (",
-        "  SELECT ID_Tax, Nome, Tipo, 0 as nivel, CAST(Nome AS CHAR(500)) as path",
-        "  FROM Taxon WHERE Tipo = 'Dominio'",
-        "  UNION ALL",
-        "  SELECT t.ID_Tax, t.Nome, t.Tipo, h.nivel + 1, CONCAT(h.path, ' > ', t.Nome)",
-        "  FROM Taxon t",
-        "  JOIN Hierarquia hr ON t.ID_Tax = hr.ID_Tax",
-        "  JOIN hierarchy h ON hr.ID_TaxTopo = h.ID_Tax",
-        "  WHERE h.nivel < 8",
-        ")",
-        "SELECT * FROM hierarchy ORDER BY nivel, Nome;",
+        "1. HIERARQUIA TAXONÔMICA (tabela de fechamento, sem recursão):",
+        f"TABLE {TABELA_FECHAMENTO}: ID_Ancestral, ID_Descendente, Profundidade",
+        "  Um par para cada ancestral de cada táxon (o próprio táxon aparece com Profundidade 0).",
+        "  Espécies ligam-se à árvore por Especie.ID_Gen (gênero).",
+        "-- Todas as espécies abaixo de um táxon:",
+        "SELECT e.Nome, e.IUCN",
+        "FROM Taxon r",
+        f"JOIN {TABELA_FECHAMENTO} c ON c.ID_Ancestral = r.ID_Tax",
+        "JOIN Especie e ON e.ID_Gen = c.ID_Descendente",
+        "WHERE r.Tipo = 'Reino' AND r.Nome = 'Animalia';",
+        "-- Linhagem de uma espécie (da raiz ao gênero):",
+        "SELECT t.Tipo, t.Nome",
+        "FROM Especie e",
+        f"JOIN {TABELA_FECHAMENTO} c ON c.ID_Descendente = e.ID_Gen",
+        "JOIN Taxon t ON t.ID_Tax = c.ID_Ancestral",
+        "WHERE e.Nome = 'Homo sapiens'",
+        "ORDER BY c.Profundidade DESC;",
         "",
         "2. ANÁLISE ESTATÍSTICA AVANÇADA:",
         "SELECT",
@@ -1207,7 +1706,7 @@ def generate_sql_query(user_prompt: str, schema: Dict, conexao=None, modelo: str
         f"- Recursos a usar: {', '.join(intent['recursos']) if intent['recursos'] else 'consulta direta'}",
         "- Otimize para performance (use LIMIT quando apropriado)",
         "- Use JOINs adequados baseados nas FKs mostradas",
-        "- Para hierarquias: sempre use CTEs recursivas",
+        f"- Para hierarquias: use a tabela de fechamento {TABELA_FECHAMENTO} (sem CTEs recursivas)",
         "- Para rankings: use window functions (ROW_NUMBER, RANK)",
         "- Para agregações: use GROUP BY com funções apropriadas",
         "- Inclua apenas SQL válido e otimizado",
@@ -1218,25 +1717,31 @@ def generate_sql_query(user_prompt: str, schema: Dict, conexao=None, modelo: str
     full_prompt = "\n".join(prompt_sections)
     
     # === CHAMADA À IA ===
+    mensagens = [{
+        "role": "system", 
+        "content": "Você é um especialista em SQL para sistemas científicos de taxonomia e biodiversidade. Gere apenas SQL otimizado e válido."
+    }, {
+        "role": "user", 
+        "content": full_prompt
+    }]
     try:
-        openai.api_key = api_key
-        response = openai.chat.completions.create(
-            model=modelo,
-            messages=[{
-                "role": "system", 
-                "content": "Você é um especialista em SQL para sistemas científicos de taxonomia e biodiversidade. Gere apenas SQL otimizado e válido."
-            }, {
-                "role": "user", 
-                "content": full_prompt
-            }],
-            temperature=temperatura,
-            max_tokens=2500
-        )
+        raw_sql = cache_llm.get(modelo, mensagens, temperatura, MAX_TOKENS_SQL) if usar_cache else None
+        em_cache = raw_sql is not None
+        if em_cache:
+            print("⚡ Resposta da IA obtida do cache")
+        else:
+            api_key = get_openai_key()
+            if not api_key:
+                return _generate_smart_fallback(user_prompt, intent, schema, context)
+            openai.api_key = api_key
+            raw_sql = AIDataGenerator._openai_completion(modelo, mensagens, temperatura, MAX_TOKENS_SQL)
         
-        raw_sql = response.choices[0].message.content
         if raw_sql:
             clean_sql = _clean_sql_response(raw_sql)
             if clean_sql and _validate_sql(clean_sql):
+                # Apenas respostas com SQL válido são gravadas no cache
+                if usar_cache and not em_cache:
+                    cache_llm.put(modelo, mensagens, temperatura, MAX_TOKENS_SQL, raw_sql)
                 return clean_sql
     
     except Exception as e:
@@ -1328,21 +1833,17 @@ def _generate_smart_fallback(user_prompt: str, intent: Dict, schema: Dict, conte
     
     # Fallbacks sofisticados baseados na intenção
     if 'hierarquia' in intent['recursos'] or 'taxonomia' in prompt_lower:
-        return """
-        WITH RECURSIVE taxonomia_completa AS (
-            SELECT ID_Tax, Nome, Tipo, 0 as nivel, CAST(Nome AS CHAR(500)) as caminho_completo
-            FROM Taxon WHERE Tipo = 'Dominio'
-            UNION ALL
-            SELECT t.ID_Tax, t.Nome, t.Tipo, tc.nivel + 1, 
-                   CONCAT(tc.caminho_completo, ' → ', t.Nome) as caminho_completo
-            FROM Taxon t 
-            JOIN Hierarquia h ON t.ID_Tax = h.ID_Tax
-            JOIN taxonomia_completa tc ON h.ID_TaxTopo = tc.ID_Tax
-            WHERE tc.nivel < 10
-        )
-        SELECT nivel, Tipo, Nome, caminho_completo 
-        FROM taxonomia_completa 
-        ORDER BY nivel, Tipo, Nome 
+        return f"""
+        SELECT 
+            MAX(c.Profundidade) as nivel,
+            t.Tipo,
+            t.Nome,
+            GROUP_CONCAT(a.Nome ORDER BY c.Profundidade DESC SEPARATOR ' → ') as caminho_completo
+        FROM {TABELA_FECHAMENTO} c
+        JOIN Taxon a ON a.ID_Tax = c.ID_Ancestral
+        JOIN Taxon t ON t.ID_Tax = c.ID_Descendente
+        GROUP BY t.ID_Tax, t.Tipo, t.Nome
+        ORDER BY nivel, t.Tipo, t.Nome 
         LIMIT 100;
         """
     
@@ -1367,7 +1868,7 @@ def _generate_smart_fallback(user_prompt: str, intent: Dict, schema: Dict, conte
         """
     
     elif 'analise' in intent['recursos'] and 'especie' in intent['tabelas']:
-        return """
+        return f"""
         SELECT 
             t.Nome as Reino,
             COUNT(DISTINCT e.ID_Esp) as Total_Especies,
@@ -1376,9 +1877,8 @@ def _generate_smart_fallback(user_prompt: str, intent: Dict, schema: Dict, conte
             ROUND(AVG(CASE WHEN e.IUCN IN ('VU','EN','CR','EW','EX') THEN 1 ELSE 0 END) * 100, 2) as Percentual_Ameacadas,
             ROW_NUMBER() OVER (ORDER BY COUNT(DISTINCT e.ID_Esp) DESC) as Ranking_Diversidade
         FROM Taxon t
-        JOIN Hierarquia h ON t.ID_Tax = h.ID_TaxTopo
-        JOIN Taxon t2 ON h.ID_Tax = t2.ID_Tax
-        JOIN Especie e ON t2.ID_Tax = e.ID_Gen
+        JOIN {TABELA_FECHAMENTO} c ON c.ID_Ancestral = t.ID_Tax
+        JOIN Especie e ON e.ID_Gen = c.ID_Descendente
         WHERE t.Tipo = 'Reino'
         GROUP BY t.ID_Tax, t.Nome
         HAVING COUNT(DISTINCT e.ID_Esp) > 0
@@ -1425,24 +1925,19 @@ def _generate_smart_fallback(user_prompt: str, intent: Dict, schema: Dict, conte
         """
     
     elif 'todas' in prompt_lower and 'espécie' in prompt_lower:
-        return """
+        return f"""
         SELECT 
-            CONCAT(tg.Nome, ' ', e.Nome) as Nome_Cientifico,
+            e.Nome as Nome_Cientifico,
             e.Nome_Pop as Nome_Popular,
             e.IUCN as Status_Conservacao,
-            e.Habitat,
-            e.Caracteristicas,
-            tf.Nome as Familia,
-            to_tax.Nome as Ordem,
-            tc.Nome as Classe
+            e.Descricao,
+            MAX(CASE WHEN a.Tipo = 'Familia' THEN a.Nome END) as Familia,
+            MAX(CASE WHEN a.Tipo = 'Ordem' THEN a.Nome END) as Ordem,
+            MAX(CASE WHEN a.Tipo = 'Classe' THEN a.Nome END) as Classe
         FROM Especie e
-        JOIN Taxon tg ON e.ID_Gen = tg.ID_Tax
-        LEFT JOIN Hierarquia hf ON tg.ID_Tax = hf.ID_Tax
-        LEFT JOIN Taxon tf ON hf.ID_TaxTopo = tf.ID_Tax AND tf.Tipo = 'Familia'
-        LEFT JOIN Hierarquia ho ON tf.ID_Tax = ho.ID_Tax
-        LEFT JOIN Taxon to_tax ON ho.ID_TaxTopo = to_tax.ID_Tax AND to_tax.Tipo = 'Ordem'
-        LEFT JOIN Hierarquia hc ON to_tax.ID_Tax = hc.ID_Tax
-        LEFT JOIN Taxon tc ON hc.ID_TaxTopo = tc.ID_Tax AND tc.Tipo = 'Classe'
+        LEFT JOIN {TABELA_FECHAMENTO} c ON c.ID_Descendente = e.ID_Gen
+        LEFT JOIN Taxon a ON a.ID_Tax = c.ID_Ancestral
+        GROUP BY e.ID_Esp, e.Nome, e.Nome_Pop, e.IUCN, e.Descricao
         ORDER BY Nome_Cientifico
         LIMIT 50;
         """
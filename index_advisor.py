@@ -0,0 +1,293 @@
+# Consultor de índices para os relatórios de query_by_user.
+# Uso: python index_advisor.py --password mysql [--aplicar]
+
+import argparse
+import re
+import statistics
+import time
+
+import mysql.connector
+from prettytable import PrettyTable
+
+from db_operations import connect_mysql, exit_db, CONSULTAS_RELATORIOS
+from schema_catalog import get_catalog, invalidate_catalog, resolve_table
+from schema_deploy import parse_schema_script
+
+
+PERIODO_PADRAO = ("1900-01-01", "2100-12-31")
+COLUNAS_PLANO = ("table", "type", "possible_keys", "key", "rows", "filtered", "Extra")
+
+
+def explain_query(conexao, sql, params=None):
+    """
+    Executa EXPLAIN para uma consulta.
+    Retorna:
+        list: Uma linha do plano por tabela, como dicionários (coluna do EXPLAIN -> valor).
+    """
+    cursor = conexao.cursor(dictionary=True)
+    try:
+        cursor.execute("EXPLAIN " + sql.strip().rstrip(";"), params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def full_scans(plano):
+    """Retorna as tabelas lidas por varredura completa (type = ALL) no plano."""
+    return [linha["table"] for linha in plano if linha.get("type") == "ALL"]
+
+
+def print_plan(titulo, plano):
+    """Exibe um plano de execução destacando varreduras completas."""
+    tabela = PrettyTable()
+    tabela.field_names = COLUNAS_PLANO
+    for linha in plano:
+        tabela.add_row([linha.get(coluna) for coluna in COLUNAS_PLANO])
+    print(f"\n{titulo}")
+    print(tabela)
+    varreduras = full_scans(plano)
+    if varreduras:
+        print(f"  → Varredura completa em: {', '.join(varreduras)}")
+
+
+def time_query(conexao, sql, params=None, repeticoes=3):
+    """
+    Mede o tempo de execução de uma consulta (lendo todas as linhas).
+    Retorna:
+        float: Mediana dos tempos, em segundos.
+    """
+    tempos = []
+    cursor = conexao.cursor()
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            tempos.append(time.perf_counter() - inicio)
+    finally:
+        cursor.close()
+    return statistics.median(tempos)
+
+
+_RE_TABELAS = re.compile(r"(?:FROM|JOIN|,)\s*`?(\w+)`?(?:\s+AS)?\s+(\w+)", re.I)
+_RE_COLUNA = re.compile(r"\b(\w+)\.`?(\w+)`?")
+_RE_CLAUSULAS = re.compile(r"\bWHERE\b(.*?)(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|$)", re.I | re.S)
+_RE_IGUALDADE = re.compile(r"^\s*(\w+)\.`?(\w+)`?\s*(=|IN\b)", re.I)
+_RE_FAIXA = re.compile(r"^\s*(\w+)\.`?(\w+)`?\s*(BETWEEN\b|<=|>=|<|>|LIKE\b)", re.I)
+_RE_JUNCAO = re.compile(r"^\s*(\w+)\.`?(\w+)`?\s*=\s*(\w+)\.`?(\w+)`?\s*$", re.I)
+_PALAVRAS_RESERVADAS = {"where", "on", "join", "group", "order", "select", "left", "inner", "as", "using"}
+MAX_COLUNAS_INDICE = 4
+
+
+def query_columns(sql):
+    """
+    Classifica as colunas usadas por uma consulta, por alias de tabela.
+    Retorna:
+        dict: Alias -> {"tabela", "igualdade", "faixa", "juncao", "outras"} (listas de colunas em minúsculas).
+    """
+    sql = sql.strip().rstrip(";")
+    usos = {}
+    for tabela, alias in _RE_TABELAS.findall(sql):
+        if alias.lower() not in _PALAVRAS_RESERVADAS:
+            usos[alias.lower()] = {"tabela": tabela, "igualdade": [], "faixa": [], "juncao": [], "outras": []}
+
+    def adicionar(alias, tipo, coluna):
+        uso = usos.get(alias.lower())
+        if uso is not None and coluna.lower() not in uso[tipo]:
+            uso[tipo].append(coluna.lower())
+
+    where = _RE_CLAUSULAS.search(sql)
+    for condicao in re.split(r"\bAND\b", where.group(1), flags=re.I) if where else []:
+        juncao = _RE_JUNCAO.match(condicao)
+        if juncao:
+            adicionar(juncao.group(1), "juncao", juncao.group(2))
+            adicionar(juncao.group(3), "juncao", juncao.group(4))
+            continue
+        faixa = _RE_FAIXA.match(condicao)
+        if faixa:
+            adicionar(faixa.group(1), "faixa", faixa.group(2))
+            continue
+        igualdade = _RE_IGUALDADE.match(condicao)
+        if igualdade:
+            adicionar(igualdade.group(1), "igualdade", igualdade.group(2))
+
+    # Colunas do SELECT, GROUP BY e ORDER BY: completam o índice para que ele cubra a consulta
+    for alias, coluna in _RE_COLUNA.findall(sql):
+        uso = usos.get(alias.lower())
+        if uso is not None and not any(coluna.lower() in uso[tipo] for tipo in ("igualdade", "faixa", "juncao")):
+            adicionar(alias, "outras", coluna)
+    return usos
+
+
+def _index_columns(uso):
+    """
+    Colunas de um índice para a tabela lida por varredura completa: filtros de igualdade,
+    o primeiro filtro de faixa, colunas de junção e, por fim, as demais colunas lidas (índice de cobertura).
+    """
+    colunas = uso["igualdade"] + uso["faixa"][:1] + uso["juncao"] + uso["faixa"][1:] + uso["outras"]
+    return tuple(dict.fromkeys(colunas))[:MAX_COLUNAS_INDICE]
+
+
+def propose_indexes(conexao, consultas, arquivo_sql="script.sql"):
+    """
+    Propõe índices a partir dos planos de execução: para cada tabela lida por varredura completa
+    (full_scans), monta um índice com as colunas de filtro, junção e leitura da consulta.
+    Índices já cobertos por um existente (que comece pelas mesmas colunas) são ignorados;
+    quando o script define um índice com as mesmas colunas, seu nome e DDL são usados.
+    Parâmetros:
+        consultas (list): Tuplas (sql, plano) — plano como retornado por explain_query.
+    Retorna:
+        list: Dicionários {"tabela", "nome", "colunas", "ddl", "motivo"} dos índices propostos.
+    """
+    modelo = parse_schema_script(arquivo_sql)
+    catalogo = get_catalog(conexao)
+    propostas = {}
+    for sql, plano in consultas:
+        usos = query_columns(sql)
+        for alias in full_scans(plano):
+            uso = usos.get(str(alias).lower())
+            if uso is None:
+                continue
+            nome_real = resolve_table(conexao, uso["tabela"])
+            colunas = _index_columns(uso)
+            if nome_real is None or not colunas:
+                continue
+            existentes = [
+                tuple(c.lower() for c in indice["colunas"])
+                for indice in catalogo[nome_real]["indices"].values()
+            ]
+            if any(existente[:len(colunas)] == colunas for existente in existentes):
+                continue
+            # Sem filtros, a varredura da tabela que conduz a junção é inevitável; basta que
+            # a coluna de junção já inicie algum índice para as demais tabelas a acessarem por ele
+            if not (uso["igualdade"] or uso["faixa"]) and any(existente[:1] == colunas[:1] for existente in existentes):
+                continue
+
+            do_script = modelo["tabelas"].get(nome_real.lower(), {}).get("indices", {})
+            nome, ddl = next(
+                ((nome, indice["ddl"]) for nome, indice in do_script.items() if indice["colunas"] == colunas),
+                (None, None)
+            )
+            if nome is None:
+                nomes_reais = {col["nome"].lower(): col["nome"] for col in catalogo[nome_real]["colunas"]}
+                nome = f"idx_{nome_real}_{'_'.join(colunas)}".lower()[:64]
+                ddl = (f"CREATE INDEX `{nome}` ON `{nome_real}` "
+                       f"({', '.join(f'`{nomes_reais.get(c, c)}`' for c in colunas)})")
+            motivo = (f"varredura completa de {alias}; filtros: {', '.join(uso['igualdade'] + uso['faixa']) or '-'}; "
+                      f"junção: {', '.join(uso['juncao']) or '-'}")
+            propostas.setdefault((nome_real.lower(), colunas), {
+                "tabela": nome_real, "nome": nome, "colunas": colunas, "ddl": ddl, "motivo": motivo
+            })
+
+    # Um índice cujas colunas iniciam outro proposto para a mesma tabela é redundante
+    return [
+        proposta for (tabela, colunas), proposta in propostas.items()
+        if not any(t == tabela and len(c) > len(colunas) and c[:len(colunas)] == colunas for t, c in propostas)
+    ]
+
+
+def apply_indexes(conexao, propostas):
+    """
+    Cria os índices propostos.
+    Retorna:
+        int: Número de índices criados.
+    """
+    criados = 0
+    cursor = conexao.cursor()
+    try:
+        for proposta in propostas:
+            try:
+                inicio = time.perf_counter()
+                cursor.execute(proposta["ddl"])
+                criados += 1
+                print(f"Índice {proposta['nome']} criado em {proposta['tabela']} "
+                      f"({time.perf_counter() - inicio:.2f}s)")
+            except mysql.connector.Error as err:
+                print(f"Erro ao criar o índice {proposta['nome']}: {err}")
+    finally:
+        cursor.close()
+        invalidate_catalog()
+    return criados
+
+
+def _analyze_reports(conexao, periodo, repeticoes, titulo):
+    resultados = {}
+    for opcao, relatorio in CONSULTAS_RELATORIOS.items():
+        params = periodo if relatorio["periodo"] else None
+        plano = explain_query(conexao, relatorio["sql"], params)
+        print_plan(f"[{titulo}] Relatório {opcao}: {relatorio['titulo']}", plano)
+        resultados[opcao] = {
+            "plano": plano,
+            "tempo": time_query(conexao, relatorio["sql"], params, repeticoes)
+        }
+    return resultados
+
+
+def advise_indexes(conexao, aplicar=False, periodo=PERIODO_PADRAO, repeticoes=3, arquivo_sql="script.sql"):
+    """
+    Analisa os relatórios registrados com EXPLAIN, propõe índices para as tabelas lidas por
+    varredura completa (ver propose_indexes) e, se `aplicar` for True, cria-os e compara
+    planos e tempos antes/depois.
+    Parâmetros:
+        conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
+        aplicar (bool): Se True, cria os índices propostos.
+        periodo (tuple): Intervalo de datas usado nos relatórios com período.
+        repeticoes (int): Execuções de cada relatório na medição de tempo.
+    Retorna:
+        list: Índices propostos (ver propose_indexes).
+    """
+    antes = _analyze_reports(conexao, periodo, repeticoes, "Antes")
+
+    consultas = [(CONSULTAS_RELATORIOS[opcao]["sql"], resultado["plano"]) for opcao, resultado in antes.items()]
+    propostas = propose_indexes(conexao, consultas, arquivo_sql)
+    if not propostas:
+        print("\nNenhuma varredura completa que um novo índice evite.")
+    else:
+        print("\nÍndices recomendados:")
+        for proposta in propostas:
+            print(f"\t• {proposta['ddl']}")
+            print(f"\t  ({proposta['motivo']})")
+
+    if not aplicar or not propostas:
+        return propostas
+
+    apply_indexes(conexao, propostas)
+    depois = _analyze_reports(conexao, periodo, repeticoes, "Depois")
+
+    resumo = PrettyTable()
+    resumo.field_names = ["Relatório", "Antes (s)", "Depois (s)", "Varreduras antes", "Varreduras depois"]
+    for opcao in CONSULTAS_RELATORIOS:
+        resumo.add_row([
+            opcao, f"{antes[opcao]['tempo']:.4f}", f"{depois[opcao]['tempo']:.4f}",
+            ", ".join(full_scans(antes[opcao]["plano"])) or "-",
+            ", ".join(full_scans(depois[opcao]["plano"])) or "-"
+        ])
+    print("\nComparação:")
+    print(resumo)
+    return propostas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultor de índices dos relatórios do NEXUS-BIO.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="trabalho_final")
+    parser.add_argument("--aplicar", action="store_true", help="Cria os índices propostos")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    conexao = connect_mysql(args.host, args.user, args.password, args.database, args.port, pool_size=1)
+    if not conexao:
+        print("Não foi possível conectar ao banco de dados.")
+        return 1
+    try:
+        advise_indexes(conexao, aplicar=args.aplicar, repeticoes=args.repeticoes)
+    finally:
+        exit_db(conexao)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from prettytable import PrettyTable
+
+
+CAMINHO_CACHE_LLM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite3")
+VALIDADE_PADRAO = 30 * 24 * 3600          # Segundos até uma resposta expirar
+TAMANHO_MAXIMO_PADRAO = 64 * 1024 * 1024  # Bytes de respostas mantidos em disco
+
+
+def cache_key(modelo, mensagens, temperatura, max_tokens):
+    """Hash SHA-256 da requisição (modelo, mensagens, temperatura, max_tokens)."""
+    requisicao = json.dumps([modelo, mensagens, temperatura, max_tokens], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(requisicao.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Cache persistente (SQLite) de respostas da IA, por hash da requisição.
+    Entradas expiram após `validade` segundos; acima de `tamanho_maximo` bytes, as menos
+    acessadas recentemente são removidas. Seguro entre threads (uma conexão com trava).
+    """
+
+    def __init__(self, caminho=CAMINHO_CACHE_LLM, validade=VALIDADE_PADRAO, tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+        self.caminho = caminho
+        self.validade = validade
+        self.tamanho_maximo = tamanho_maximo
+        self.ativo = True                  # False ignora o cache (sem leitura nem gravação)
+        self._conexao = None
+        self._trava = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"acertos": 0, "faltas": 0, "gravadas": 0, "expiradas": 0,
+                      "descartadas_tamanho": 0, "ignoradas": 0}
+
+    def _connect(self):
+        """Abre o arquivo na primeira utilização (chamar com a trava adquirida)."""
+        if self._conexao is None:
+            self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS respostas ("
+                " chave TEXT PRIMARY KEY, modelo TEXT NOT NULL, resposta TEXT NOT NULL,"
+                " tamanho INTEGER NOT NULL, criada_em REAL NOT NULL, acessada_em REAL NOT NULL)"
+            )
+            self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessada_em)")
+            self._conexao.commit()
+        return self._conexao
+
+    def get(self, modelo, mensagens, temperatura, max_tokens):
+        """
+        Busca a resposta de uma requisição.
+        Retorna:
+            str ou None: Resposta em cache, ou None (falta, expirada ou cache inativo).
+        """
+        if not self.ativo:
+            with self._trava:
+                self.stats["ignoradas"] += 1
+            return None
+
+        chave = cache_key(modelo, mensagens, temperatura, max_tokens)
+        agora = time.time()
+        with self._trava:
+            try:
+                conexao = self._connect()
+                linha = conexao.execute(
+                    "SELECT resposta, criada_em FROM respostas WHERE chave = ?", (chave,)
+                ).fetchone()
+                if linha is not None and agora - linha[1] > self.validade:
+                    conexao.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                    conexao.commit()
+                    self.stats["expiradas"] += 1
+                    linha = None
+                if linha is None:
+                    self.stats["faltas"] += 1
+                    return None
+                conexao.execute("UPDATE respostas SET acessada_em = ? WHERE chave = ?", (agora, chave))
+                conexao.commit()
+            except sqlite3.Error as err:
+                print(f"Erro no cache de respostas da IA: {err}")
+                self.stats["faltas"] += 1
+                return None
+            self.stats["acertos"] += 1
+            return linha[0]
+
+    def put(self, modelo, mensagens, temperatura, max_tokens, resposta):
+        """Grava (ou substitui) a resposta de uma requisição e aplica o limite de tamanho."""
+        if not self.ativo or not resposta:
+            return
+        chave = cache_key(modelo, mensagens, temperatura, max_tokens)
+        agora = time.time()
+        with self._trava:
+            try:
+                conexao = self._connect()
+                conexao.execute(
+                    "INSERT OR REPLACE INTO respostas (chave, modelo, resposta, tamanho, criada_em, acessada_em) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (chave, modelo, resposta, len(resposta.encode("utf-8")), agora, agora)
+                )
+                self.stats["gravadas"] += 1
+                self._evict(conexao, agora)
+                conexao.commit()
+            except sqlite3.Error as err:
+                print(f"Erro ao gravar no cache de respostas da IA: {err}")
+
+    def _evict(self, conexao, agora):
+        """Remove as entradas expiradas e, acima do tamanho máximo, as menos acessadas recentemente."""
+        self.stats["expiradas"] += conexao.execute(
+            "DELETE FROM respostas WHERE criada_em < ?", (agora - self.validade,)
+        ).rowcount
+        ocupado = conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if ocupado <= self.tamanho_maximo:
+            return
+        remover = []
+        for chave, tamanho in conexao.execute("SELECT chave, tamanho FROM respostas ORDER BY acessada_em"):
+            if ocupado <= self.tamanho_maximo:
+                break
+            remover.append((chave,))
+            ocupado -= tamanho
+        conexao.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+        self.stats["descartadas_tamanho"] += len(remover)
+
+    def completion(self, chamada, modelo, mensagens, temperatura, max_tokens, renovar=False):
+        """
+        Retorna a resposta em cache ou, em caso de falta, chama `chamada(modelo, mensagens,
+        temperatura, max_tokens)` e grava o resultado.
+        Parâmetros:
+            renovar (bool): Ignora a resposta em cache (ex.: nova tentativa após resposta inválida),
+                substituindo-a pela nova.
+        """
+        if not renovar:
+            resposta = self.get(modelo, mensagens, temperatura, max_tokens)
+            if resposta is not None:
+                return resposta
+        resposta = chamada(modelo, mensagens, temperatura, max_tokens)
+        self.put(modelo, mensagens, temperatura, max_tokens, resposta)
+        return resposta
+
+    def clear(self):
+        """Remove todas as respostas gravadas."""
+        with self._trava:
+            try:
+                conexao = self._connect()
+                conexao.execute("DELETE FROM respostas")
+                conexao.commit()
+            except sqlite3.Error as err:
+                print(f"Erro ao limpar o cache de respostas da IA: {err}")
+
+    def info(self):
+        """Retorna estatísticas de uso (acertos, faltas, taxa de acerto, entradas e bytes em disco...)."""
+        with self._trava:
+            try:
+                entradas, ocupado = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas"
+                ).fetchone()
+            except sqlite3.Error:
+                entradas, ocupado = 0, 0
+            consultas = self.stats["acertos"] + self.stats["faltas"]
+            return dict(
+                self.stats,
+                entradas=entradas,
+                tamanho_usado=ocupado,
+                tamanho_maximo=self.tamanho_maximo,
+                taxa_acerto=self.stats["acertos"] / consultas if consultas else 0.0
+            )
+
+
+cache_llm = LLMCache()
+
+
+def llm_cache_stats():
+    """Estatísticas do cache global de respostas da IA."""
+    return cache_llm.info()
+
+
+def print_llm_cache_stats():
+    """Exibe as estatísticas do cache global de respostas da IA."""
+    info = llm_cache_stats()
+    tabela = PrettyTable()
+    tabela.field_names = ["Cache da IA", "Valor"]
+    tabela.add_rows([
+        ["Acertos", info["acertos"]],
+        ["Faltas", info["faltas"]],
+        ["Taxa de acerto", f"{info['taxa_acerto']:.1%}"],
+        ["Ignoradas (cache desligado)", info["ignoradas"]],
+        ["Gravadas", info["gravadas"]],
+        ["Entradas em disco", info["entradas"]],
+        ["Tamanho", f"{info['tamanho_usado'] / 1024:.1f} KB de {info['tamanho_maximo'] / 1024 / 1024:.0f} MB"],
+        ["Expiradas", info["expiradas"]],
+        ["Descartadas por tamanho", info["descartadas_tamanho"]],
+    ])
+    print(tabela)
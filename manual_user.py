@@ -1,4 +1,6 @@
 from db_operations import print_tables, show_table, insert_data
+from schema_catalog import get_columns, get_checks, resolve_table
+from write_events import fetch_row_images, notify_write
 import mysql.connector
 import re
 from datetime import datetime
@@ -11,7 +13,6 @@ def insert_by_user(conexao):
     """
     print("\n" + "="*50)
     print("\nTabelas Disponíveis:")
-    cursor = conexao.cursor()
 
     # Exibe tabelas disponíveis
     tabelas = print_tables(conexao)
@@ -21,25 +22,24 @@ def insert_by_user(conexao):
     
     if tabela_nome not in tabelas:
         print(f"Tabela `{tabela_nome.upper()}` não encontrada.")
-        cursor.close()
         return
 
-    # Exibe colunas da tabela selecionada
-    cursor.execute(f"DESCRIBE `{tabela_nome}`")
-    colunas_detalhadas = cursor.fetchall()
-    colunas = [col[0] for col in colunas_detalhadas]
+    # Exibe colunas da tabela selecionada (a partir do catálogo em cache)
+    tabela_nome = tabelas[tabela_nome]
+    colunas_detalhadas = get_columns(conexao, tabela_nome)
+    colunas = [col["nome"] for col in colunas_detalhadas]
     
     print(f"\nTabela selecionada: {tabela_nome.upper()}")
     print("Colunas disponíveis:")
     for i, col_info in enumerate(colunas_detalhadas, 1):
-        nome_col = col_info[0]
-        tipo_col = col_info[1]
-        null_col = col_info[2]
-        key_col = col_info[3]
+        nome_col = col_info["nome"]
+        tipo_col = col_info["tipo"]
+        null_col = col_info["nulo"]
+        key_col = col_info["chave"]
         
         # Indica se é obrigatório
         obrigatorio = "OBRIGATÓRIO" if null_col == 'NO' and key_col != 'PRI' else ""
-        auto_increment = "AUTO_INCREMENT" if 'auto_increment' in str(col_info).lower() else ""
+        auto_increment = "AUTO_INCREMENT" if 'auto_increment' in (col_info["extra"] or "").lower() else ""
         
         status = []
         if key_col == 'PRI':
@@ -63,8 +63,8 @@ def insert_by_user(conexao):
     valores = []
     for campo in colunas:
         # Busca informações do campo
-        campo_info = next((col for col in colunas_detalhadas if col[0] == campo), None)
-        tipo_campo = (campo_info[1] if campo_info else "unknown").lower()
+        campo_info = next((col for col in colunas_detalhadas if col["nome"] == campo), None)
+        tipo_campo = (campo_info["tipo"] if campo_info else "unknown").lower()
         
         # Solicita valor do usuário
         valor = check_type(campo, tipo_campo)
@@ -82,7 +82,6 @@ def insert_by_user(conexao):
     confirmacao = input("\nConfirmar inserção? (s/N): ").strip().lower()
     if confirmacao not in ['s', 'sim', 'y', 'yes']:
         print("Inserção cancelada.")
-        cursor.close()
         return
 
     # Insere os dados
@@ -90,8 +89,6 @@ def insert_by_user(conexao):
         insert_data(conexao, tabela_nome, colunas, [tuple(valores)])
     except (mysql.connector.Error, ValueError) as e:
         print(f"Inserção falhou: {e}")
-    finally:
-        cursor.close()
     print("\n" + "="*50)
 
 
@@ -102,8 +99,6 @@ def update_by_user(conexao):
     Parâmetros:
         conexao: Objeto de conexão com o banco de dados MySQL.
     """
-    cursor = conexao.cursor()
-
     print("\n" + "="*50)
     print("\nTabelas Disponíveis:")
     print_tables(conexao)
@@ -114,7 +109,6 @@ def update_by_user(conexao):
     num_linhas = show_table(conexao, tabela_nome)
     
     if num_linhas == 0:
-        cursor.close()
         return
 
     campo = input("\nCampo a atualizar: ").strip()
@@ -122,11 +116,9 @@ def update_by_user(conexao):
     print("\n")
     check_check(conexao, tabela_nome, campo)
     
-    cursor.execute(f"DESCRIBE `{tabela_nome}`")
-    colunas_detalhadas = cursor.fetchall()
-    campo_info = next((col for col in colunas_detalhadas if col[0] == campo), None)
-    tipo_campo = (campo_info[1] if campo_info else "unknown").lower()
-    cursor.close()
+    colunas_detalhadas = get_columns(conexao, tabela_nome)
+    campo_info = next((col for col in colunas_detalhadas if col["nome"] == campo), None)
+    tipo_campo = (campo_info["tipo"] if campo_info else "unknown").lower()
     
     print("\nNovo valor:")
     valor = check_type(campo, tipo_campo)
@@ -134,8 +126,16 @@ def update_by_user(conexao):
 
     query = f"UPDATE `{tabela_nome}` SET `{campo}` = %s WHERE {condicao}"
     try:
+        # Imagem das linhas antes da alteração, para os ouvintes de escrita (resumos, caches)
+        tabela_real = resolve_table(conexao, tabela_nome) or tabela_nome
+        antes = fetch_row_images(conexao, tabela_real, condicao)
         cursor = conexao.cursor()
         cursor.execute(query, (valor,))
+        if antes is None:
+            notify_write(conexao, tabela_real)
+        else:
+            nome_campo = campo_info["nome"] if campo_info else campo
+            notify_write(conexao, tabela_real, antes, [dict(linha, **{nome_campo: valor}) for linha in antes])
         conexao.commit()
         cursor.close()
         print("Atualização feita com sucesso.")
@@ -162,8 +162,11 @@ def delete_by_user(conexao):
 
     query = f"DELETE FROM `{tabela_nome}` WHERE {condicao}"
     try:
+        tabela_real = resolve_table(conexao, tabela_nome) or tabela_nome
+        antes = fetch_row_images(conexao, tabela_real, condicao)
         cursor = conexao.cursor()
         cursor.execute(query)
+        notify_write(conexao, tabela_real, antes, None if antes is None else [])
         conexao.commit()
         cursor.close()
         print("\nLinhas deletadas com sucesso.")
@@ -204,11 +207,7 @@ def check_check(conexao, tabela, campo=None):
     Retorna:
         None.
     '''
-    cursor = conexao.cursor()
-    cursor.execute("SET NAMES utf8mb4;")
-    
-    cursor.execute(f"SELECT cc.CONSTRAINT_NAME, cc.CHECK_CLAUSE FROM information_schema.check_constraints cc JOIN information_schema.table_constraints tc ON cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME WHERE tc.TABLE_NAME = '{tabela}' AND tc.TABLE_SCHEMA = 'trabalho_final' AND tc.CONSTRAINT_TYPE = 'CHECK';")
-    resultados = cursor.fetchall()
+    resultados = get_checks(conexao, tabela)
     
     if campo:
         for resultado in resultados:
@@ -216,8 +215,6 @@ def check_check(conexao, tabela, campo=None):
     else:
         for resultado in resultados:
             format_check(resultado)
-                
-    cursor.close()
 
 
 def check_type(campo, tipo_campo):
@@ -0,0 +1,146 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import mysql.connector
+from mysql.connector import errorcode
+from prettytable import PrettyTable
+
+
+MAX_PREPARADAS = 64        # Comandos preparados mantidos por conexão (os mais antigos são fechados)
+MAX_MARCADORES = 65535     # Limite de parâmetros de um comando preparado no MySQL
+
+
+def build_insert_query(nome_tabela, campos, linhas=1):
+    """
+    Constrói a query de inserção, com `linhas` grupos de valores (INSERT multi-linha).
+    """
+    placeholders = "(" + ", ".join(["%s"] * len(campos)) + ")"
+    campos_sql = ", ".join([f"`{c}`" for c in campos])
+    return f"INSERT INTO `{nome_tabela}` ({campos_sql}) VALUES {', '.join([placeholders] * linhas)}"
+
+
+def max_rows(campos):
+    """Número máximo de linhas de um INSERT preparado com estes campos."""
+    return max(1, MAX_MARCADORES // max(1, len(campos)))
+
+
+class StatementCache:
+    """
+    Comandos INSERT preparados de uma sessão MySQL, por formato (tabela, colunas, linhas).
+    O servidor analisa e planeja cada formato uma única vez; as execuções seguintes
+    enviam apenas os valores (protocolo binário).
+    """
+
+    def __init__(self, id_sessao):
+        self.id_sessao = id_sessao
+        self._comandos = OrderedDict()   # (tabela, campos, linhas) -> (cursor, sql)
+
+    def get(self, conexao, nome_tabela, campos, linhas=1):
+        """
+        Retorna o cursor preparado e o SQL de um formato, criando-os na primeira vez.
+        O mesmo objeto SQL deve ser repassado ao cursor para que o comando não seja preparado de novo.
+        """
+        chave = (nome_tabela.lower(), tuple(campos), linhas)
+        comando = self._comandos.get(chave)
+        if comando is not None:
+            self._comandos.move_to_end(chave)
+            _count("reutilizadas")
+            return comando
+
+        comando = (conexao.cursor(prepared=True), build_insert_query(nome_tabela, campos, linhas))
+        self._comandos[chave] = comando
+        _count("preparadas")
+        while len(self._comandos) > MAX_PREPARADAS:
+            _, (antigo, _) = self._comandos.popitem(last=False)
+            _close(antigo)
+        return comando
+
+    def discard(self, fechar=True):
+        """Descarta todos os comandos (fechando-os no servidor se `fechar` for True)."""
+        comandos, self._comandos = self._comandos, OrderedDict()
+        if fechar:
+            for cursor, _ in comandos.values():
+                _close(cursor)
+
+
+def _close(cursor):
+    try:
+        cursor.close()
+    except mysql.connector.Error:
+        pass
+
+
+_caches = weakref.WeakKeyDictionary()   # conexão MySQL real -> StatementCache
+_trava = threading.Lock()
+_estatisticas = {"preparadas": 0, "reutilizadas": 0, "execucoes": 0}
+
+
+def _count(chave, n=1):
+    with _trava:
+        _estatisticas[chave] += n
+
+
+def statement_cache(conexao):
+    """
+    Retorna o cache de comandos preparados da conexão.
+    Conexões do pool (db_pool.PooledConnection) usam o cache da conexão MySQL real,
+    que persiste entre empréstimos; se a sessão mudou (reconexão), o cache é recriado.
+    """
+    cnx = getattr(conexao, "_cnx", None) or conexao
+    id_sessao = cnx.connection_id
+    with _trava:
+        cache = _caches.get(cnx)
+        if cache is None or cache.id_sessao != id_sessao:
+            if cache is not None:
+                cache.discard(fechar=False)   # A sessão antiga já liberou os comandos
+            cache = _caches[cnx] = StatementCache(id_sessao)
+    return cache
+
+
+def execute_prepared(conexao, nome_tabela, campos, linhas_valores):
+    """
+    Insere linhas com um único INSERT preparado de len(linhas_valores) linhas.
+    Parâmetros:
+        campos (list): Colunas, na ordem dos valores.
+        linhas_valores (list): Tuplas de valores (no máximo max_rows(campos) linhas).
+    Retorna:
+        int: Número de linhas afetadas.
+    """
+    parametros = [valor for valores in linhas_valores for valor in valores]
+    cache = statement_cache(conexao)
+    cursor, sql = cache.get(conexao, nome_tabela, campos, len(linhas_valores))
+    try:
+        cursor.execute(sql, parametros)
+    except mysql.connector.Error as err:
+        if err.errno != errorcode.ER_UNKNOWN_STMT_HANDLER:
+            raise
+        # O servidor descartou o comando (ex.: reconexão sem troca de ID): prepara de novo
+        cache.discard(fechar=False)
+        cursor, sql = cache.get(conexao, nome_tabela, campos, len(linhas_valores))
+        cursor.execute(sql, parametros)
+    _count("execucoes")
+    return cursor.rowcount
+
+
+def insert_prepared(conexao, nome_tabela, campos, valores):
+    """Insere uma única linha com o INSERT preparado da tabela."""
+    return execute_prepared(conexao, nome_tabela, campos, [valores])
+
+
+def statement_stats():
+    """Estatísticas globais dos comandos preparados (preparados, reutilizados, execuções, taxa de reuso)."""
+    with _trava:
+        estatisticas = dict(_estatisticas)
+    pedidos = estatisticas["preparadas"] + estatisticas["reutilizadas"]
+    estatisticas["taxa_reuso"] = estatisticas["reutilizadas"] / pedidos if pedidos else 0.0
+    return estatisticas
+
+
+def print_statement_stats():
+    """Exibe as estatísticas dos comandos preparados."""
+    info = statement_stats()
+    tabela = PrettyTable()
+    tabela.field_names = ["Comandos preparados", "Reutilizações", "Execuções", "Taxa de reuso"]
+    tabela.add_row([info["preparadas"], info["reutilizadas"], info["execucoes"], f"{info['taxa_reuso']:.1%}"])
+    print(tabela)
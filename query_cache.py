@@ -0,0 +1,283 @@
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+from prettytable import PrettyTable
+
+from schema_catalog import get_catalog, add_invalidation_listener
+from write_events import add_commit_listener, uncommitted_tables
+
+
+MEMORIA_CACHE_PADRAO = 32 * 1024 * 1024   # Bytes (estimados) ocupados pelos resultados em cache
+FRACAO_MAXIMA_ENTRADA = 0.25              # Fração do orçamento que um único resultado pode ocupar
+
+_RE_LITERAIS = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")")
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_IDENTIFICADORES = re.compile(r"`([^`]+)`|\b([A-Za-z_]\w*)\b")
+_RE_LEITURA = re.compile(r"^\s*\(?\s*(SELECT|WITH)\b", re.I)
+_RE_NAO_DETERMINISTICO = re.compile(
+    r"\b(NOW|SYSDATE|CURDATE|CURTIME|CURRENT_DATE|CURRENT_TIME|CURRENT_TIMESTAMP|UTC_\w+|"
+    r"UNIX_TIMESTAMP|RAND|UUID\w*|LAST_INSERT_ID|CONNECTION_ID|USER|CURRENT_USER|SLEEP|"
+    r"FOUND_ROWS|ROW_COUNT|GET_LOCK|RELEASE_LOCK)\b|\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\b|\bINTO\b|@",
+    re.I
+)
+
+
+def normalize_sql(sql):
+    """Normaliza espaços fora de literais e remove o ';' final, para compor a chave do cache."""
+    partes = _RE_LITERAIS.split(sql.strip().rstrip(";").strip())
+    return "".join(parte if i % 2 else _RE_ESPACOS.sub(" ", parte) for i, parte in enumerate(partes))
+
+
+def is_cacheable(sql):
+    """Indica se a consulta é uma leitura determinística (SELECT/WITH sem funções de tempo, sessão ou travas)."""
+    if not _RE_LEITURA.match(sql):
+        return False
+    sem_literais = _RE_LITERAIS.sub("''", sql)
+    return not _RE_NAO_DETERMINISTICO.search(sem_literais)
+
+
+def _pending(tabelas):
+    """Indica se alguma das tabelas tem escritas ainda não confirmadas."""
+    pendentes = uncommitted_tables()
+    return bool(pendentes) and (None in pendentes or not pendentes.isdisjoint(tabelas))
+
+
+def _row_size(linha):
+    return sys.getsizeof(linha) + sum(sys.getsizeof(valor) for valor in linha)
+
+
+def _execute(conexao, sql, params=None):
+    """Executa a consulta em um cursor sem buffer, fechando-o se a execução falhar."""
+    cursor = conexao.cursor(buffered=False)
+    try:
+        if params:
+            cursor.execute(sql, params)
+        else:
+            cursor.execute(sql)
+    except BaseException:
+        cursor.close()
+        raise
+    return cursor
+
+
+class CachedResult:
+    """Resultado em cache com a mesma interface de leitura de um cursor (description, fetchmany)."""
+
+    def __init__(self, description, linhas):
+        self.description = description
+        self._linhas = linhas
+        self._pos = 0
+
+    def fetchmany(self, tamanho=1):
+        pagina = self._linhas[self._pos:self._pos + tamanho]
+        self._pos += len(pagina)
+        return pagina
+
+    def fetchall(self):
+        return self.fetchmany(len(self._linhas) - self._pos)
+
+    def close(self):
+        pass
+
+
+class _RecordingCursor:
+    """
+    Envolve um cursor sem buffer, repassando as leituras e guardando as linhas lidas.
+    Quando o resultado termina de ser lido (mesmo que descartado), ele é armazenado no cache,
+    desde que caiba em `max_linhas` linhas e no tamanho máximo de uma entrada.
+    """
+
+    def __init__(self, cache, chave, tabelas, geracao, cursor, max_linhas):
+        self._cache = cache
+        self._chave = chave
+        self._tabelas = tabelas
+        self._geracao = geracao
+        self._cursor = cursor
+        self._max_linhas = max_linhas
+        self._linhas = []
+        self._tamanho = 0
+        self._gravando = True
+        self.description = cursor.description
+
+    def fetchmany(self, tamanho=1):
+        pagina = self._cursor.fetchmany(tamanho)
+        if self._gravando:
+            if not pagina:
+                self._cache.store(self._chave, self._tabelas, self._geracao, self.description,
+                                  self._linhas, self._tamanho)
+                self._gravando = False
+            else:
+                self._linhas.extend(pagina)
+                self._tamanho += sum(_row_size(linha) for linha in pagina)
+                if len(self._linhas) > self._max_linhas or self._tamanho > self._cache.max_entrada:
+                    self._gravando = False
+                    self._linhas = []
+        return pagina
+
+    def fetchall(self):
+        linhas = []
+        while True:
+            pagina = self.fetchmany(1000)
+            if not pagina:
+                return linhas
+            linhas.extend(pagina)
+
+    def close(self):
+        self._cursor.close()
+
+
+class QueryCache:
+    """
+    Cache LRU de resultados de consultas, com orçamento de memória.
+    Cada entrada guarda as tabelas lidas pela consulta; o commit de uma escrita em uma tabela
+    descarta exatamente as entradas que a leem. Enquanto a escrita não é confirmada, as entradas
+    dessa tabela não são servidas nem gravadas (a transação pode ler os próprios dados).
+    """
+
+    def __init__(self, memoria=MEMORIA_CACHE_PADRAO):
+        self.memoria = memoria
+        self.max_entrada = int(memoria * FRACAO_MAXIMA_ENTRADA)
+        self._entradas = OrderedDict()     # chave -> (description, linhas, tamanho, tabelas)
+        self._por_tabela = {}              # tabela (minúsculas) -> chaves
+        self._ocupado = 0
+        self._geracao = 0                  # Incrementada a cada invalidação
+        self._trava = threading.Lock()
+        self.ativo = True                  # False ignora o cache (sem leitura nem gravação)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"acertos": 0, "faltas": 0, "armazenadas": 0,
+                      "descartadas_escrita": 0, "descartadas_memoria": 0}
+
+    def tables_in(self, conexao, sql):
+        """Tabelas do banco citadas na consulta (nomes em minúsculas)."""
+        conhecidas = {nome.lower() for nome in get_catalog(conexao)}
+        sem_literais = _RE_LITERAIS.sub("''", sql)
+        citadas = {(a or b).lower() for a, b in _RE_IDENTIFICADORES.findall(sem_literais)}
+        return frozenset(citadas & conhecidas)
+
+    def open(self, conexao, sql, params=None, max_linhas=None):
+        """
+        Executa uma consulta usando o cache.
+        Retorna:
+            CachedResult (acerto) ou um cursor que armazena o resultado ao terminar de ser lido (falta).
+            O chamador deve fechar o objeto retornado.
+        """
+        if not self.ativo:
+            return _execute(conexao, sql, params)
+
+        chave = (normalize_sql(sql), tuple(params) if params else (), max_linhas)
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and _pending(entrada[3]):
+                entrada = None
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self.stats["acertos"] += 1
+                return CachedResult(entrada[0], entrada[1])
+            self.stats["faltas"] += 1
+            geracao = self._geracao
+
+        tabelas = self.tables_in(conexao, sql)
+        cursor = _execute(conexao, sql, params)
+        if max_linhas is None:
+            max_linhas = sys.maxsize
+        return _RecordingCursor(self, chave, tabelas, geracao, cursor, max_linhas)
+
+    def store(self, chave, tabelas, geracao, description, linhas, tamanho):
+        """Armazena um resultado lido por completo, se nenhuma invalidação ocorreu durante a leitura."""
+        if not self.ativo or tamanho > self.max_entrada:
+            return
+        with self._trava:
+            if geracao != self._geracao or chave in self._entradas or _pending(tabelas):
+                return
+            self._entradas[chave] = (description, linhas, tamanho, tabelas)
+            for tabela in tabelas:
+                self._por_tabela.setdefault(tabela, set()).add(chave)
+            self._ocupado += tamanho
+            self.stats["armazenadas"] += 1
+            while self._ocupado > self.memoria and self._entradas:
+                antiga = next(iter(self._entradas))
+                self._remove(antiga)
+                self.stats["descartadas_memoria"] += 1
+
+    def _remove(self, chave):
+        _, _, tamanho, tabelas = self._entradas.pop(chave)
+        self._ocupado -= tamanho
+        for tabela in tabelas:
+            chaves = self._por_tabela.get(tabela)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._por_tabela[tabela]
+
+    def invalidate(self, tabela=None):
+        """Descarta as entradas que leem `tabela` (ou todas, se None)."""
+        with self._trava:
+            self._geracao += 1
+            if tabela is None:
+                chaves = list(self._entradas)
+            else:
+                chaves = list(self._por_tabela.get(tabela.lower(), ()))
+            for chave in chaves:
+                self._remove(chave)
+            self.stats["descartadas_escrita"] += len(chaves)
+
+    def clear(self):
+        self.invalidate(None)
+
+    def info(self):
+        """Retorna estatísticas de uso (acertos, faltas, taxa de acerto, memória ocupada...)."""
+        with self._trava:
+            consultas = self.stats["acertos"] + self.stats["faltas"]
+            return dict(
+                self.stats,
+                entradas=len(self._entradas),
+                memoria_usada=self._ocupado,
+                memoria_total=self.memoria,
+                taxa_acerto=self.stats["acertos"] / consultas if consultas else 0.0
+            )
+
+
+cache_consultas = QueryCache()
+
+
+def _on_commit(tabelas):
+    if None in tabelas:
+        cache_consultas.invalidate(None)
+        return
+    for tabela in tabelas:
+        cache_consultas.invalidate(tabela)
+
+
+add_commit_listener(_on_commit)
+add_invalidation_listener(cache_consultas.clear)
+
+
+def open_cached(conexao, sql, params=None, max_linhas=None):
+    """Executa uma consulta pelo cache global (ver QueryCache.open)."""
+    return cache_consultas.open(conexao, sql, params, max_linhas)
+
+
+def cache_stats():
+    """Estatísticas do cache global de consultas."""
+    return cache_consultas.info()
+
+
+def print_cache_stats():
+    """Exibe as estatísticas do cache global de consultas."""
+    info = cache_stats()
+    tabela = PrettyTable()
+    tabela.field_names = ["Métrica", "Valor"]
+    tabela.add_rows([
+        ["Acertos", info["acertos"]],
+        ["Faltas", info["faltas"]],
+        ["Taxa de acerto", f"{info['taxa_acerto']:.1%}"],
+        ["Entradas", info["entradas"]],
+        ["Memória usada", f"{info['memoria_usada'] / 1024:.1f} KB de {info['memoria_total'] / 1024 / 1024:.0f} MB"],
+        ["Descartadas por escrita", info["descartadas_escrita"]],
+        ["Descartadas por memória", info["descartadas_memoria"]],
+    ])
+    print(tabela)
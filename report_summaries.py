@@ -0,0 +1,269 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from prettytable import PrettyTable
+
+from schema_catalog import resolve_table
+from write_events import add_write_listener, notify_write
+
+
+TAMANHO_LOTE_CHAVES = 1000   # IDs por consulta IN (...) nas buscas auxiliares
+
+# Tabelas de resumo dos relatórios de query_by_user (criadas pelo script.sql).
+#   colunas: chave primária seguida das colunas acumuladas
+#   tabelas: tabelas base cujas escritas alteram o resumo
+#   consulta: cálculo completo do resumo a partir das tabelas base
+RESUMOS = {
+    "nb_resumo_contratos_projeto": {
+        "chave": ("ID_Proj",),
+        "valores": ("Quantidade",),
+        "tabelas": {"contrato", "proj_func"},
+        "consulta": """
+            SELECT  pf.ID_Proj, COUNT(*)
+            FROM    Proj_Func AS pf, Contrato AS c
+            WHERE   pf.ID_Func = c.ID_Func AND c.Status = 'Ativo'
+            GROUP BY pf.ID_Proj
+        """
+    },
+    "nb_resumo_uso_lab": {
+        "chave": ("Dt_Reg", "ID_Lab"),
+        "valores": ("Quantidade",),
+        "tabelas": {"registro_de_uso", "equipamento"},
+        "consulta": """
+            SELECT  DATE(r.Dt_Reg), e.ID_Lab, COUNT(*)
+            FROM    Registro_de_Uso AS r, Equipamento AS e
+            WHERE   r.ID_Equip = e.ID_Equip
+            GROUP BY DATE(r.Dt_Reg), e.ID_Lab
+        """
+    },
+    "nb_resumo_financiamento_projeto": {
+        "chave": ("ID_Proj",),
+        "valores": ("Soma", "Quantidade"),
+        "tabelas": {"financiamento"},
+        "consulta": """
+            SELECT  ID_Proj, SUM(Valor), COUNT(*)
+            FROM    Financiamento
+            GROUP BY ID_Proj
+        """
+    },
+}
+
+
+def summaries_available(conexao):
+    """Indica se todas as tabelas de resumo existem no banco."""
+    return all(resolve_table(conexao, nome) for nome in RESUMOS)
+
+
+# ---------------------------------------------------------------------------
+# Reconstrução e verificação
+# ---------------------------------------------------------------------------
+
+def rebuild_summaries(conexao, nomes=None):
+    """
+    Recalcula por completo as tabelas de resumo (DELETE + INSERT ... SELECT), na transação atual.
+    Parâmetros:
+        nomes (iterable, opcional): Resumos a reconstruir (padrão: todos os existentes).
+    """
+    cursor = conexao.cursor()
+    try:
+        for nome in (nomes or RESUMOS):
+            if not resolve_table(conexao, nome):
+                continue
+            resumo = RESUMOS[nome]
+            colunas = ", ".join(resumo["chave"] + resumo["valores"])
+            cursor.execute(f"DELETE FROM `{nome}`")
+            cursor.execute(f"INSERT INTO `{nome}` ({colunas}) {resumo['consulta']}")
+            notify_write(conexao, nome)
+    finally:
+        cursor.close()
+
+
+def _read_rows(conexao, sql):
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(sql)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def check_summaries(conexao, reconstruir=True):
+    """
+    Compara cada tabela de resumo com o cálculo completo a partir das tabelas base
+    e, se `reconstruir` for True, reconstrói as que divergirem.
+    Retorna:
+        dict: Nome do resumo -> número de chaves divergentes (ausentes, sobrando ou com valor diferente).
+    """
+    if not summaries_available(conexao):
+        print("Tabelas de resumo não encontradas. Crie as tabelas primeiro.")
+        return {}
+
+    tabela = PrettyTable()
+    tabela.field_names = ["Resumo", "Linhas", "Divergências"]
+    divergencias = {}
+    for nome, resumo in RESUMOS.items():
+        n_chave = len(resumo["chave"])
+        colunas = ", ".join(resumo["chave"] + resumo["valores"])
+        esperado = {linha[:n_chave]: linha[n_chave:] for linha in _read_rows(conexao, resumo["consulta"])}
+        atual = {linha[:n_chave]: linha[n_chave:] for linha in _read_rows(conexao, f"SELECT {colunas} FROM `{nome}`")}
+        diferentes = sum(1 for chave in esperado.keys() | atual.keys() if esperado.get(chave) != atual.get(chave))
+        divergencias[nome] = diferentes
+        tabela.add_row([nome, len(atual), diferentes])
+
+    print(tabela)
+    inconsistentes = [nome for nome, n in divergencias.items() if n]
+    if not inconsistentes:
+        print("Todos os resumos estão consistentes.")
+    elif reconstruir:
+        rebuild_summaries(conexao, inconsistentes)
+        conexao.commit()
+        print(f"Resumos reconstruídos: {', '.join(inconsistentes)}")
+    return divergencias
+
+
+# ---------------------------------------------------------------------------
+# Manutenção incremental
+# ---------------------------------------------------------------------------
+
+def _lookup(conexao, sql, ids):
+    """Executa `sql` (com {ids} no lugar da lista IN) em lotes de IDs. Retorna todas as linhas."""
+    ids = list(ids)
+    linhas = []
+    cursor = conexao.cursor()
+    try:
+        for inicio in range(0, len(ids), TAMANHO_LOTE_CHAVES):
+            parte = ids[inicio:inicio + TAMANHO_LOTE_CHAVES]
+            cursor.execute(sql.format(ids=", ".join(["%s"] * len(parte))), parte)
+            linhas.extend(cursor.fetchall())
+    finally:
+        cursor.close()
+    return linhas
+
+
+def _is_active(status):
+    return status is not None and str(status).strip().lower() == "ativo"
+
+
+def _contract_deltas(conexao, tabela, linhas, sinal, deltas):
+    if tabela == "contrato":
+        ativos = defaultdict(int)
+        for linha in linhas:
+            if _is_active(linha.get("status")):
+                ativos[linha["id_func"]] += 1
+        if ativos:
+            sql = "SELECT ID_Func, ID_Proj FROM Proj_Func WHERE ID_Func IN ({ids})"
+            for id_func, id_proj in _lookup(conexao, sql, ativos):
+                deltas[(id_proj,)][0] += sinal * ativos[id_func]
+    else:  # proj_func
+        funcs = {linha["id_func"] for linha in linhas}
+        if funcs:
+            sql = "SELECT ID_Func, COUNT(*) FROM Contrato WHERE Status = 'Ativo' AND ID_Func IN ({ids}) GROUP BY ID_Func"
+            ativos = dict(_lookup(conexao, sql, funcs))
+            for linha in linhas:
+                if ativos.get(linha["id_func"]):
+                    deltas[(linha["id_proj"],)][0] += sinal * ativos[linha["id_func"]]
+
+
+def _day(valor):
+    """Dia de um Dt_Reg (datetime ou texto 'YYYY-MM-DD HH:MM:SS'), chave do resumo de uso."""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, str):
+        return valor.strip()[:10]
+    return valor
+
+
+def _usage_deltas(conexao, tabela, linhas, sinal, deltas):
+    equips = {linha["id_equip"] for linha in linhas}
+    if not equips:
+        return
+    labs = dict(_lookup(conexao, "SELECT ID_Equip, ID_Lab FROM Equipamento WHERE ID_Equip IN ({ids})", equips))
+    for linha in linhas:
+        if linha["id_equip"] in labs:
+            deltas[(_day(linha["dt_reg"]), labs[linha["id_equip"]])][0] += sinal
+
+
+def _funding_deltas(conexao, tabela, linhas, sinal, deltas):
+    for linha in linhas:
+        if linha.get("valor") is None:
+            continue
+        delta = deltas[(linha["id_proj"],)]
+        delta[0] += sinal * Decimal(str(linha["valor"]))
+        delta[1] += sinal
+
+
+_CALCULO_DELTAS = {
+    "nb_resumo_contratos_projeto": _contract_deltas,
+    "nb_resumo_uso_lab": _usage_deltas,
+    "nb_resumo_financiamento_projeto": _funding_deltas,
+}
+
+
+def _apply_deltas(conexao, nome, deltas):
+    """Soma os deltas às linhas do resumo e remove as que ficaram zeradas."""
+    resumo = RESUMOS[nome]
+    deltas = {chave: valores for chave, valores in deltas.items() if any(valores)}
+    if not deltas:
+        return
+
+    colunas = resumo["chave"] + resumo["valores"]
+    atualizacao = ", ".join(f"{c} = {c} + novo.{c}" for c in resumo["valores"])
+    insert = (
+        f"INSERT INTO `{nome}` ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))}) AS novo "
+        f"ON DUPLICATE KEY UPDATE {atualizacao}"
+    )
+    condicao = " AND ".join(f"{c} = %s" for c in resumo["chave"])
+    delete = f"DELETE FROM `{nome}` WHERE {condicao} AND Quantidade <= 0"
+
+    cursor = conexao.cursor()
+    try:
+        cursor.executemany(insert, [chave + tuple(valores) for chave, valores in deltas.items()])
+        negativas = [chave for chave, valores in deltas.items() if valores[-1] < 0]
+        if negativas:
+            cursor.executemany(delete, negativas)
+    finally:
+        cursor.close()
+    # O próprio resumo mudou (ex.: para descartar resultados em cache que o leem)
+    notify_write(conexao, nome)
+
+
+def _normalize(linhas):
+    return [{campo.lower(): valor for campo, valor in linha.items()} for linha in linhas]
+
+
+def on_write(conexao, tabela, linhas_antes, linhas_depois):
+    """
+    Ouvinte de escrita (write_events): mantém os resumos afetados pela alteração em `tabela`.
+    Sem as linhas alteradas (ou em mudanças de laboratório de equipamentos), reconstrói o resumo inteiro.
+    """
+    if not summaries_available(conexao):
+        return
+
+    tabela = tabela.lower() if tabela else None
+    afetados = [nome for nome, resumo in RESUMOS.items() if tabela is None or tabela in resumo["tabelas"]]
+    if not afetados:
+        return
+
+    if tabela is None or linhas_antes is None or linhas_depois is None:
+        rebuild_summaries(conexao, afetados)
+        return
+
+    antes, depois = _normalize(linhas_antes), _normalize(linhas_depois)
+    if tabela == "equipamento":
+        # Inserções não têm usos; remoções são barradas pela FK. Só a troca de laboratório importa.
+        labs_antes = {(l["id_equip"], l.get("id_lab")) for l in antes}
+        labs_depois = {(l["id_equip"], l.get("id_lab")) for l in depois}
+        if antes and depois and labs_antes != labs_depois:
+            rebuild_summaries(conexao, ["nb_resumo_uso_lab"])
+        return
+
+    for nome in afetados:
+        n_valores = len(RESUMOS[nome]["valores"])
+        deltas = defaultdict(lambda: [0] * n_valores)
+        _CALCULO_DELTAS[nome](conexao, tabela, antes, -1, deltas)
+        _CALCULO_DELTAS[nome](conexao, tabela, depois, 1, deltas)
+        _apply_deltas(conexao, nome, deltas)
+
+
+add_write_listener(on_write)
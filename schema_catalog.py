@@ -0,0 +1,253 @@
+import threading
+
+import mysql.connector
+
+
+# Uma única consulta ao information_schema traz colunas, índices/chaves, FKs e CHECKs.
+# A primeira coluna identifica o tipo de linha; as demais variam conforme o tipo.
+CONSULTA_CATALOGO = """
+SELECT  'COL', c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE, c.IS_NULLABLE, c.COLUMN_KEY,
+        c.COLUMN_DEFAULT, c.EXTRA, c.ORDINAL_POSITION, NULL, NULL
+FROM    information_schema.COLUMNS AS c
+JOIN    information_schema.TABLES AS t
+        ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+WHERE   c.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE'
+UNION ALL
+SELECT  'IDX', s.TABLE_NAME, s.COLUMN_NAME, s.INDEX_NAME, NULL, IF(s.NON_UNIQUE = 0, 'UNI', 'MUL'),
+        NULL, NULL, s.SEQ_IN_INDEX, NULL, NULL
+FROM    information_schema.STATISTICS AS s
+WHERE   s.TABLE_SCHEMA = DATABASE()
+UNION ALL
+SELECT  'FK', k.TABLE_NAME, k.COLUMN_NAME, k.CONSTRAINT_NAME, NULL, NULL,
+        NULL, NULL, k.ORDINAL_POSITION, k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME
+FROM    information_schema.KEY_COLUMN_USAGE AS k
+WHERE   k.TABLE_SCHEMA = DATABASE() AND k.REFERENCED_TABLE_NAME IS NOT NULL
+UNION ALL
+SELECT  'CHK', tc.TABLE_NAME, NULL, cc.CONSTRAINT_NAME, NULL, NULL,
+        NULL, NULL, 0, cc.CHECK_CLAUSE, NULL
+FROM    information_schema.TABLE_CONSTRAINTS AS tc
+JOIN    information_schema.CHECK_CONSTRAINTS AS cc
+        ON cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+WHERE   tc.TABLE_SCHEMA = DATABASE() AND tc.CONSTRAINT_TYPE = 'CHECK'
+"""
+
+# Tabelas mantidas pela própria aplicação (versão do schema, resumos...) usam este prefixo
+# e ficam fora das listagens exibidas ao usuário e enviadas à IA.
+PREFIXO_INTERNO = "nb_"
+
+_catalogo = None
+_trava = threading.Lock()
+_ouvintes_invalidacao = []
+
+
+def _nova_tabela():
+    return {"colunas": [], "indices": {}, "fks": [], "checks": []}
+
+
+def load_catalog(conexao):
+    """
+    Carrega o catálogo do schema atual com uma única consulta ao information_schema.
+    Parâmetros:
+        conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
+    Retorna:
+        dict: Nome real da tabela -> {"colunas", "indices", "fks", "checks"}.
+    """
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(CONSULTA_CATALOGO)
+        linhas = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    catalogo = {}
+    for tipo, tabela, coluna, c3, c4, c5, c6, c7, ordem, c9, c10 in linhas:
+        if tipo == "COL":
+            info = catalogo.setdefault(tabela, _nova_tabela())
+            info["colunas"].append({
+                "nome": coluna, "tipo": c3, "nulo": c4, "chave": c5,
+                "default": c6, "extra": c7, "ordem": ordem
+            })
+        elif tipo == "IDX":
+            info = catalogo.setdefault(tabela, _nova_tabela())
+            indice = info["indices"].setdefault(c3, {"unico": c5 == "UNI", "colunas": []})
+            indice["colunas"].append((ordem, coluna))
+        elif tipo == "FK":
+            info = catalogo.setdefault(tabela, _nova_tabela())
+            info["fks"].append({
+                "nome": c3, "coluna": coluna, "tabela_ref": c9, "coluna_ref": c10, "ordem": ordem
+            })
+        elif tipo == "CHK":
+            info = catalogo.setdefault(tabela, _nova_tabela())
+            info["checks"].append((c3, c9))
+
+    # Ordena colunas e colunas dos índices pela posição
+    for info in catalogo.values():
+        info["colunas"].sort(key=lambda c: c["ordem"])
+        for indice in info["indices"].values():
+            indice["colunas"] = [col for _, col in sorted(indice["colunas"])]
+
+    return catalogo
+
+
+def get_catalog(conexao):
+    """
+    Retorna o catálogo em cache, carregando-o na primeira chamada após uma invalidação.
+    """
+    global _catalogo
+    catalogo = _catalogo
+    if catalogo is not None:
+        return catalogo
+
+    with _trava:
+        if _catalogo is None:
+            try:
+                _catalogo = load_catalog(conexao)
+            except mysql.connector.Error as err:
+                print(f"Erro ao carregar o catálogo do schema: {err}")
+                return {}
+        return _catalogo
+
+
+def invalidate_catalog():
+    """
+    Descarta o catálogo em cache. Deve ser chamada após qualquer DDL (CREATE, DROP, ALTER...).
+    """
+    global _catalogo
+    with _trava:
+        _catalogo = None
+    for ouvinte in list(_ouvintes_invalidacao):
+        ouvinte()
+
+
+def add_invalidation_listener(ouvinte):
+    """
+    Registra uma função (sem argumentos) chamada sempre que o catálogo é invalidado,
+    para que caches derivados do schema também sejam descartados.
+    """
+    if ouvinte not in _ouvintes_invalidacao:
+        _ouvintes_invalidacao.append(ouvinte)
+
+
+def is_internal_table(nome_tabela):
+    """Indica se a tabela é interna da aplicação (prefixo PREFIXO_INTERNO)."""
+    return nome_tabela.lower().startswith(PREFIXO_INTERNO)
+
+
+def list_tables(conexao, incluir_internas=False):
+    """
+    Retorna os nomes reais das tabelas do banco, em ordem alfabética.
+    Parâmetros:
+        incluir_internas (bool): Se True, inclui as tabelas internas da aplicação.
+    """
+    return sorted(
+        (t for t in get_catalog(conexao) if incluir_internas or not is_internal_table(t)),
+        key=str.lower
+    )
+
+
+def resolve_table(conexao, nome_tabela):
+    """
+    Resolve o nome de uma tabela sem diferenciar maiúsculas/minúsculas.
+    Retorna:
+        str ou None: Nome real da tabela, ou None se não existir.
+    """
+    catalogo = get_catalog(conexao)
+    if nome_tabela in catalogo:
+        return nome_tabela
+    nome_lower = nome_tabela.lower()
+    return next((t for t in catalogo if t.lower() == nome_lower), None)
+
+
+def _get_table_info(conexao, nome_tabela):
+    nome_real = resolve_table(conexao, nome_tabela)
+    if nome_real is None:
+        return _nova_tabela()
+    return get_catalog(conexao)[nome_real]
+
+
+def get_columns(conexao, nome_tabela):
+    """
+    Retorna as colunas da tabela como dicionários com nome, tipo, nulo, chave, default e extra.
+    """
+    return _get_table_info(conexao, nome_tabela)["colunas"]
+
+
+def get_primary_key(conexao, nome_tabela):
+    """
+    Retorna a lista de colunas da chave primária da tabela.
+    """
+    indice = _get_table_info(conexao, nome_tabela)["indices"].get("PRIMARY")
+    return list(indice["colunas"]) if indice else []
+
+
+def get_indexes(conexao, nome_tabela):
+    """
+    Retorna os índices da tabela: nome -> {"unico": bool, "colunas": [...]}.
+    """
+    return _get_table_info(conexao, nome_tabela)["indices"]
+
+
+def get_foreign_keys(conexao, nome_tabela):
+    """
+    Retorna as chaves estrangeiras da tabela: lista de {"nome", "coluna", "tabela_ref", "coluna_ref"}.
+    """
+    return _get_table_info(conexao, nome_tabela)["fks"]
+
+
+def get_checks(conexao, nome_tabela):
+    """
+    Retorna as CHECK constraints da tabela como tuplas (nome, cláusula).
+    """
+    return _get_table_info(conexao, nome_tabela)["checks"]
+
+
+def table_dependencies(conexao, tabelas=None):
+    """
+    Retorna, para cada tabela, as tabelas que ela referencia por chave estrangeira.
+    Parâmetros:
+        tabelas (list, opcional): Nomes das tabelas a considerar (padrão: todas). FKs para tabelas
+                                  fora do conjunto e autorreferências são ignoradas.
+    Retorna:
+        dict: Nome real da tabela -> conjunto de nomes reais das tabelas referenciadas.
+    """
+    if tabelas is None:
+        tabelas = list_tables(conexao)
+    else:
+        tabelas = [t for t in (resolve_table(conexao, nome) for nome in tabelas) if t is not None]
+
+    conjunto = set(tabelas)
+    return {
+        tabela: {fk["tabela_ref"] for fk in get_foreign_keys(conexao, tabela)
+                 if fk["tabela_ref"] in conjunto and fk["tabela_ref"] != tabela}
+        for tabela in tabelas
+    }
+
+
+def dependency_levels(conexao, tabelas=None):
+    """
+    Agrupa as tabelas em níveis de dependência a partir do grafo de chaves estrangeiras.
+    Tabelas de um mesmo nível não dependem umas das outras e podem ser carregadas em paralelo;
+    cada nível depende apenas dos níveis anteriores.
+    Parâmetros:
+        tabelas (list, opcional): Nomes das tabelas a considerar (padrão: todas). FKs para tabelas
+                                  fora do conjunto são ignoradas.
+    Retorna:
+        list: Lista de níveis, cada um uma lista ordenada de nomes reais de tabelas.
+    """
+    dependencias = table_dependencies(conexao, tabelas)
+    conjunto = set(dependencias)
+
+    niveis = []
+    resolvidas = set()
+    while len(resolvidas) < len(conjunto):
+        nivel = sorted((t for t in conjunto - resolvidas if dependencias[t] <= resolvidas), key=str.lower)
+        if not nivel:
+            # Ciclo de FKs: o restante vai para um último nível
+            restantes = sorted(conjunto - resolvidas, key=str.lower)
+            print(f"Aviso: dependência circular entre {', '.join(restantes)}")
+            niveis.append(restantes)
+            break
+        niveis.append(nivel)
+        resolvidas.update(nivel)
+
+    return niveis
@@ -0,0 +1,334 @@
+import hashlib
+import os
+import re
+
+import mysql.connector
+
+from schema_catalog import get_catalog, invalidate_catalog, is_internal_table, PREFIXO_INTERNO
+
+
+TABELA_VERSAO = f"{PREFIXO_INTERNO}schema_versao"
+DDL_TABELA_VERSAO = f"""
+CREATE TABLE IF NOT EXISTS `{TABELA_VERSAO}` (
+    Versao char(64) PRIMARY KEY,
+    Aplicada_Em timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP)
+"""
+
+_RE_CREATE_TABLE = re.compile(r"^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s*\((.*)\)\s*$", re.I | re.S)
+_RE_CREATE_INDEX = re.compile(
+    r"^CREATE\s+(UNIQUE\s+)?INDEX\s+`?(\w+)`?\s+ON\s+`?(\w+)`?\s*\((.*)\)\s*$", re.I | re.S
+)
+_RE_FK = re.compile(r"FOREIGN\s+KEY\s*\((.*?)\)\s*REFERENCES\s+`?(\w+)`?\s*\((.*?)\)", re.I | re.S)
+_RE_COLUNAS_CHECK = re.compile(r"`?(\w+)`?\s+IN\s*\(", re.I)
+_RE_VALORES_CHECK = re.compile(r"'((?:[^'\\]|\\.)*)'")
+_RE_INT_LARGURA = re.compile(r"^((?:tiny|small|medium|big)?int)\(\d+\)")
+
+_modelo_cache = {}
+
+
+# ---------------------------------------------------------------------------
+# Parser do script DDL
+# ---------------------------------------------------------------------------
+
+def _strip_comments(texto):
+    """Remove comentários --, # e /* */ fora de strings."""
+    saida = []
+    i, n = 0, len(texto)
+    aspas = None
+    while i < n:
+        c = texto[i]
+        if aspas:
+            saida.append(c)
+            if c == "\\" and i + 1 < n:
+                saida.append(texto[i + 1])
+                i += 2
+                continue
+            if c == aspas:
+                aspas = None
+        elif c in ("'", '"', "`"):
+            aspas = c
+            saida.append(c)
+        elif texto.startswith("/*", i):
+            fim = texto.find("*/", i + 2)
+            i = n if fim == -1 else fim + 2
+            continue
+        elif texto.startswith("--", i) or c == "#":
+            fim = texto.find("\n", i)
+            i = n if fim == -1 else fim
+            continue
+        else:
+            saida.append(c)
+        i += 1
+    return "".join(saida)
+
+
+def _split_top_level(texto, separador):
+    """Divide o texto pelo separador, ignorando ocorrências entre parênteses ou aspas."""
+    partes, atual = [], []
+    nivel, aspas = 0, None
+    for c in texto:
+        if aspas:
+            if c == aspas:
+                aspas = None
+        elif c in ("'", '"', "`"):
+            aspas = c
+        elif c == "(":
+            nivel += 1
+        elif c == ")":
+            nivel -= 1
+        elif c == separador and nivel == 0:
+            partes.append("".join(atual).strip())
+            atual = []
+            continue
+        atual.append(c)
+    if "".join(atual).strip():
+        partes.append("".join(atual).strip())
+    return partes
+
+
+def _column_list(texto):
+    return tuple(c.strip().strip("`").lower() for c in texto.split(","))
+
+
+def normalize_type(tipo):
+    """Normaliza um tipo de coluna para comparação (ex.: 'integer' e 'int(11)' -> 'int')."""
+    tipo = re.sub(r"\s+", " ", tipo.strip().lower())
+    tipo = re.sub(r"^integer\b", "int", tipo)
+    tipo = _RE_INT_LARGURA.sub(r"\1", tipo)
+    return tipo.replace(", ", ",")
+
+
+def _check_signature(clausula):
+    """Colunas e valores permitidos de uma CHECK ... IN (...), para comparar script e banco."""
+    clausula = clausula.replace("\\'", "'")
+    colunas = tuple(sorted(c.lower() for c in _RE_COLUNAS_CHECK.findall(clausula)))
+    valores = frozenset(_RE_VALORES_CHECK.findall(clausula))
+    return colunas, valores
+
+
+def _parse_create_table(nome, corpo, comando):
+    tabela = {
+        "nome": nome, "ddl": comando, "colunas": {}, "ordem": [],
+        "pk": (), "fks": [], "uniques": [], "checks": [], "indices": {}
+    }
+    for item in _split_top_level(corpo, ","):
+        cabeca = item.split(None, 1)[0].upper()
+        if cabeca == "CONSTRAINT":
+            # CONSTRAINT nome <definição>
+            item = item.split(None, 2)[2]
+            cabeca = item.split(None, 1)[0].upper()
+
+        if cabeca == "PRIMARY":
+            tabela["pk"] = _column_list(item[item.index("(") + 1:item.rindex(")")])
+        elif cabeca == "FOREIGN":
+            match = _RE_FK.search(item)
+            if match:
+                tabela["fks"].append({
+                    "colunas": _column_list(match.group(1)), "tabela_ref": match.group(2).lower(),
+                    "colunas_ref": _column_list(match.group(3)), "ddl": item
+                })
+        elif cabeca == "UNIQUE":
+            tabela["uniques"].append({"colunas": _column_list(item[item.index("(") + 1:item.rindex(")")]), "ddl": item})
+        elif cabeca == "CHECK":
+            tabela["checks"].append({"assinatura": _check_signature(item), "ddl": item})
+        elif cabeca in ("INDEX", "KEY"):
+            continue
+        else:
+            nome_col, definicao = item.split(None, 1)
+            nome_col = nome_col.strip("`")
+            tipo = definicao.split(None, 1)[0]
+            if "(" in tipo and ")" not in tipo:
+                tipo = definicao[:definicao.index(")") + 1]
+            if re.search(r"\bPRIMARY\s+KEY\b", definicao, re.I):
+                tabela["pk"] = (nome_col.lower(),)
+            tabela["colunas"][nome_col.lower()] = {
+                "nome": nome_col, "tipo": normalize_type(tipo),
+                # Definição sem PRIMARY KEY, para uso em ADD/MODIFY COLUMN
+                "definicao": re.sub(r"\s*\bPRIMARY\s+KEY\b", "", f"`{nome_col}` {definicao}", flags=re.I)
+            }
+            tabela["ordem"].append(nome_col.lower())
+    return tabela
+
+
+def parse_schema_script(arquivo_sql="script.sql"):
+    """
+    Lê e interpreta o script DDL em um modelo de tabelas, colunas e constraints.
+    O modelo fica em cache enquanto o arquivo não for modificado.
+    Parâmetros:
+        arquivo_sql (str): Caminho do script com CREATE TABLE / CREATE INDEX.
+    Retorna:
+        dict: {"versao": hash do script, "tabelas": {nome_lower: tabela},
+               "outros": comandos que não são CREATE TABLE / CREATE INDEX (não aplicados)}
+    """
+    chave = (os.path.abspath(arquivo_sql), os.path.getmtime(arquivo_sql))
+    if chave in _modelo_cache:
+        return _modelo_cache[chave]
+
+    with open(arquivo_sql, "r", encoding="utf-8") as f:
+        script = _strip_comments(f.read())
+
+    modelo = {"versao": None, "tabelas": {}, "outros": []}
+    comandos = [" ".join(c.split()) for c in _split_top_level(script, ";")]
+    modelo["versao"] = hashlib.sha256("\n".join(comandos).encode("utf-8")).hexdigest()
+
+    for comando in comandos:
+        if not comando:
+            continue
+        match = _RE_CREATE_TABLE.match(comando)
+        if match:
+            tabela = _parse_create_table(match.group(1), match.group(2), comando)
+            modelo["tabelas"][tabela["nome"].lower()] = tabela
+            continue
+        match = _RE_CREATE_INDEX.match(comando)
+        if match and match.group(3).lower() in modelo["tabelas"]:
+            modelo["tabelas"][match.group(3).lower()]["indices"][match.group(2).lower()] = {
+                "unico": bool(match.group(1)), "colunas": _column_list(match.group(4)), "ddl": comando
+            }
+            continue
+        modelo["outros"].append(comando)
+
+    _modelo_cache.clear()
+    _modelo_cache[chave] = modelo
+    return modelo
+
+
+# ---------------------------------------------------------------------------
+# Comparação com o banco e aplicação das diferenças
+# ---------------------------------------------------------------------------
+
+def diff_schema(modelo, catalogo):
+    """
+    Compara o modelo do script com o catálogo do banco.
+    Retorna:
+        list: Tuplas (descrição, comando DDL) na ordem em que devem ser aplicadas.
+    """
+    alteracoes = []
+    existentes = {nome.lower(): nome for nome in catalogo}
+
+    for nome_lower, tabela in modelo["tabelas"].items():
+        nome_real = existentes.get(nome_lower)
+        if nome_real is None:
+            alteracoes.append((f"Criar tabela {tabela['nome']}", tabela["ddl"]))
+            for indice in tabela["indices"].values():
+                alteracoes.append((f"Criar índice em {tabela['nome']}", indice["ddl"]))
+            continue
+
+        info = catalogo[nome_real]
+        alvo = f"`{nome_real}`"
+
+        # Colunas ausentes ou com tipo diferente
+        colunas_banco = {c["nome"].lower(): c for c in info["colunas"]}
+        tipos_alterados = [col for col in tabela["ordem"] if col in colunas_banco
+                           and normalize_type(colunas_banco[col]["tipo"]) != tabela["colunas"][col]["tipo"]]
+        if tipos_alterados and is_internal_table(nome_real):
+            # Tabelas internas são derivadas (recalculadas após a implantação); esvaziá-las evita
+            # que a conversão de tipo colida com a chave primária (ex.: timestamp → date)
+            alteracoes.append((f"Esvaziar tabela interna {nome_real}", f"DELETE FROM {alvo}"))
+        for col_lower in tabela["ordem"]:
+            coluna = tabela["colunas"][col_lower]
+            atual = colunas_banco.get(col_lower)
+            if atual is None:
+                alteracoes.append((f"Adicionar coluna {nome_real}.{coluna['nome']}",
+                                   f"ALTER TABLE {alvo} ADD COLUMN {coluna['definicao']}"))
+            elif normalize_type(atual["tipo"]) != coluna["tipo"]:
+                alteracoes.append((f"Alterar tipo {nome_real}.{coluna['nome']}: {atual['tipo']} → {coluna['tipo']}",
+                                   f"ALTER TABLE {alvo} MODIFY COLUMN {coluna['definicao']}"))
+
+        # Chaves estrangeiras
+        fks_banco = {}
+        for fk in info["fks"]:
+            entrada = fks_banco.setdefault(fk["nome"], {"colunas": [], "tabela_ref": fk["tabela_ref"].lower()})
+            entrada["colunas"].append(fk["coluna"].lower())
+        assinaturas_fk = {(tuple(fk["colunas"]), fk["tabela_ref"]) for fk in fks_banco.values()}
+        for fk in tabela["fks"]:
+            if (fk["colunas"], fk["tabela_ref"]) not in assinaturas_fk:
+                alteracoes.append((f"Adicionar FK em {nome_real} ({', '.join(fk['colunas'])})",
+                                   f"ALTER TABLE {alvo} ADD {fk['ddl']}"))
+
+        # UNIQUE e índices
+        indices_banco = {nome.lower(): idx for nome, idx in info["indices"].items()}
+        uniques_banco = {tuple(c.lower() for c in idx["colunas"]) for idx in info["indices"].values() if idx["unico"]}
+        for unique in tabela["uniques"]:
+            if unique["colunas"] not in uniques_banco:
+                alteracoes.append((f"Adicionar UNIQUE em {nome_real} ({', '.join(unique['colunas'])})",
+                                   f"ALTER TABLE {alvo} ADD {unique['ddl']}"))
+        for nome_indice, indice in tabela["indices"].items():
+            if nome_indice not in indices_banco:
+                alteracoes.append((f"Criar índice {nome_indice} em {nome_real}", indice["ddl"]))
+
+        # CHECKs: compara colunas e valores permitidos; recria se os valores mudaram
+        checks_banco = {_check_signature(clausula): nome for nome, clausula in info["checks"]}
+        colunas_banco_check = {assinatura[0]: nome for assinatura, nome in checks_banco.items()}
+        for check in tabela["checks"]:
+            if check["assinatura"] in checks_banco:
+                continue
+            antigo = colunas_banco_check.get(check["assinatura"][0])
+            if antigo:
+                alteracoes.append((f"Remover CHECK desatualizado {antigo} em {nome_real}",
+                                   f"ALTER TABLE {alvo} DROP CHECK `{antigo}`"))
+            alteracoes.append((f"Adicionar CHECK em {nome_real} ({', '.join(check['assinatura'][0])})",
+                               f"ALTER TABLE {alvo} ADD {check['ddl']}"))
+
+    return alteracoes
+
+
+def deploy_schema(conexao, arquivo_sql="script.sql"):
+    """
+    Implanta o schema de forma idempotente: compara o script com o information_schema
+    (uma única consulta, via catálogo) e aplica apenas os objetos ausentes ou alterados,
+    registrando a versão do script em nb_schema_versao.
+    Parâmetros:
+        conexao (mysql.connector.connection.MySQLConnection): Conexão ativa com o banco de dados MySQL.
+        arquivo_sql (str): Caminho do script DDL.
+    Retorna:
+        bool: True se o schema ficou igual ao script (nada a fazer ou tudo aplicado).
+    """
+    modelo = parse_schema_script(arquivo_sql)
+    versao = modelo["versao"][:12]
+    if modelo["outros"]:
+        print(f"{len(modelo['outros'])} comando(s) do script não reconhecido(s) e não aplicado(s):")
+        for comando in modelo["outros"]:
+            print(f"  - {comando[:120]}")
+
+    invalidate_catalog()
+    catalogo = get_catalog(conexao)
+    alteracoes = diff_schema(modelo, catalogo)
+    if not alteracoes and any(t.lower() == TABELA_VERSAO for t in catalogo):
+        print(f"Schema já está atualizado (versão {versao}).")
+        return True
+
+    print(f"Aplicando {len(alteracoes)} alteração(ões) do schema (versão {versao})...")
+    cursor = conexao.cursor()
+    falhas = 0
+    try:
+        # DDL no MySQL faz commit implícito; desativar as FKs permite aplicar tudo
+        # em uma única passagem, sem depender da ordem das tabelas no script.
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute(DDL_TABELA_VERSAO)
+        for i, (descricao, comando) in enumerate(alteracoes, 1):
+            try:
+                cursor.execute(comando)
+                print(f"[{i:02}] {descricao}")
+            except mysql.connector.Error as err:
+                falhas += 1
+                print(f"[{i:02}] Falha ao {descricao[0].lower() + descricao[1:]}:\n{comando}\n→ {err}")
+
+        if falhas == 0:
+            cursor.execute(
+                f"INSERT INTO `{TABELA_VERSAO}` (Versao) VALUES (%s) "
+                f"ON DUPLICATE KEY UPDATE Aplicada_Em = CURRENT_TIMESTAMP",
+                (modelo["versao"],)
+            )
+        conexao.commit()
+    finally:
+        try:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        finally:
+            cursor.close()
+            invalidate_catalog()
+
+    if falhas:
+        print(f"{falhas} alteração(ões) falharam; versão não registrada.")
+        return False
+    print(f"Schema atualizado para a versão {versao}.")
+    return True
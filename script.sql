@@ -142,4 +142,39 @@ CREATE TABLE Registro_de_Uso (
 	Dt_Reg timestamp NOT NULL,
 	PRIMARY KEY(ID_Func,ID_Equip),
 	FOREIGN KEY(ID_Func) REFERENCES Funcionario (ID_Func),
-	FOREIGN KEY(ID_Equip) REFERENCES Equipamento (ID_Equip));
\ No newline at end of file
+	FOREIGN KEY(ID_Equip) REFERENCES Equipamento (ID_Equip));
+
+-- Índices secundários dos relatórios (ver index_advisor.py)
+CREATE INDEX idx_registro_uso_dt_equip ON Registro_de_Uso (Dt_Reg, ID_Equip);
+
+CREATE INDEX idx_artigo_dt_proj ON Artigo (Dt_Pub, ID_Proj);
+
+CREATE INDEX idx_contrato_status_func ON Contrato (Status, ID_Func);
+
+CREATE INDEX idx_financiamento_proj_valor ON Financiamento (ID_Proj, Valor);
+
+
+-- Tabelas internas de resumo dos relatórios (mantidas por report_summaries.py)
+CREATE TABLE nb_resumo_contratos_projeto (
+	ID_Proj integer PRIMARY KEY,
+	Quantidade integer NOT NULL);
+
+CREATE TABLE nb_resumo_uso_lab (
+	Dt_Reg date NOT NULL,
+	ID_Lab integer NOT NULL,
+	Quantidade integer NOT NULL,
+	PRIMARY KEY(Dt_Reg,ID_Lab));
+
+CREATE TABLE nb_resumo_financiamento_projeto (
+	ID_Proj integer PRIMARY KEY,
+	Soma decimal(15,2) NOT NULL,
+	Quantidade integer NOT NULL);
+
+-- Fechamento transitivo de Hierarquia: um par por caminho ancestral → descendente (mantido por taxonomy.py)
+CREATE TABLE nb_taxon_closure (
+	ID_Ancestral integer NOT NULL,
+	ID_Descendente integer NOT NULL,
+	Profundidade integer NOT NULL,
+	PRIMARY KEY(ID_Ancestral,ID_Descendente));
+
+CREATE INDEX idx_taxon_closure_descendente ON nb_taxon_closure (ID_Descendente, Profundidade);
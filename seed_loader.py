@@ -0,0 +1,282 @@
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+
+
+TAMANHO_BLOCO_LEITURA = 64 * 1024   # Bytes lidos do arquivo por vez
+TAMANHO_LOTE_LEITURA = 5000         # Registros entregues ao inseridor por lote
+PROFUNDIDADE_PREFETCH = 2           # Lotes lidos à frente enquanto o anterior é inserido
+MAX_TAMANHO_REGISTRO = 1024 * 1024  # Caracteres de um registro ainda aberto antes de considerá-lo inválido
+
+_INICIO_REGISTROS = re.compile(r'"registros"\s*:\s*\[')
+_SEPARADORES = re.compile(r'[\s,]*')
+_FRONTEIRA = re.compile(r'[},]\s*\{')   # Fim de um registro (ou vírgula) seguido do início do próximo
+
+
+def _object_end(texto, inicio):
+    """
+    Posição logo após o fechamento do objeto/array iniciado em `inicio` (respeitando strings),
+    ou None se ele ainda não foi fechado no texto.
+    """
+    profundidade = 0
+    em_string = escape = False
+    for i in range(inicio, len(texto)):
+        c = texto[i]
+        if em_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                em_string = False
+        elif c == '"':
+            em_string = True
+        elif c in "{[":
+            profundidade += 1
+        elif c in "}]":
+            profundidade -= 1
+            if profundidade == 0:
+                return i + 1
+    return None
+
+
+class RecordStreamParser:
+    """
+    Parser incremental do array "registros" de um JSON.
+    Recebe o texto em pedaços (feed) e devolve cada registro assim que o objeto
+    correspondente é fechado, mantendo em memória apenas o trecho ainda incompleto.
+    Um registro malformado (já fechado, ou maior que MAX_TAMANHO_REGISTRO) é ignorado e contado
+    em `erros`; a leitura continua no início do registro seguinte.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._estado = "procurando"  # procurando -> array -> fim
+        self.erros = 0
+
+    @property
+    def finished(self):
+        """Indica se o fim do array "registros" já foi encontrado."""
+        return self._estado == "fim"
+
+    def feed(self, texto):
+        """
+        Acrescenta um pedaço de texto e extrai os registros completos.
+        Retorna:
+            list: Registros (dicts) completos encontrados neste pedaço.
+        """
+        if self._estado == "fim":
+            return []
+
+        self._buffer += texto
+        registros = []
+        pos = 0
+
+        if self._estado == "procurando":
+            match = _INICIO_REGISTROS.search(self._buffer)
+            if not match:
+                # Mantém só o final, caso a chave esteja dividida entre dois pedaços
+                self._buffer = self._buffer[-64:]
+                return registros
+            pos = match.end()
+            self._estado = "array"
+
+        buffer = self._buffer
+        while True:
+            pos = _SEPARADORES.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._estado = "fim"
+                pos += 1
+                break
+            try:
+                registro, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                proximo = self._skip_invalid(buffer, pos)
+                if proximo is None:
+                    break  # Objeto ainda incompleto: aguarda o próximo pedaço
+                pos = proximo
+                continue
+            registros.append(registro)
+
+        self._buffer = buffer[pos:]
+        return registros
+
+    def _skip_invalid(self, buffer, pos):
+        """
+        Decide o que fazer com um trecho que não pôde ser decodificado em `pos`.
+        Retorna:
+            int ou None: Posição do próximo registro (trecho descartado como inválido),
+                         ou None se o registro pode estar apenas incompleto.
+        """
+        fim = _object_end(buffer, pos) if buffer[pos] in "{[" else None
+        excedeu = len(buffer) - pos > MAX_TAMANHO_REGISTRO
+        if buffer[pos] == "{" and fim is None and not excedeu:
+            return None
+
+        fronteira = _FRONTEIRA.search(buffer, pos + 1)
+        if fronteira is not None and (fim is None or fronteira.start() < fim):
+            proximo = fronteira.end() - 1
+        elif fim is not None:
+            proximo = fim
+        elif excedeu:
+            proximo = len(buffer)
+        else:
+            return None   # Trecho inválido sem fronteira ainda: aguarda mais texto
+
+        self.erros += 1
+        print(f"Registro inválido ignorado próximo de: {buffer[pos:pos + 80]!r}")
+        return proximo
+
+    def close(self):
+        """
+        Finaliza a leitura, validando que o array "registros" foi encontrado e fechado.
+        Exceções:
+            ValueError: Se a chave não existir ou o array estiver truncado/malformado.
+        """
+        if self._estado == "procurando":
+            raise ValueError("JSON deve conter a chave 'registros'")
+        if self._estado == "array":
+            trecho = self._buffer.strip()[:80]
+            raise ValueError(f"Array 'registros' incompleto ou inválido próximo de: {trecho!r}")
+
+
+def iter_json_records(caminho, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+    """
+    Lê os registros de um arquivo JSON ({"registros": [...]}) um a um, sem carregar o arquivo inteiro.
+    Parâmetros:
+        caminho (str): Caminho do arquivo JSON.
+        tamanho_bloco (int): Quantidade de caracteres lidos por vez.
+    Retorna:
+        generator: Registros (dicts) na ordem do arquivo.
+    """
+    parser = RecordStreamParser()
+    with open(caminho, "r", encoding="utf-8") as file:
+        while not parser.finished:
+            bloco = file.read(tamanho_bloco)
+            if not bloco:
+                break
+            yield from parser.feed(bloco)
+    parser.close()
+    if parser.erros:
+        print(f"⚠️ {parser.erros} registros inválidos ignorados em {caminho}")
+
+
+def iter_record_batches(registros, tamanho_lote=TAMANHO_LOTE_LEITURA):
+    """
+    Agrupa um iterável de registros em listas de tamanho fixo (o último lote pode ser menor).
+    """
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def prefetch(iteravel, profundidade=PROFUNDIDADE_PREFETCH):
+    """
+    Consome um iterável em uma thread separada, mantendo até `profundidade` itens prontos.
+    Permite que a leitura/parse do próximo lote aconteça enquanto o atual é inserido.
+    Exceções do produtor são relançadas no consumidor.
+    """
+    fila = queue.Queue(maxsize=profundidade)
+    parar = threading.Event()
+    fim = object()
+
+    def entregar(item):
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produtor():
+        try:
+            for item in iteravel:
+                if not entregar((item, None)):
+                    return
+            entregar((fim, None))
+        except BaseException as erro:
+            entregar((fim, erro))
+
+    thread = threading.Thread(target=produtor, name="prefetch-seed", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, erro = fila.get()
+            if item is fim:
+                if erro is not None:
+                    raise erro
+                return
+            yield item
+    finally:
+        parar.set()
+        thread.join()
+
+
+def stream_seed_batches(caminho, tamanho_lote=TAMANHO_LOTE_LEITURA):
+    """
+    Lotes de registros de um arquivo de carga, lidos em segundo plano.
+    Memória de pico limitada a ~(PROFUNDIDADE_PREFETCH + 1) lotes, independentemente do tamanho do arquivo.
+    """
+    return prefetch(iter_record_batches(iter_json_records(caminho), tamanho_lote))
+
+
+_ESCAPES_TSV = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def _tsv_value(valor):
+    """Formata um valor no formato padrão do LOAD DATA (escape com barra invertida, NULL = \\N)."""
+    if valor is None:
+        return "\\N"
+    if isinstance(valor, bool):
+        return "1" if valor else "0"
+    return str(valor).translate(_ESCAPES_TSV)
+
+
+def write_seed_tsv(caminho_json, criar_conversor, tamanho_lote=TAMANHO_LOTE_LEITURA, diretorio=None):
+    """
+    Converte um arquivo JSON de carga em um TSV temporário, lendo-o de forma incremental.
+    Parâmetros:
+        caminho_json (str): Arquivo JSON ({"registros": [...]}).
+        criar_conversor (callable): Recebe a lista de campos (do primeiro registro) e devolve uma
+                                    função que converte uma lista de registros em tuplas
+                                    (ex.: CoercionPlan.apply).
+        tamanho_lote (int): Registros convertidos por vez.
+        diretorio (str, opcional): Diretório do TSV (padrão: diretório temporário do sistema).
+    Retorna:
+        tuple: (caminho do TSV, lista de campos, número de linhas). O chamador deve apagar o arquivo.
+               Se não houver registros, retorna (None, [], 0).
+    """
+    campos = None
+    converter = None
+    n_linhas = 0
+    descritor, caminho_tsv = tempfile.mkstemp(suffix=".tsv", prefix="carga_", dir=diretorio)
+    try:
+        with os.fdopen(descritor, "w", encoding="utf-8", newline="\n") as tsv:
+            for lote in iter_record_batches(iter_json_records(caminho_json), tamanho_lote):
+                if campos is None:
+                    campos = list(lote[0].keys())
+                    converter = criar_conversor(campos)
+                tsv.writelines(
+                    "\t".join([_tsv_value(v) for v in linha]) + "\n" for linha in converter(lote)
+                )
+                n_linhas += len(lote)
+    except BaseException:
+        os.remove(caminho_tsv)
+        raise
+
+    if campos is None:
+        os.remove(caminho_tsv)
+        return None, [], 0
+    return caminho_tsv, campos, n_linhas
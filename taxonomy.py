@@ -0,0 +1,406 @@
+import time
+from array import array
+from itertools import accumulate
+
+import mysql.connector
+from prettytable import PrettyTable
+
+from schema_catalog import resolve_table, add_invalidation_listener, PREFIXO_INTERNO
+from write_events import add_write_listener, notify_write
+
+
+TABELA_FECHAMENTO = f"{PREFIXO_INTERNO}taxon_closure"
+PROFUNDIDADE_MAXIMA = 32     # Limite da recursão (protege contra ciclos em Hierarquia)
+LIMITE_INCREMENTAL = 500     # Acima desse número de arestas alteradas, reconstrói o fechamento
+
+# Tabela de fechamento: um par (ancestral, descendente) para cada caminho da árvore,
+# incluindo o próprio táxon com Profundidade 0. Raízes auto-referenciadas são ignoradas.
+SQL_RECONSTRUIR = f"""
+INSERT INTO {TABELA_FECHAMENTO} (ID_Ancestral, ID_Descendente, Profundidade)
+WITH RECURSIVE fechamento (ID_Ancestral, ID_Descendente, Profundidade) AS (
+    SELECT  ID_Tax, ID_Tax, 0
+    FROM    Taxon
+    UNION ALL
+    SELECT  f.ID_Ancestral, h.ID_Tax, f.Profundidade + 1
+    FROM    fechamento AS f
+    JOIN    Hierarquia AS h ON h.ID_TaxTopo = f.ID_Descendente
+    WHERE   h.ID_Tax <> h.ID_TaxTopo AND f.Profundidade < {PROFUNDIDADE_MAXIMA}
+)
+SELECT  ID_Ancestral, ID_Descendente, MIN(Profundidade)
+FROM    fechamento
+GROUP BY ID_Ancestral, ID_Descendente
+"""
+
+# Liga todos os ancestrais do pai (inclusive ele) a todos os descendentes do filho (inclusive ele)
+SQL_INSERIR_ARESTA = f"""
+INSERT IGNORE INTO {TABELA_FECHAMENTO} (ID_Ancestral, ID_Descendente, Profundidade)
+SELECT  a.ID_Ancestral, d.ID_Descendente, a.Profundidade + d.Profundidade + 1
+FROM    {TABELA_FECHAMENTO} AS a, {TABELA_FECHAMENTO} AS d
+WHERE   a.ID_Descendente = %s AND d.ID_Ancestral = %s
+"""
+
+# Remove os caminhos que passavam pela aresta. O DISTINCT materializa a tabela derivada,
+# permitindo ler e apagar a mesma tabela no mesmo comando.
+SQL_REMOVER_ARESTA = f"""
+DELETE FROM {TABELA_FECHAMENTO}
+WHERE (ID_Ancestral, ID_Descendente) IN (
+    SELECT anc, des FROM (
+        SELECT  DISTINCT a.ID_Ancestral AS anc, d.ID_Descendente AS des
+        FROM    {TABELA_FECHAMENTO} AS a, {TABELA_FECHAMENTO} AS d
+        WHERE   a.ID_Descendente = %s AND d.ID_Ancestral = %s
+    ) AS caminhos
+)
+"""
+
+
+def closure_available(conexao):
+    """Indica se a tabela de fechamento da taxonomia existe."""
+    return resolve_table(conexao, TABELA_FECHAMENTO) is not None
+
+
+def rebuild_closure(conexao):
+    """
+    Recalcula a tabela de fechamento a partir de Taxon e Hierarquia com uma CTE recursiva,
+    na transação atual.
+    Retorna:
+        int: Número de pares (ancestral, descendente) gravados.
+    """
+    inicio = time.perf_counter()
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {TABELA_FECHAMENTO}")
+        cursor.execute(SQL_RECONSTRUIR)
+        pares = cursor.rowcount
+    finally:
+        cursor.close()
+    notify_write(conexao, TABELA_FECHAMENTO)
+    print(f"Fechamento taxonômico reconstruído: {pares} pares ({time.perf_counter() - inicio:.3f}s)")
+    return pares
+
+
+def _edges(linhas):
+    """Arestas (filho, pai) de linhas de Hierarquia, ignorando raízes auto-referenciadas."""
+    arestas = []
+    for linha in linhas:
+        linha = {campo.lower(): valor for campo, valor in linha.items()}
+        filho, pai = linha.get("id_tax"), linha.get("id_taxtopo")
+        if filho is not None and pai is not None and filho != pai:
+            arestas.append((int(filho), int(pai)))
+    return arestas
+
+
+def _taxon_ids(linhas):
+    return [int(linha[chave]) for linha in linhas for chave in linha if chave.lower() == "id_tax"]
+
+
+def on_write(conexao, tabela, linhas_antes, linhas_depois):
+    """
+    Ouvinte de escrita (write_events): mantém a tabela de fechamento em sincronia com Taxon e Hierarquia.
+    Inserções e remoções de arestas são aplicadas incrementalmente; escritas sem as linhas
+    alteradas ou com muitas arestas reconstroem o fechamento.
+    """
+    tabela = tabela.lower() if tabela else None
+    if tabela not in (None, "taxon", "hierarquia") or not closure_available(conexao):
+        return
+
+    if tabela is None or linhas_antes is None or linhas_depois is None:
+        rebuild_closure(conexao)
+        return
+
+    cursor = conexao.cursor()
+    try:
+        if tabela == "taxon":
+            # Cada táxon é ancestral/descendente de si mesmo; remoções só ocorrem sem arestas (FK)
+            novos = set(_taxon_ids(linhas_depois)) - set(_taxon_ids(linhas_antes))
+            removidos = set(_taxon_ids(linhas_antes)) - set(_taxon_ids(linhas_depois))
+            if novos:
+                cursor.executemany(
+                    f"INSERT IGNORE INTO {TABELA_FECHAMENTO} (ID_Ancestral, ID_Descendente, Profundidade) "
+                    f"VALUES (%s, %s, 0)", [(i, i) for i in novos]
+                )
+            if removidos:
+                cursor.executemany(
+                    f"DELETE FROM {TABELA_FECHAMENTO} WHERE ID_Ancestral = %s OR ID_Descendente = %s",
+                    [(i, i) for i in removidos]
+                )
+        else:
+            antes, depois = set(_edges(linhas_antes)), set(_edges(linhas_depois))
+            removidas, inseridas = antes - depois, depois - antes
+            if len(removidas) + len(inseridas) > LIMITE_INCREMENTAL:
+                rebuild_closure(conexao)
+                return
+            for filho, pai in removidas:
+                cursor.execute(SQL_REMOVER_ARESTA, (pai, filho))
+            for filho, pai in inseridas:
+                cursor.execute(SQL_INSERIR_ARESTA, (pai, filho))
+    finally:
+        cursor.close()
+    notify_write(conexao, TABELA_FECHAMENTO)
+
+
+add_write_listener(on_write)
+
+
+# ---------------------------------------------------------------------------
+# Consultas
+# ---------------------------------------------------------------------------
+
+def _fetch(conexao, sql, params):
+    cursor = conexao.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    except mysql.connector.Error as err:
+        print(f"Erro ao consultar a taxonomia: {err}")
+        return []
+    finally:
+        cursor.close()
+
+
+def ancestors(conexao, id_tax):
+    """
+    Retorna os ancestrais de um táxon, do pai até a raiz.
+    Retorna:
+        list: Dicionários com ID_Tax, Tipo, Nome e Profundidade (1 = pai).
+    """
+    return _fetch(conexao, f"""
+        SELECT  t.ID_Tax, t.Tipo, t.Nome, c.Profundidade
+        FROM    {TABELA_FECHAMENTO} AS c, Taxon AS t
+        WHERE   c.ID_Descendente = %s AND c.Profundidade > 0 AND t.ID_Tax = c.ID_Ancestral
+        ORDER BY c.Profundidade
+    """, (id_tax,))
+
+
+def descendants(conexao, id_tax, tipo=None):
+    """
+    Retorna os descendentes de um táxon (todos os níveis abaixo dele).
+    Parâmetros:
+        tipo (str, opcional): Filtra por tipo de táxon (ex.: 'Genero').
+    Retorna:
+        list: Dicionários com ID_Tax, Tipo, Nome e Profundidade (1 = filho direto).
+    """
+    sql = f"""
+        SELECT  t.ID_Tax, t.Tipo, t.Nome, c.Profundidade
+        FROM    {TABELA_FECHAMENTO} AS c, Taxon AS t
+        WHERE   c.ID_Ancestral = %s AND c.Profundidade > 0 AND t.ID_Tax = c.ID_Descendente
+    """
+    params = (id_tax,)
+    if tipo:
+        sql += " AND t.Tipo = %s"
+        params += (tipo,)
+    return _fetch(conexao, sql + " ORDER BY c.Profundidade, t.Nome", params)
+
+
+def lineage(conexao, especie_id):
+    """
+    Retorna a linhagem completa de uma espécie, da raiz (Domínio) até o gênero.
+    Retorna:
+        list: Dicionários com ID_Tax, Tipo e Nome, do mais geral ao mais específico.
+    """
+    return _fetch(conexao, f"""
+        SELECT  t.ID_Tax, t.Tipo, t.Nome
+        FROM    Especie AS e, {TABELA_FECHAMENTO} AS c, Taxon AS t
+        WHERE   e.ID_Esp = %s AND c.ID_Descendente = e.ID_Gen AND t.ID_Tax = c.ID_Ancestral
+        ORDER BY c.Profundidade DESC
+    """, (especie_id,))
+
+
+# ---------------------------------------------------------------------------
+# Árvore em memória
+# ---------------------------------------------------------------------------
+
+STATUS_AMEACADOS = ("VU", "EN", "CR", "EW", "EX")
+
+
+class TaxonomyTree:
+    """
+    Árvore taxonômica em memória, carregada uma vez de Taxon, Hierarquia e Especie.
+    Os nós ficam em arrays paralelos (índice do nó -> ID, tipo, nome, pai) e são numerados
+    em pré-ordem: cada nó guarda o intervalo [entrada, saida] das posições de sua subárvore,
+    de modo que "d está sob a" é o teste entrada[a] <= entrada[d] <= saida[a].
+    Contagens de espécies por subárvore vêm de somas de prefixo sobre essas posições.
+    """
+
+    __slots__ = ("ids", "tipos", "nomes", "pai", "entrada", "saida", "_indice",
+                 "especie_gen", "especie_iucn", "_prefixo_total", "_prefixo_ameacadas")
+
+    def __init__(self, taxons, arestas, especies):
+        """
+        Parâmetros:
+            taxons (iterable): Tuplas (ID_Tax, Tipo, Nome).
+            arestas (iterable): Tuplas (ID_Tax, ID_TaxTopo) de Hierarquia.
+            especies (iterable): Tuplas (ID_Gen, IUCN) de Especie.
+        """
+        self.ids = array("q")
+        self.tipos, self.nomes = [], []
+        self._indice = {}
+        for id_tax, tipo, nome in taxons:
+            self._indice[id_tax] = len(self.ids)
+            self.ids.append(id_tax)
+            self.tipos.append(tipo)
+            self.nomes.append(nome)
+
+        n = len(self.ids)
+        self.pai = array("q", [-1]) * n
+        filhos = [[] for _ in range(n)]
+        for filho, pai in arestas:
+            i, j = self._indice.get(filho), self._indice.get(pai)
+            if i is not None and j is not None and i != j:
+                self.pai[i] = j
+                filhos[j].append(i)
+
+        # Numeração em pré-ordem iterativa; nós fora de qualquer caminho até a raiz (ciclos) viram raízes
+        self.entrada = array("q", [-1]) * n
+        self.saida = array("q", [-1]) * n
+        posicao = 0
+        raizes = [i for i in range(n) if self.pai[i] == -1] + list(range(n))
+        for raiz in raizes:
+            if self.entrada[raiz] != -1:
+                continue
+            pilha = [(raiz, False)]
+            while pilha:
+                no, saindo = pilha.pop()
+                if saindo:
+                    self.saida[no] = posicao - 1
+                    continue
+                if self.entrada[no] != -1:
+                    continue
+                self.entrada[no] = posicao
+                posicao += 1
+                pilha.append((no, True))
+                pilha.extend((filho, False) for filho in reversed(filhos[no]))
+
+        self.especie_gen = array("q")
+        self.especie_iucn = []
+        total, ameacadas = [0] * (n + 1), [0] * (n + 1)
+        for id_gen, iucn in especies:
+            no = self._indice.get(id_gen)
+            if no is None:
+                continue
+            self.especie_gen.append(no)
+            self.especie_iucn.append(iucn)
+            total[self.entrada[no] + 1] += 1
+            if iucn in STATUS_AMEACADOS:
+                ameacadas[self.entrada[no] + 1] += 1
+        self._prefixo_total = array("q", accumulate(total))
+        self._prefixo_ameacadas = array("q", accumulate(ameacadas))
+
+    @classmethod
+    def load(cls, conexao):
+        """Carrega a árvore do banco (três leituras sequenciais)."""
+        inicio = time.perf_counter()
+        cursor = conexao.cursor()
+        try:
+            cursor.execute("SELECT ID_Tax, Tipo, Nome FROM Taxon")
+            taxons = cursor.fetchall()
+            cursor.execute("SELECT ID_Tax, ID_TaxTopo FROM Hierarquia")
+            arestas = cursor.fetchall()
+            cursor.execute("SELECT ID_Gen, IUCN FROM Especie")
+            especies = cursor.fetchall()
+        finally:
+            cursor.close()
+        arvore = cls(taxons, arestas, especies)
+        print(f"Árvore taxonômica carregada: {len(arvore)} táxons, {len(arvore.especie_gen)} espécies "
+              f"({time.perf_counter() - inicio:.3f}s)")
+        return arvore
+
+    def __len__(self):
+        return len(self.ids)
+
+    def node(self, id_tax):
+        """Índice do nó de um ID_Tax (ou None)."""
+        return self._indice.get(id_tax)
+
+    def is_under(self, id_descendente, id_ancestral):
+        """Indica se `id_descendente` está na subárvore de `id_ancestral` (inclusive ele mesmo)."""
+        d, a = self._indice.get(id_descendente), self._indice.get(id_ancestral)
+        if d is None or a is None:
+            return False
+        return self.entrada[a] <= self.entrada[d] <= self.saida[a]
+
+    def path(self, id_tax):
+        """Nomes dos táxons da raiz até `id_tax`."""
+        no = self._indice.get(id_tax)
+        caminho = []
+        while no is not None and no != -1 and len(caminho) <= len(self.ids):
+            caminho.append(self.nomes[no])
+            no = self.pai[no]
+        return caminho[::-1]
+
+    def species_count(self, id_tax, ameacadas=False):
+        """Número de espécies (ou de espécies ameaçadas) na subárvore de `id_tax`."""
+        no = self._indice.get(id_tax)
+        if no is None:
+            return 0
+        prefixo = self._prefixo_ameacadas if ameacadas else self._prefixo_total
+        return prefixo[self.saida[no] + 1] - prefixo[self.entrada[no]]
+
+    def count_by_type(self):
+        """Número de táxons por tipo, como lista de tuplas (Tipo, quantidade)."""
+        contagem = {}
+        for tipo in self.tipos:
+            contagem[tipo] = contagem.get(tipo, 0) + 1
+        return list(contagem.items())
+
+    def iucn_distribution(self):
+        """Número de espécies por status IUCN, como lista de tuplas (IUCN, quantidade)."""
+        contagem = {}
+        for iucn in self.especie_iucn:
+            contagem[iucn] = contagem.get(iucn, 0) + 1
+        return list(contagem.items())
+
+    def rollup(self, tipo):
+        """
+        Agrega as espécies pelos táxons de um tipo.
+        Parâmetros:
+            tipo (str): Tipo de táxon (ex.: 'Reino', 'Familia').
+        Retorna:
+            list: Tuplas (ID_Tax, Nome, Especies, Ameacadas), da maior para a menor subárvore.
+        """
+        linhas = [
+            (self.ids[no], self.nomes[no],
+             self.species_count(self.ids[no]), self.species_count(self.ids[no], ameacadas=True))
+            for no in range(len(self.ids)) if self.tipos[no] == tipo
+        ]
+        return sorted(linhas, key=lambda linha: (-linha[2], linha[1]))
+
+
+_arvore = None
+
+
+def get_tree(conexao):
+    """Retorna a árvore taxonômica em memória, carregando-a na primeira chamada após uma alteração."""
+    global _arvore
+    if _arvore is None:
+        _arvore = TaxonomyTree.load(conexao)
+    return _arvore
+
+
+def invalidate_tree():
+    """Descarta a árvore em memória; a próxima chamada a get_tree a recarrega."""
+    global _arvore
+    _arvore = None
+
+
+def _on_tree_write(conexao, tabela, linhas_antes, linhas_depois):
+    if tabela is None or tabela.lower() in ("taxon", "hierarquia", "especie"):
+        invalidate_tree()
+
+
+add_write_listener(_on_tree_write)
+add_invalidation_listener(invalidate_tree)
+
+
+def print_rollup(conexao, tipo="Reino"):
+    """
+    Exibe o número de espécies (total e ameaçadas) por táxon de um tipo, calculado na árvore em memória.
+    Retorna:
+        list: Tuplas (ID_Tax, Nome, Especies, Ameacadas) (ver TaxonomyTree.rollup).
+    """
+    linhas = get_tree(conexao).rollup(tipo)
+    tabela = PrettyTable()
+    tabela.field_names = ["ID", tipo, "Espécies", "Ameaçadas", "% Ameaçadas"]
+    for id_tax, nome, total, ameacadas in linhas:
+        tabela.add_row([id_tax, nome, total, ameacadas, f"{ameacadas / total:.1%}" if total else "-"])
+    print(tabela)
+    return linhas
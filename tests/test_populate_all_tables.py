@@ -0,0 +1,250 @@
+"""
+Testes do agendador de populate_all_tables com um substituto local da API (parâmetro `completion`).
+O banco é simulado em memória; as inserções são registradas em vez de executadas.
+"""
+import json
+import re
+import threading
+import time
+
+import pytest
+
+for _modulo in ("mysql.connector", "openai", "requests", "PIL", "duckduckgo_search", "prettytable",
+                "matplotlib", "numpy"):
+    pytest.importorskip(_modulo)
+
+import ia_integration as ia
+import llm_cache
+
+
+# tabela -> (colunas, chave primária, tabelas referenciadas)
+ESQUEMA = {
+    "Projeto": (["ID_Proj", "Nome"], ["ID_Proj"], []),
+    "Financiador": (["ID_Financiador", "Nome"], ["ID_Financiador"], []),
+    "Categoria": (["ID_Categ", "Nome"], ["ID_Categ"], []),
+    "Financiamento": (["ID_Financiamento", "ID_Proj", "ID_Financiador"], ["ID_Financiamento"],
+                      ["Projeto", "Financiador"]),
+    "Proj_Cat": (["ID_Proj", "ID_Categ"], ["ID_Proj", "ID_Categ"], ["Projeto", "Categoria"]),
+}
+
+CICLO = {
+    "Alfa": (["ID_Alfa", "ID_Beta"], ["ID_Alfa"], ["Beta"]),
+    "Beta": (["ID_Beta", "ID_Alfa"], ["ID_Beta"], ["Alfa"]),
+}
+
+
+class FakeCursor:
+    def __init__(self, banco):
+        self.banco = banco
+        self._linhas = []
+
+    def execute(self, sql, params=None):
+        with self.banco.trava:
+            self._linhas = self._run(sql)
+
+    def _run(self, sql):
+        contagens = re.findall(r"SELECT '(\w+)', COUNT\(\*\) FROM `\w+`", sql)
+        if contagens:
+            return [(tabela, len(self.banco.linhas[tabela])) for tabela in contagens]
+        m = re.match(r"SELECT COUNT\(\*\) FROM `(\w+)`", sql)
+        if m:
+            return [(len(self.banco.linhas[m.group(1)]),)]
+        m = re.match(r"SELECT \* FROM `(\w+)` LIMIT (\d+)", sql)
+        if m:
+            return [tuple(linha) for linha in self.banco.linhas[m.group(1)][:int(m.group(2))]]
+        m = re.match(r"SELECT (.+) FROM `(\w+)`$", sql)
+        if m:
+            colunas = self.banco.esquema[m.group(2)][0]
+            posicoes = [colunas.index(nome) for nome in re.findall(r"`(\w+)`", m.group(1))]
+            return [tuple(linha[p] for p in posicoes) for linha in self.banco.linhas[m.group(2)]]
+        raise AssertionError(f"Consulta inesperada: {sql}")
+
+    def fetchall(self):
+        return self._linhas
+
+    def fetchone(self):
+        return self._linhas[0] if self._linhas else None
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """Banco em memória: linhas por tabela e o registro ordenado dos eventos (geração e inserção)."""
+
+    def __init__(self, esquema):
+        self.esquema = esquema
+        self.linhas = {tabela: [] for tabela in esquema}
+        self.eventos = []
+        self.trava = threading.Lock()
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def event(self, tipo, tabela):
+        with self.trava:
+            self.eventos.append((tipo, tabela))
+
+    def index(self, tipo, tabela):
+        return self.eventos.index((tipo, tabela))
+
+
+class FakeCompletion:
+    """Substituto do endpoint de chat: gera registros para o bloco pedido e mede a concorrência."""
+
+    def __init__(self, banco, atraso=0.05):
+        self.banco = banco
+        self.atraso = atraso
+        self.ativas = 0
+        self.max_ativas = 0
+        self.chamadas = 0
+        self._trava = threading.Lock()
+
+    def __call__(self, modelo, mensagens, temperatura, max_tokens):
+        prompt = mensagens[-1]["content"]
+        nome = re.search(r"registros para `(\w+)`", prompt).group(1)
+        tabela = next(t for t in self.banco.esquema if t.upper() == nome)
+        self.banco.event("gerar", tabela)
+        with self._trava:
+            self.ativas += 1
+            self.chamadas += 1
+            self.max_ativas = max(self.max_ativas, self.ativas)
+        try:
+            time.sleep(self.atraso)
+            return json.dumps({"registros": self._records(tabela, prompt)})
+        finally:
+            with self._trava:
+                self.ativas -= 1
+
+    def _records(self, tabela, prompt):
+        colunas, chave, _ = self.banco.esquema[tabela]
+        quantidade = int(re.search(r"Gere (\d+) registros", prompt).group(1))
+        faixa = re.search(r"(\w+): use APENAS valores de (\d+) a (\d+)", prompt)
+        primeiro = int(faixa.group(2)) if faixa else 1
+        registros = []
+        for i in range(quantidade):
+            registro = {}
+            for coluna in colunas:
+                if faixa and coluna == faixa.group(1):
+                    registro[coluna] = primeiro + i
+                elif coluna.startswith("ID_"):
+                    registro[coluna] = i + 1
+                else:
+                    registro[coluna] = f"{tabela} {primeiro + i}"
+            registros.append(registro)
+        return registros
+
+
+@pytest.fixture
+def banco_falso(monkeypatch, tmp_path):
+    def instalar(esquema):
+        banco = FakeDatabase(esquema)
+
+        def colunas(conexao, tabela):
+            nomes, chave, _ = esquema[tabela]
+            return [{"nome": nome, "tipo": "int" if nome.startswith("ID_") else "varchar(50)",
+                     "chave": "PRI" if nome in chave else "", "extra": ""} for nome in nomes]
+
+        def inserir(conexao, tabela, dados):
+            banco.event("inserir", tabela)
+            nomes = esquema[tabela][0]
+            with banco.trava:
+                banco.linhas[tabela].extend([registro.get(nome) for nome in nomes] for registro in dados["registros"])
+            return True
+
+        monkeypatch.setattr(ia, "list_tables", lambda conexao: list(esquema))
+        monkeypatch.setattr(ia, "get_schema_info", lambda conexao: {t: colunas(conexao, t) for t in esquema})
+        monkeypatch.setattr(ia, "get_columns", colunas)
+        monkeypatch.setattr(ia, "get_primary_key", lambda conexao, tabela: list(esquema[tabela][1]))
+        monkeypatch.setattr(ia, "get_indexes", lambda conexao, tabela: {
+            "PRIMARY": {"unico": True, "colunas": list(esquema[tabela][1])}})
+        monkeypatch.setattr(ia, "table_dependencies", lambda conexao, tabelas=None: {
+            t: set(esquema[t][2]) for t in (tabelas or esquema)})
+        monkeypatch.setattr(ia, "dependency_levels", lambda conexao, tabelas=None: [list(esquema)])
+        monkeypatch.setattr(ia, "insert_data_from_json", inserir)
+        cache = llm_cache.LLMCache(str(tmp_path / "llm_cache.sqlite3"))
+        monkeypatch.setattr(ia, "cache_llm", cache)
+        monkeypatch.setattr(llm_cache, "cache_llm", cache)
+        return banco
+
+    return instalar
+
+
+def test_dependent_tables_wait_for_parents(banco_falso):
+    banco = banco_falso(ESQUEMA)
+    completion = FakeCompletion(banco)
+
+    sucessos, erros = ia.populate_all_tables(banco, n_linhas=5, max_workers=4, completion=completion)
+
+    assert (sucessos, erros) == (len(ESQUEMA), 0)
+    for tabela, (_, _, pais) in ESQUEMA.items():
+        for pai in pais:
+            # A geração da filha só começa depois que o pai foi inserido
+            assert banco.index("gerar", tabela) > banco.index("inserir", pai)
+
+
+def test_inserts_follow_fk_order(banco_falso):
+    banco = banco_falso(ESQUEMA)
+
+    ia.populate_all_tables(banco, n_linhas=5, max_workers=4, completion=FakeCompletion(banco))
+
+    inseridas = [tabela for tipo, tabela in banco.eventos if tipo == "inserir"]
+    assert sorted(inseridas) == sorted(ESQUEMA)
+    for tabela, (_, _, pais) in ESQUEMA.items():
+        assert all(inseridas.index(pai) < inseridas.index(tabela) for pai in pais)
+        assert banco.linhas[tabela]
+
+
+def test_concurrent_calls_limited_by_max_workers(banco_falso):
+    banco = banco_falso(ESQUEMA)
+    completion = FakeCompletion(banco, atraso=0.1)
+
+    # 60 linhas = 3 blocos por tabela independente: 9 chamadas disputando 2 workers
+    ia.populate_all_tables(banco, n_linhas=60, max_workers=2, completion=completion)
+
+    assert completion.chamadas >= 9
+    assert completion.max_ativas == 2
+
+
+def test_dependency_cycle_is_released(banco_falso, capsys):
+    banco = banco_falso(CICLO)
+
+    sucessos, erros = ia.populate_all_tables(banco, n_linhas=5, max_workers=2, completion=FakeCompletion(banco))
+
+    assert (sucessos, erros) == (2, 0)
+    assert "dependência circular" in capsys.readouterr().out
+    assert {tabela for tipo, tabela in banco.eventos if tipo == "inserir"} == set(CICLO)
+
+
+def test_rate_limiter_blocks_when_request_window_is_full():
+    limitador = ia.RateLimiter(requisicoes_minuto=2, tokens_minuto=1000, janela=0.3)
+
+    assert limitador.acquire(10) < 0.05
+    assert limitador.acquire(10) < 0.05
+    inicio = time.monotonic()
+    limitador.acquire(10)
+    assert time.monotonic() - inicio >= 0.25
+    assert limitador.espera_total >= 0.25
+
+
+def test_rate_limiter_blocks_when_token_window_is_full():
+    limitador = ia.RateLimiter(requisicoes_minuto=100, tokens_minuto=100, janela=0.3)
+
+    assert limitador.acquire(60) < 0.05
+    inicio = time.monotonic()
+    limitador.acquire(60)
+    assert time.monotonic() - inicio >= 0.25
+
+
+def test_populate_respects_rate_limiter(banco_falso):
+    banco = banco_falso(ESQUEMA)
+    limitador = ia.RateLimiter(requisicoes_minuto=3, tokens_minuto=10 ** 9, janela=0.3)
+    completion = FakeCompletion(banco, atraso=0)
+
+    inicio = time.monotonic()
+    ia.populate_all_tables(banco, n_linhas=5, max_workers=4, limitador=limitador, completion=completion)
+
+    # 5 chamadas com no máximo 3 por janela exigem ao menos uma espera de uma janela
+    assert completion.chamadas == len(ESQUEMA)
+    assert limitador.espera_total > 0
+    assert time.monotonic() - inicio >= 0.25
@@ -0,0 +1,106 @@
+import threading
+
+
+LIMITE_IMAGENS = 10000   # Acima disso, escritas são notificadas sem as linhas (atualização completa)
+
+_ouvintes_escrita = []
+_ouvintes_commit = []
+_pendentes = {}          # conexão -> tabelas alteradas na transação aberta (None = tabelas desconhecidas)
+_trava_pendentes = threading.Lock()
+
+
+def add_write_listener(ouvinte):
+    """
+    Registra uma função chamada após cada escrita feita pelos caminhos da aplicação
+    (inserção em lotes, inserção/atualização/remoção manual, cargas e consultas livres).
+    A função recebe (conexao, tabela, linhas_antes, linhas_depois):
+        tabela (str ou None): Tabela alterada; None indica que tabelas desconhecidas mudaram.
+        linhas_antes (list ou None): Linhas (dicts) antes da escrita; [] em inserções.
+        linhas_depois (list ou None): Linhas (dicts) depois da escrita; [] em remoções.
+    Se as linhas forem None, o ouvinte deve tratar a tabela inteira como alterada.
+    O ouvinte roda na mesma conexão e transação da escrita, antes do commit
+    (para reagir só ao que foi confirmado, use add_commit_listener).
+    """
+    if ouvinte not in _ouvintes_escrita:
+        _ouvintes_escrita.append(ouvinte)
+
+
+def add_commit_listener(ouvinte):
+    """
+    Registra uma função chamada depois do commit de uma transação que notificou escritas.
+    A função recebe (tabelas): conjunto das tabelas alteradas (None no conjunto indica
+    tabelas desconhecidas). Transações desfeitas (rollback) não são notificadas.
+    """
+    if ouvinte not in _ouvintes_commit:
+        _ouvintes_commit.append(ouvinte)
+
+
+def remove_write_listener(ouvinte):
+    """Remove um ouvinte registrado com add_write_listener."""
+    if ouvinte in _ouvintes_escrita:
+        _ouvintes_escrita.remove(ouvinte)
+
+
+def notify_write(conexao, tabela, linhas_antes=None, linhas_depois=None):
+    """
+    Notifica os ouvintes de que `tabela` foi alterada (ver add_write_listener).
+    Erros de um ouvinte são exibidos e não interrompem a escrita nem os demais ouvintes.
+    """
+    with _trava_pendentes:
+        _pendentes.setdefault(conexao, set()).add(tabela.lower() if tabela else None)
+    for ouvinte in list(_ouvintes_escrita):
+        try:
+            ouvinte(conexao, tabela, linhas_antes, linhas_depois)
+        except Exception as err:
+            print(f"Erro ao processar alteração em {tabela or 'tabelas'}: {err}")
+
+
+def notify_commit(conexao):
+    """Chamada após o commit de `conexao`: repassa as tabelas alteradas aos ouvintes de commit."""
+    with _trava_pendentes:
+        tabelas = _pendentes.pop(conexao, None)
+    if not tabelas:
+        return
+    for ouvinte in list(_ouvintes_commit):
+        try:
+            ouvinte(tabelas)
+        except Exception as err:
+            print(f"Erro ao processar commit: {err}")
+
+
+def notify_rollback(conexao):
+    """Chamada após o rollback de `conexao`: descarta as escritas pendentes da transação."""
+    with _trava_pendentes:
+        _pendentes.pop(conexao, None)
+
+
+def uncommitted_tables():
+    """Tabelas com escritas ainda não confirmadas em alguma conexão (None = tabelas desconhecidas)."""
+    with _trava_pendentes:
+        return set().union(*_pendentes.values())
+
+
+def fetch_row_images(conexao, tabela, condicao, params=None, limite=LIMITE_IMAGENS):
+    """
+    Lê as linhas que satisfazem uma condição WHERE, para registrar a imagem antes de um UPDATE/DELETE.
+    Parâmetros:
+        tabela (str): Nome real da tabela.
+        condicao (str): Condição WHERE (sem a palavra WHERE).
+        limite (int): Número máximo de linhas lidas.
+    Retorna:
+        list ou None: Linhas como dicionários, ou None se passarem de `limite`
+                      (o ouvinte fará uma atualização completa).
+    """
+    if not _ouvintes_escrita:
+        return None
+    cursor = conexao.cursor(dictionary=True)
+    try:
+        query = f"SELECT * FROM `{tabela}` WHERE {condicao} LIMIT {int(limite) + 1}"
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        linhas = cursor.fetchall()
+    finally:
+        cursor.close()
+    return linhas if len(linhas) <= limite else None